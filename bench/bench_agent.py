@@ -0,0 +1,70 @@
+"""CPU cost of the host perfmon agent.
+
+Runs the agent at the given rate (default 10 Hz) against /dev/null and reports the CPU time it
+used as a share of one core. Exits with status 1 if that is above the budget (default 0.5%).
+Also reports the cost of a single sample+encode+write measured back to back.
+
+    python bench/bench_agent.py [--rate 10] [--duration 10] [--budget 0.5]
+"""
+
+import argparse
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "host")
+)
+
+from perfmon_agent import Agent, Sampler, SerialLink  # noqa: E402
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rate", type=float, default=10.0)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument(
+        "--budget", type=float, default=0.5, help="allowed share of one core in percent"
+    )
+    args = parser.parse_args()
+
+    sampler = Sampler()
+    link = SerialLink.open(os.devnull)
+    agent = Agent(sampler, link)
+
+    ticks = 1000
+    start = time.perf_counter()
+    for _ in range(ticks):
+        agent.tick()
+    per_tick_us = (time.perf_counter() - start) / ticks * 1_000_000
+
+    link.bytes_sent = 0
+    cpu_start = cpu_seconds()
+    wall_start = time.monotonic()
+    agent.run(args.rate, args.duration)
+    wall = time.monotonic() - wall_start
+    load = (cpu_seconds() - cpu_start) / wall * 100
+
+    sampler.close()
+    link.close()
+    print("per sample: {:.1f} us".format(per_tick_us))
+    print(
+        "{:.1f} Hz for {:.1f} s: {:.3f}% of one core (budget {}%), {:.1f} bytes/s".format(
+            args.rate, wall, load, args.budget, link.bytes_sent / wall
+        )
+    )
+    if load > args.budget:
+        print("FAIL: over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Link traffic and redraws of delta frames vs. sending every sample as a keyframe.
+
+Replays a trace recorded with `perfmon_agent.py --record` through both encodings and through
+the pico's `protocol.FrameParser`, and reports bytes/s on the link, records applied and row
+cells changed on the pico (each one is a redraw). Also checks that both end up showing the
+same values within the deadbands.
+
+Then it replays the deltas once more over a link that loses the frames numbered in
+`LOST_FRAMES`. Each loss is a SEQ gap: the pico may show stale rows from there on, but only
+until the next keyframe, which it has to show exactly. Exits with status 1 otherwise.
+
+    python bench/bench_delta.py [--trace bench/traces/sample.csv] [--keyframe-interval 50]
+"""
+
+import argparse
+import os
+import sys
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _root)
+sys.path.insert(0, os.path.join(_root, "host"))
+
+from perfmon import protocol  # noqa: E402
+from perfmon_agent import DEFAULT_DEADBANDS, read_trace  # noqa: E402
+
+# frames (counted from 0) the lossy replay drops if they are deltas, singles and a burst
+LOST_FRAMES = (7, 30, 31, 32, 95, 160, 190)
+
+
+class PicoState:
+    """What the display shows, updated the same way `MetricSink` on the pico does"""
+
+    def __init__(self):
+        self.rows = {}
+        self.records = 0
+        self.redraws = 0
+
+    def on_record(self, row, fields, flags, unit_1, unit_2, value_1, value_2):
+        self.records += 1
+        state = self.rows.setdefault(row, [None] * 5)
+        new = list(state)
+        if fields & protocol.FIELD_FLAGS:
+            new[0] = flags
+        if fields & protocol.FIELD_UNITS:
+            new[1] = unit_1
+            new[2] = unit_2
+        if fields & protocol.FIELD_VALUE_1:
+            new[3] = None if flags & protocol.FLAG_BLANK_1 else value_1
+        if fields & protocol.FIELD_VALUE_2:
+            new[4] = None if flags & protocol.FLAG_BLANK_2 else value_2
+        self.redraws += sum(1 for a, b in zip(state, new) if a != b)
+        self.rows[row] = new
+
+
+def replay(samples, encode):
+    pico = PicoState()
+    parser = protocol.FrameParser(pico.on_record)
+    sent = 0
+    frames = 0
+    max_error = 0
+    for _, records in samples:
+        frame = encode(records)
+        if frame:
+            sent += len(frame)
+            frames += 1
+            parser.feed(frame)
+        for row, flags, _, _, value_1, value_2 in records:
+            shown = pico.rows[row]
+            if not flags & protocol.FLAG_BLANK_1:
+                max_error = max(max_error, abs(shown[3] - value_1))
+            if not flags & protocol.FLAG_BLANK_2:
+                max_error = max(max_error, abs(shown[4] - value_2))
+    return sent, frames, pico, parser, max_error
+
+
+def _wrong(pico, records) -> bool:
+    """True if a row is further off than its deadband, or has other flags or units"""
+    for row, flags, unit_1, unit_2, value_1, value_2 in records:
+        shown = pico.rows.get(row)
+        if shown is None or shown[0:3] != [flags, unit_1, unit_2]:
+            return True
+        deadband_1, deadband_2 = DEFAULT_DEADBANDS.get(row, (1, 1))
+        if not flags & protocol.FLAG_BLANK_1 and abs(shown[3] - value_1) >= deadband_1:
+            return True
+        if not flags & protocol.FLAG_BLANK_2 and abs(shown[4] - value_2) >= deadband_2:
+            return True
+    return False
+
+
+def _exact(pico, records) -> bool:
+    for row, flags, unit_1, unit_2, value_1, value_2 in records:
+        expected = [
+            flags,
+            unit_1,
+            unit_2,
+            None if flags & protocol.FLAG_BLANK_1 else value_1,
+            None if flags & protocol.FLAG_BLANK_2 else value_2,
+        ]
+        if pico.rows.get(row) != expected:
+            return False
+    return True
+
+
+def replay_lossy(samples, keyframe_interval: int, lost):
+    """Replay the delta encoding, the delta frames numbered in `lost` never arrive.
+
+    Returns:
+        frames lost, samples shown wrong while a gap was open, deltas the pico ignored and the
+        problems found
+    """
+    encoder = protocol.DeltaEncoder(keyframe_interval, DEFAULT_DEADBANDS)
+    pico = PicoState()
+    parser = protocol.FrameParser(pico.on_record)
+    frames = 0
+    dropped = 0
+    # sample of the first lost frame while a gap is open, else -1
+    gap = -1
+    stale = 0
+    problems = []
+    for index, (_, records) in enumerate(samples):
+        frame = encoder.encode(records)
+        if frame:
+            # SYNC_1 SYNC_2 LENGTH MSG_TYPE ...
+            keyframe = frame[3] == protocol.MSG_SAMPLE
+            if frames in lost and not keyframe:
+                dropped += 1
+                if gap < 0:
+                    gap = index
+            else:
+                parser.feed(frame)
+                if keyframe and gap >= 0:
+                    gap = -1
+                    if not _exact(pico, records):
+                        problems.append(
+                            "sample {}: keyframe after a gap not shown exactly".format(
+                                index
+                            )
+                        )
+            frames += 1
+        if gap >= 0 and index - gap == keyframe_interval:
+            problems.append(
+                "sample {}: no keyframe since the frame lost at sample {}".format(
+                    index, gap
+                )
+            )
+        if _wrong(pico, records):
+            if gap >= 0:
+                stale += 1
+            else:
+                problems.append("sample {}: wrong row outside of a gap".format(index))
+    if not parser.dropped_deltas:
+        problems.append("the pico did not notice the lost frames")
+    return dropped, stale, parser.dropped_deltas, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--trace", default=os.path.join(_root, "bench", "traces", "sample.csv")
+    )
+    parser.add_argument("--keyframe-interval", type=int, default=50)
+    args = parser.parse_args()
+
+    samples = read_trace(args.trace)
+    duration = samples[-1][0] - samples[0][0] or 1.0
+    seq = [0]
+
+    def keyframes(records):
+        frame = protocol.encode_sample(seq[0], records)
+        seq[0] = (seq[0] + 1) & 0xFF
+        return frame
+
+    delta = protocol.DeltaEncoder(args.keyframe_interval, DEFAULT_DEADBANDS)
+    print(
+        "{} samples over {:.1f} s from {}".format(
+            len(samples), duration, os.path.relpath(args.trace)
+        )
+    )
+    print(
+        "{:<20} {:>10} {:>8} {:>10} {:>10} {:>10}".format(
+            "", "bytes/s", "frames", "records", "redraws", "max error"
+        )
+    )
+    for name, encode in (
+        ("keyframe every tick", keyframes),
+        ("delta+deadband", delta.encode),
+    ):
+        sent, frames, pico, frame_parser, max_error = replay(samples, encode)
+        assert frame_parser.crc_errors == 0 and frame_parser.dropped_deltas == 0
+        print(
+            "{:<20} {:>10.1f} {:>8} {:>10} {:>10} {:>10}".format(
+                name, sent / duration, frames, pico.records, pico.redraws, max_error
+            )
+        )
+
+    dropped, stale, ignored, problems = replay_lossy(
+        samples, args.keyframe_interval, LOST_FRAMES
+    )
+    print(
+        "{} frames lost: {} deltas ignored, {} samples stale until the next keyframe".format(
+            dropped, ignored, stale
+        )
+    )
+    if problems:
+        print("\n".join(problems))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Render cost of the display path, off-device.
+
+Sets up the display like `main.py` with the emulated MicroPython modules from `sim/` and runs
+typical update patterns through the real `InfoRow`/`RenderScheduler`/`DirtyPages` code. For
+each pattern it reports the I2C transactions and bytes per frame (what really goes over the
+bus, counted by the emulated `machine.I2C`), the resulting bus time at 400 kHz and the Python
+time per frame (CPython, only comparable between runs on the same machine).
+
+The last frame of every pattern is compared against a golden image in bench/golden/ as
+decoded by the emulated panel, and the bytes per frame against bench/golden/bytes.json.
+More bytes than recorded or a different image exits with status 1. The reference is only
+valid for the amount of frames it was recorded with.
+
+    python bench/bench_render.py [--frames 100] [--dump DIR] [--update-golden]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _root)
+
+import sim  # noqa: E402
+
+sim.install()
+
+import main  # noqa: E402
+from perfmon import display  # noqa: E402
+
+renderer = main.start_display()
+cpu, gpu, mem, hdd = renderer.rows
+
+GOLDEN_DIR = os.path.join(_root, "bench", "golden")
+
+
+def full_show(i: int):
+    """What the code did before `DirtyPages`: change a digit, push the whole framebuffer"""
+    cpu.set_values(value_2=i % 100)
+    cpu.render()
+    display.display.show()
+
+
+def one_digit(i: int):
+    cpu.set_values(value_2=40 + i % 10)
+    renderer.request(0)
+    renderer.frame()
+
+
+def all_values(i: int):
+    cpu.set_values(i % 100, (i * 7) % 100)
+    gpu.set_values(30 + i % 50, (i * 3) % 100)
+    mem.set_values(i % 16, (i * 5) % 100)
+    hdd.set_values((i * 37) % 1000)
+    renderer.request_all()
+    renderer.frame()
+
+
+def warn_toggle(i: int):
+    mem.warn(bool(i % 2))
+    renderer.request(2)
+    renderer.frame()
+
+
+def sparkline(i: int):
+    cpu.set_values(value_2=(i * 13) % 100)
+    hdd.set_values((i * 91) % 1000)
+    cpu.sample_history()
+    hdd.sample_history()
+    renderer.request_all()
+    renderer.frame()
+
+
+graph_page = None
+
+
+def graph_scroll(i: int):
+    global graph_page
+    if graph_page is None:
+        graph_page = display.GraphPage(cpu)
+        renderer.show_graph(graph_page)
+    cpu.set_values(value_2=(i * 13) % 100)
+    cpu.sample_history()
+    renderer.request(0)
+    renderer.frame()
+
+
+def page_switch(i: int):
+    if i % 2:
+        renderer.show_graph(display.GraphPage(cpu))
+    else:
+        renderer.show_rows()
+    renderer.frame()
+
+
+PATTERNS = (
+    ("full show()", full_show),
+    ("one digit", one_digit),
+    ("all values", all_values),
+    ("warn icon toggle", warn_toggle),
+    ("sparklines", sparkline),
+    ("graph page scroll", graph_scroll),
+    ("page switch", page_switch),
+)
+
+
+def main_():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument(
+        "--dump", metavar="DIR", help="also save every last frame as PNG"
+    )
+    parser.add_argument(
+        "--update-golden",
+        action="store_true",
+        help="write the current images and byte counts as the new reference",
+    )
+    args = parser.parse_args()
+
+    i2c = display.i2c
+    panel = display.display.panel
+    golden_bytes_path = os.path.join(GOLDEN_DIR, "bytes.json")
+    golden = {"frames": args.frames, "bytes": {}}
+    if os.path.exists(golden_bytes_path) and not args.update_golden:
+        with open(golden_bytes_path) as f:
+            golden = json.load(f)
+    check = not args.update_golden and golden["frames"] == args.frames
+    if not check and not args.update_golden:
+        print(
+            "reference was recorded with --frames {}, not checking".format(
+                golden["frames"]
+            )
+        )
+    measured = {}
+    failed = []
+
+    print(
+        "{:<20} {:>10} {:>10} {:>10} {:>10}".format(
+            "pattern", "i2c xfers", "bytes", "bus us", "python us"
+        )
+    )
+    for name, pattern in PATTERNS:
+        # settle on the pattern's first frame, so switching patterns is not counted
+        pattern(0)
+        i2c.reset_stats()
+        start = time.perf_counter()
+        for i in range(1, args.frames + 1):
+            pattern(i)
+        took = time.perf_counter() - start
+        per_frame = i2c.bytes / args.frames
+        measured[name] = per_frame
+        print(
+            "{:<20} {:>10.1f} {:>10.1f} {:>10.0f} {:>10.0f}".format(
+                name,
+                i2c.transactions / args.frames,
+                per_frame,
+                i2c.bus_time_us / args.frames,
+                took / args.frames * 1_000_000,
+            )
+        )
+
+        slug = name.replace(" ", "_").replace("()", "")
+        image = panel.to_pgm(display.display_w)
+        golden_image = os.path.join(GOLDEN_DIR, slug + ".pgm")
+        if args.update_golden:
+            os.makedirs(GOLDEN_DIR, exist_ok=True)
+            with open(golden_image, "wb") as f:
+                f.write(image)
+        elif check and os.path.exists(golden_image):
+            with open(golden_image, "rb") as f:
+                if f.read() != image:
+                    failed.append(
+                        "{}: image differs from {}".format(name, golden_image)
+                    )
+        if check and per_frame > golden["bytes"].get(name, per_frame):
+            failed.append(
+                "{}: {:.1f} bytes per frame, was {:.1f}".format(
+                    name, per_frame, golden["bytes"][name]
+                )
+            )
+        if args.dump:
+            os.makedirs(args.dump, exist_ok=True)
+            panel.save(os.path.join(args.dump, slug + ".png"), display.display_w)
+
+    if args.update_golden:
+        with open(golden_bytes_path, "w") as f:
+            json.dump({"frames": args.frames, "bytes": measured}, f, indent=2)
+            f.write("\n")
+    for failure in failed:
+        print("FAIL:", failure)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_()
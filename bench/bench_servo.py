@@ -0,0 +1,207 @@
+"""Servo sweeps of `ServoGroup`, off-device on a virtual clock.
+
+Sweeps `--servos` servos from 0° to spread out targets with each easing curve, while the
+display renders in its own task (a producer requests a row every `--frame-ms`, like values
+coming in from the host), against the emulated `machine`/`utime`/`uasyncio` from `sim/`. The
+PWM of every servo records each duty change with its virtual timestamp. Reported per curve:
+
+* done ms: time from `move_all()` until the last servo reached its target
+* updates: `ServoGroup.update()` passes
+* max step: largest angle change of a servo between two of its duty changes
+* frames: frames the display drew meanwhile, and the longest gap between two
+
+It fails if a servo does not end on the pulse width of its target or moves backwards.
+Then it compares the Python time of one update of all servos against the previous `Servo`,
+which computed the pulse width with float math on every `write()` (CPython, only comparable
+between runs on the same machine).
+
+    python bench/bench_servo.py [--servos 8] [--duration-ms 1000] [--frame-ms 50]
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _root)
+
+import sim  # noqa: E402
+
+sim.install()
+
+import machine  # noqa: E402
+import uasyncio  # noqa: E402
+from sim import clock  # noqa: E402
+
+import main  # noqa: E402
+from perfmon import servo  # noqa: E402
+
+CURVES = (
+    ("linear", servo.LINEAR),
+    ("in", servo.EASE_IN),
+    ("out", servo.EASE_OUT),
+    ("in-out", servo.EASE_IN_OUT),
+)
+# GPIOs used only by this benchmark
+FIRST_PIN = 10
+UPDATES_FOR_COST = 2000
+
+
+class LegacyServo:
+    """`Servo.write()` as it was before: radians and a float slope on every call"""
+
+    def __init__(
+        self, pin_id, min_us=544.0, max_us=2400.0, min_deg=0.0, max_deg=180.0, freq=50
+    ):
+        self.pwm = machine.PWM(machine.Pin(pin_id))
+        self.pwm.freq(freq)
+        self.current_us = 0.0
+        self._slope = (min_us - max_us) / (
+            math.radians(min_deg) - math.radians(max_deg)
+        )
+        self._offset = min_us
+
+    def write(self, deg):
+        self.write_rad(math.radians(deg))
+
+    def write_rad(self, rad):
+        self.write_us(rad * self._slope + self._offset)
+
+    def write_us(self, us):
+        self.current_us = us
+        self.pwm.duty_ns(int(self.current_us * 1000.0))
+
+
+def targets(count: int):
+    return tuple(30 + 150 * i // max(count - 1, 1) for i in range(count))
+
+
+def check(servos, degs):
+    """Largest angle step of any servo, raises if a servo moved backwards or missed"""
+    largest = 0
+    for s, deg in zip(servos, degs):
+        duties = [duty for _, duty in s.pwm.history]
+        if duties[-1] != s.duty_ns[deg - s.min_deg]:
+            raise SystemExit("servo ended at {} ns, not at {}°".format(duties[-1], deg))
+        angles = [
+            (duty - duties[0]) * 180 / (s.duty_ns[-1] - duties[0]) for duty in duties
+        ]
+        for a, b in zip(angles, angles[1:]):
+            if b < a:
+                raise SystemExit("servo moved backwards")
+            largest = max(largest, b - a)
+    return largest
+
+
+async def sweep(group, degs, duration_ms: int, curve, frame_ms: int):
+    renderer = main.start_display()
+    frames = []
+    done = False
+
+    async def produce():
+        # values coming in from the host, each request draws a frame
+        value = 0
+        while not done:
+            value = (value + 7) % 100
+            renderer.rows[0].set_values(value_2=value)
+            renderer.request(0)
+            await uasyncio.sleep_ms(frame_ms)
+
+    async def count_frames():
+        seen = renderer.frames
+        while not done:
+            await uasyncio.sleep_ms(1)
+            if renderer.frames != seen:
+                seen = renderer.frames
+                frames.append(clock.now_us())
+
+    tasks = [
+        uasyncio.create_task(renderer.run()),
+        uasyncio.create_task(group.run()),
+        uasyncio.create_task(produce()),
+        uasyncio.create_task(count_frames()),
+    ]
+    start = clock.now_us()
+    group.move_all(degs, duration_ms, curve)
+    await group.wait()
+    elapsed = clock.now_us() - start
+    done = True
+    for task in tasks:
+        task.cancel()
+    gaps = [b - a for a, b in zip(frames, frames[1:])]
+    return elapsed, len(frames), max(gaps) if gaps else 0
+
+
+def cost_per_update_us(count: int):
+    """Python time of one update of `count` sweeping servos, with `ServoGroup` and with the
+    same sweep done in floats on top of `LegacyServo.write()`
+    """
+    servos = tuple(servo.Servo(FIRST_PIN + i) for i in range(count))
+    group = servo.ServoGroup(servos)
+    for s in servos:
+        s.write(0)
+    group.move_all((180,) * count, UPDATES_FOR_COST * 5, servo.EASE_IN_OUT)
+    start = time.perf_counter()
+    for _ in range(UPDATES_FOR_COST):
+        # 5 ms per update, every servo gets a new angle on most passes
+        clock.advance_to(clock.now_us() + 5000)
+        group.update()
+    table = (time.perf_counter() - start) / UPDATES_FOR_COST * 1e6
+
+    legacy = tuple(LegacyServo(FIRST_PIN + i) for i in range(count))
+    start = time.perf_counter()
+    for n in range(UPDATES_FOR_COST):
+        clock.advance_to(clock.now_us() + 5000)
+        t = n / UPDATES_FOR_COST
+        eased = t * t * (3 - 2 * t)
+        for s in legacy:
+            s.write(180 * eased)
+    return table, (time.perf_counter() - start) / UPDATES_FOR_COST * 1e6
+
+
+def main_():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--servos", type=int, default=8)
+    parser.add_argument("--duration-ms", type=int, default=1000)
+    parser.add_argument("--frame-ms", type=int, default=50)
+    args = parser.parse_args()
+
+    degs = targets(args.servos)
+    print(
+        "{:<8} {:>8} {:>8} {:>9} {:>7} {:>12}".format(
+            "curve", "done ms", "updates", "max step", "frames", "max gap ms"
+        )
+    )
+    for name, curve in CURVES:
+        servos = tuple(servo.Servo(FIRST_PIN + i) for i in range(args.servos))
+        for s in servos:
+            s.write(0)
+        group = servo.ServoGroup(servos)
+        elapsed, frames, gap = uasyncio.run(
+            sweep(group, degs, args.duration_ms, curve, args.frame_ms)
+        )
+        print(
+            "{:<8} {:>8.1f} {:>8} {:>8.1f}° {:>7} {:>12.1f}".format(
+                name,
+                elapsed / 1000,
+                group.updates,
+                check(servos, degs),
+                frames,
+                gap / 1000,
+            )
+        )
+
+    table, legacy = cost_per_update_us(args.servos)
+    print(
+        "update of {} servos: {:.1f} us with the table, {:.1f} us with float math".format(
+            args.servos, table, legacy
+        )
+    )
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,343 @@
+"""Step timing of `DRV8825StepperMotor`, off-device on a virtual clock.
+
+Runs one revolution per stepping mode with each engine (blocking `rotate()`, timer driven
+`rotate_non_blocking()`, `rotate_async()`, 8 moves through `queue_rotate()` and the PIO program
+of `rotate_pio()`) against the
+emulated `machine`/`utime`/`uasyncio`/`rp2` from `sim/`. Every STEP pin edge is recorded with its virtual timestamp. Reported per run:
+
+* steps: rising edges on the STEP pin
+* rev ms: time from the call until the last edge, and its error against
+  `target_time_for_one_revolution_ms`
+* step Hz: achieved step frequency
+* interval: mean time between two edges (one pulse half period) and its
+  jitter (standard deviation and max deviation from the exact pulse delay,
+  or with `--ramp` from the interval the `StepRamp` asks for)
+* peak Hz: step frequency of the shortest step
+
+Virtual time only passes in sleeps and timer waits, so by default code costs nothing. Use
+`--sleep-overhead-us`/`--pin-cost-us` to model the interpreter overhead of the device.
+
+    python bench/bench_stepper.py [--target-ms 1000] [--modes FULL,1/8] [--engines blocking,timer,async,queue,pio]
+                                  [--ramp trapezoid|s-curve --accel 4] [--calibrate]
+
+With `--calibrate` it also runs every case at `CALIBRATE_CHECK_MS` per revolution and fails if a
+calibrated engine misses the revolution time by more than `CALIBRATED_ERROR_PERCENT`.
+
+`--ramp-tables` only builds the `StepRamp` tables of `RAMP_CASES`, ramps of up to 3 s, and
+reports their steps, length against the exact step times and build time. It fails if a table is
+off by more than 5%.
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _root)
+
+import sim  # noqa: E402
+
+sim.install()
+
+import machine  # noqa: E402
+import uasyncio  # noqa: E402
+import utime  # noqa: E402
+from sim import clock  # noqa: E402
+
+from perfmon.stepper import DRV8825StepperMotor as Motor, StepRamp  # noqa: E402
+
+MODES = (
+    Motor.MODE_FULL,
+    Motor.MODE_HALF,
+    Motor.MODE_QUARTER,
+    Motor.MODE_ONE_8,
+    Motor.MODE_ONE_16,
+    Motor.MODE_ONE_32,
+)
+
+# GPIOs used only by this benchmark, away from the ones main.py uses
+STEP_PIN = 26
+
+# With `--calibrate` every calibrated engine has to hit the revolution time this close (in %),
+# also at `CALIBRATE_CHECK_MS` where an edge at 1/32 lasts 19.53 us, not a whole us
+CALIBRATED_ERROR_PERCENT = 1.0
+CALIBRATE_CHECK_MS = 250
+# the engines `DRV8825StepperMotor.calibrate()` corrects, the queue runs on the timer correction
+CALIBRATED_ENGINES = ("blocking", "timer", "async", "queue")
+
+
+def make_motor(mode, target_ms: float) -> Motor:
+    return Motor(
+        step_pin=machine.Pin(STEP_PIN, machine.Pin.OUT),
+        mode_pins=(
+            machine.Pin(27, machine.Pin.OUT),
+            machine.Pin(28, machine.Pin.OUT),
+            machine.Pin(29, machine.Pin.OUT),
+        ),
+        mode=mode,
+        target_time_for_one_revolution_ms=target_ms,
+        skip_motor_init=True,
+    )
+
+
+def run_blocking(motor: Motor):
+    motor.rotate(1)
+
+
+def run_timer(motor: Motor):
+    result = motor.rotate_non_blocking(1)
+    while not result.done:
+        machine.idle()
+
+
+def run_async(motor: Motor):
+    uasyncio.run(motor.rotate_async(1))
+
+
+def run_queue(motor: Motor):
+    # the revolution as 8 queued moves, they have to run without a gap
+    for n in range(8):
+        motor.queue_rotate(1 / 8, last=n == 7)
+    while motor.moves.running:
+        machine.idle()
+    if motor.moves.underruns or motor.moves.sequences != 1:
+        print(
+            "  queue ran dry early: {} underruns, {} sequences".format(
+                motor.moves.underruns, motor.moves.sequences
+            )
+        )
+
+
+def run_pio(motor: Motor):
+    motor.use_pio()
+    result = motor.rotate_pio(1)
+    while not result.done:
+        machine.idle()
+
+
+ENGINES = {
+    "blocking": run_blocking,
+    "timer": run_timer,
+    "async": run_async,
+    "queue": run_queue,
+    "pio": run_pio,
+}
+
+
+# (profile, steps/s, steps/s²), the ramp takes v/a (trapezoid) or 1.5 v/a (s-curve)
+RAMP_CASES = (
+    (StepRamp.TRAPEZOID, 1600, 1600),
+    (StepRamp.TRAPEZOID, 6400, 3200),
+    (StepRamp.S_CURVE, 1600, 6400),
+    # 1 rev/s and 1 rev/s² at 1/8 stepping
+    (StepRamp.S_CURVE, 1600, 1600),
+    (StepRamp.S_CURVE, 6400, 3200),
+)
+
+
+def exact_step_time(profile: str, speed: float, accel: float, step: int) -> float:
+    """Time of step `step` on the ideal curve, in double precision"""
+    if profile == StepRamp.TRAPEZOID:
+        return math.sqrt(2 * step / accel)
+    duration = 1.5 * speed / accel
+    low, high = 0.0, duration
+    for _ in range(60):
+        middle = (low + high) / 2
+        u = middle / duration
+        if speed * duration * (u**3 - u**4 / 2) < step:
+            low = middle
+        else:
+            high = middle
+    return high
+
+
+def ramp_tables() -> bool:
+    print(
+        "{:<10} {:>8} {:>8} {:>7} {:>9} {:>9} {:>9}".format(
+            "profile", "steps/s", "steps/s2", "steps", "ramp ms", "exact ms", "build ms"
+        )
+    )
+    ok = True
+    for profile, speed, accel in RAMP_CASES:
+        start = time.perf_counter()
+        ramp = StepRamp(speed, accel, profile)
+        build_ms = (time.perf_counter() - start) * 1000
+        ramp_ms = sum(ramp.intervals) / 1000
+        # the same steps at their exact times, with the limits of the table
+        exact_ms = 0.0
+        last = 0.0
+        for step in range(1, len(ramp.intervals) + 1):
+            t = exact_step_time(profile, speed, accel, step)
+            interval = min(max((t - last) * 1_000_000, ramp.cruise_us), 0xFFFF)
+            exact_ms += interval / 1000
+            last = t
+        print(
+            "{:<10} {:>8} {:>8} {:>7} {:>9.1f} {:>9.1f} {:>9.1f}".format(
+                profile, speed, accel, len(ramp.intervals), ramp_ms, exact_ms, build_ms
+            )
+        )
+        if abs(ramp_ms - exact_ms) > exact_ms * 0.05:
+            print("  more than 5% off the exact ramp")
+            ok = False
+    return ok
+
+
+def measure(
+    mode,
+    engine: str,
+    target_ms: float,
+    ramp=None,
+    accel: float = 4,
+    calibrate: bool = False,
+):
+    motor = make_motor(mode, target_ms)
+    motor.set_mode(mode)
+    if calibrate:
+        uasyncio.run(motor.calibrate(modes=(mode,)))
+    if ramp:
+        motor.set_ramp(accel, ramp)
+    clock.reset()
+    step_pin = motor.step_pin
+    step_pin.edges.clear()
+    ENGINES[engine](motor)
+    edges = [t for t, _ in step_pin.edges]
+    steps = sum(1 for _, level in step_pin.edges if level)
+    if len(edges) < 2:
+        return steps, 0, 0, 0, 0, 0, 0, motor
+    rev_us = edges[-1]
+    intervals = [b - a for a, b in zip(edges, edges[1:])]
+    mean = sum(intervals) / len(intervals)
+    std = math.sqrt(sum((i - mean) ** 2 for i in intervals) / len(intervals))
+    if motor.ramp is not None and engine != "queue":
+        # queued moves don't ramp. The Python engines wait before every edge, the PIO raises STEP at the start of a step
+        first = 0 if engine == "pio" else 1
+        expected = [
+            motor.ramp.half_period_us(pulse, len(edges))
+            for pulse in range(first, first + len(intervals))
+        ]
+    else:
+        # the exact delay, the engines alternate whole us around it
+        expected = [
+            motor.target_time_for_one_revolution_ms
+            * 1000
+            / (motor.steps_for_one_revolution * 2)
+        ] * len(intervals)
+    worst = max(abs(i - e) for i, e in zip(intervals, expected))
+    step_hz = steps / (rev_us / 1_000_000) if rev_us else 0
+    shortest = min(a + b for a, b in zip(intervals[0::2], intervals[1::2]))
+    peak_hz = 1_000_000 / shortest if shortest else 0
+    return steps, rev_us, step_hz, peak_hz, mean, std, worst, motor
+
+
+def main_():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--target-ms", type=float, default=1000)
+    parser.add_argument(
+        "--modes", default=",".join(mode.name for mode in MODES), help="comma separated"
+    )
+    parser.add_argument("--engines", default=",".join(ENGINES), help="comma separated")
+    parser.add_argument(
+        "--sleep-overhead-us",
+        type=int,
+        default=0,
+        help="virtual time every sleep call costs on top",
+    )
+    parser.add_argument(
+        "--pin-cost-us", type=int, default=0, help="virtual time every pin write costs"
+    )
+    parser.add_argument(
+        "--ramp",
+        choices=("trapezoid", "s-curve"),
+        help="accelerate with this StepRamp profile",
+    )
+    parser.add_argument(
+        "--accel", type=float, default=4, help="ramp acceleration in rev/s² (default 4)"
+    )
+    parser.add_argument(
+        "--calibrate",
+        action="store_true",
+        help="run DRV8825StepperMotor.calibrate() for the mode before measuring",
+    )
+    parser.add_argument(
+        "--ramp-tables",
+        action="store_true",
+        help="only build and check the StepRamp tables of RAMP_CASES",
+    )
+    args = parser.parse_args()
+
+    if args.ramp_tables:
+        sys.exit(0 if ramp_tables() else 1)
+
+    utime.call_overhead_us = args.sleep_overhead_us
+    machine.Pin.write_cost_us = args.pin_cost_us
+    modes = [mode for mode in MODES if mode.name in args.modes.split(",")]
+
+    targets_ms = [args.target_ms]
+    if args.calibrate and args.target_ms != CALIBRATE_CHECK_MS:
+        targets_ms.append(CALIBRATE_CHECK_MS)
+    off = []
+    for target_ms in targets_ms:
+        if len(targets_ms) > 1:
+            print("{} ms per revolution".format(target_ms))
+        print(
+            "{:<8} {:<9} {:>6} {:>9} {:>8} {:>9} {:>9} {:>9} {:>9} {:>9}".format(
+                "mode",
+                "engine",
+                "steps",
+                "rev ms",
+                "error",
+                "step Hz",
+                "peak Hz",
+                "interval",
+                "jitter sd",
+                "jit max",
+            )
+        )
+        for mode in modes:
+            for engine in args.engines.split(","):
+                steps, rev_us, step_hz, peak_hz, mean, std, worst, motor = measure(
+                    mode, engine, target_ms, args.ramp, args.accel, args.calibrate
+                )
+                error = (rev_us / 1000 - target_ms) / target_ms * 100
+                print(
+                    "{:<8} {:<9} {:>6} {:>9.1f} {:>7.2f}% {:>9.1f} {:>9.1f} {:>9.1f} {:>9.2f} {:>9.1f}".format(
+                        mode.name,
+                        engine,
+                        steps,
+                        rev_us / 1000,
+                        error,
+                        step_hz,
+                        peak_hz,
+                        mean,
+                        std,
+                        worst,
+                    )
+                )
+                if steps != motor.steps_for_one_revolution:
+                    print(
+                        "  expected {} steps for one revolution".format(
+                            motor.steps_for_one_revolution
+                        )
+                    )
+                if (
+                    args.calibrate
+                    and not args.ramp
+                    and engine in CALIBRATED_ENGINES
+                    and abs(error) > CALIBRATED_ERROR_PERCENT
+                ):
+                    off.append("{} {} at {} ms".format(mode.name, engine, target_ms))
+    if off:
+        print(
+            "calibrated engines off by more than {}%: {}".format(
+                CALIBRATED_ERROR_PERCENT, ", ".join(off)
+            )
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_()
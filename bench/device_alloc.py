@@ -0,0 +1,143 @@
+"""Heap use of the in-place metric updates on the pico: `InfoRow.set_values()` and friends.
+
+Runs on the device, the package copied as source or built as .mpy:
+
+    mpremote cp -r perfmon : + cp main.py : + soft-reset run bench/device_alloc.py
+
+Every case calls the update `UPDATES` times in a row with the garbage collector disabled, so
+nothing allocated in between is collected again. `gc.mem_alloc()` before and after the loop has
+to be the same, minus what the bare loop itself costs, otherwise the script names the case and
+exits with status 1. "kept" is what is still in use after a `gc.collect()` at the end.
+
+Under CPython it runs against the emulated modules from `sim/` and compares the memory
+tracemalloc sees in use instead, which only catches what stays allocated.
+"""
+
+import gc
+import sys
+
+if sys.implementation.name != "micropython":
+    import os
+    import tracemalloc
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import sim
+
+    sim.install()
+    tracemalloc.start()
+
+    def _heap():
+        return tracemalloc.get_traced_memory()[0]
+
+else:
+
+    def _heap():
+        return gc.mem_alloc()
+
+
+import main  # noqa: E402
+
+UPDATES = 5000
+REPEATS = 3
+
+renderer = main.start_display()
+cpu, gpu, mem, hdd = renderer.rows
+# a row that also records its values, see `InfoRow.enable_history()`
+mem.enable_history()
+
+
+def _loop(n: int):
+    for _ in range(n):
+        pass
+
+
+def _both_cells(n: int):
+    for i in range(n):
+        cpu.set_values(i % 100, (i * 7) % 100)
+
+
+def _one_cell(n: int):
+    for i in range(n):
+        gpu.set_values(value_2=i % 100)
+
+
+def _overflow(n: int):
+    # more digits than the cell has, drawn as hashes
+    for i in range(n):
+        hdd.set_values(100000 + i)
+
+
+def _with_history(n: int):
+    for i in range(n):
+        mem.set_values(i % 16, (i * 5) % 100)
+        if i % 32 == 0:
+            mem.sample_history()
+
+
+def _clear(n: int):
+    for i in range(n):
+        cpu.clear_values()
+        cpu.set_values(i % 100, i % 100)
+
+
+CASES = (
+    ("set_values(a, b)", _both_cells),
+    ("set_values(value_2=)", _one_cell),
+    ("set_values() overflow", _overflow),
+    ("set_values() + history", _with_history),
+    ("clear_values()", _clear),
+)
+
+
+def _measure_once(case):
+    gc.collect()
+    gc.disable()
+    try:
+        before = _heap()
+        case(UPDATES)
+        alloc = _heap() - before
+    finally:
+        gc.enable()
+    gc.collect()
+    return alloc, _heap() - before
+
+
+def _measure(case):
+    """Bytes allocated while `case` runs with the collector off, and still in use after it.
+    The least of `REPEATS` runs, an allocation of the update shows up in every one of them.
+    """
+    alloc, kept = _measure_once(case)
+    for _ in range(REPEATS - 1):
+        again = _measure_once(case)
+        alloc = min(alloc, again[0])
+        kept = min(kept, again[1])
+    return alloc, kept
+
+
+def run():
+    # first calls of each case, e.g. to resolve globals
+    for _, case in CASES:
+        case(10)
+    loop_alloc, loop_kept = _measure(_loop)
+    # something freed meanwhile (CPython) must not count against the cases
+    loop_kept = max(loop_kept, 0)
+    print(
+        "{} updates per case, the bare loop allocates {} bytes".format(
+            UPDATES, loop_alloc
+        )
+    )
+    print("{:<24} {:>9} {:>9}".format("case", "alloc", "kept"))
+    failed = []
+    for name, case in CASES:
+        alloc, kept = _measure(case)
+        alloc -= loop_alloc
+        kept -= loop_kept
+        print("{:<24} {:>9} {:>9}".format(name, alloc, kept))
+        if alloc > 0 or kept > 0:
+            failed.append(name)
+    if failed:
+        print("allocates: {}".format(", ".join(failed)))
+        sys.exit(1)
+
+
+run()
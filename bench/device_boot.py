@@ -0,0 +1,106 @@
+"""Boot cost of the `perfmon` package on the pico: import time and heap per subsystem.
+
+Runs on the device, once with the package copied as source and once built as .mpy:
+
+    mpremote cp -r perfmon : + cp main.py : + soft-reset run bench/device_boot.py
+    python tools/build_mpy.py --deploy && mpremote soft-reset run bench/device_boot.py
+
+`soft-reset` keeps `main.py` from running first, its imports would already be cached. Every
+step is measured after a `gc.collect()`:
+
+* us: wall time of the step, for an import that includes reading and compiling the source
+* alloc: bytes allocated during the step, with the compiler's temporary data
+* kept: bytes still in use after the next `gc.collect()`
+
+The steps run in the order `main.py` needs them, "first frame" is the display ready to show
+values. The stepper comes last, it is only imported when the motor starts.
+
+Under CPython it runs against the emulated modules from `sim/`, only useful to check the
+script itself. There are no numbers from a device yet, the source vs .mpy comparison is open.
+"""
+
+import sys
+
+if sys.implementation.name != "micropython":
+    import os
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import sim
+
+    sim.install()
+
+import gc
+import utime
+
+
+def _import(name: str):
+    def step():
+        __import__(name)
+
+    return step
+
+
+def _start_display():
+    try:
+        sys.modules["main"].start_display()
+    except OSError as e:
+        # no display on the bus
+        print("start_display() failed: {}".format(e))
+
+
+def _make_motor():
+    sys.modules["main"].make_motor()
+
+
+STEPS = (
+    ("import perfmon.display", _import("perfmon.display")),
+    ("import perfmon.ingest", _import("perfmon.ingest")),
+    ("import main", _import("main")),
+    ("first frame", _start_display),
+    ("import perfmon.stepper", _import("perfmon.stepper")),
+    ("make_motor()", _make_motor),
+)
+
+
+def _heap():
+    # `gc.mem_free()`/`gc.mem_alloc()` only exist on MicroPython
+    return gc.mem_alloc() if hasattr(gc, "mem_alloc") else 0
+
+
+def _origin(name: str) -> str:
+    module = sys.modules.get(name)
+    path = getattr(module, "__file__", "") if module else ""
+    return ".mpy" if path.endswith(".mpy") else "source"
+
+
+def run():
+    cached = [
+        name for name in sys.modules if name == "main" or name.startswith("perfmon")
+    ]
+    if cached:
+        print("already imported: {}, numbers are off".format(", ".join(cached)))
+    print("{:<24} {:>9} {:>9} {:>9}".format("step", "us", "alloc", "kept"))
+    total_us = 0
+    total_kept = 0
+    for name, step in STEPS:
+        gc.collect()
+        before = _heap()
+        start = utime.ticks_us()
+        step()
+        elapsed = utime.ticks_diff(utime.ticks_us(), start)
+        alloc = _heap() - before
+        gc.collect()
+        kept = _heap() - before
+        total_us += elapsed
+        total_kept += kept
+        print("{:<24} {:>9} {:>9} {:>9}".format(name, elapsed, alloc, kept))
+    print("{:<24} {:>9} {:>9} {:>9}".format("total", total_us, "", total_kept))
+    print(
+        "perfmon.display from {}, free heap {}".format(
+            _origin("perfmon.display"),
+            gc.mem_free() if hasattr(gc, "mem_free") else "?",
+        )
+    )
+
+
+run()
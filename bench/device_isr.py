@@ -0,0 +1,178 @@
+"""Stepper timer ISR cost on the pico, before and after the allocation-free rewrite.
+
+Runs on the device, with the `perfmon` package on it:
+
+    mpremote run bench/device_isr.py
+
+For the current ISR and a copy of the previous one (`LegacyMotor`) it reports:
+
+* us per edge: cost of one ISR call, measured by calling it back to back
+* the highest Timer frequency that is still stable: a move of half a second of pulses
+  has to finish within 2% of its nominal time, tried for increasing frequencies
+
+Under CPython it runs against the emulated modules from `sim/`, only useful to check the
+script itself since the virtual clock does not see the cost of Python code: it prints no
+numbers there.
+"""
+
+import sys
+
+ON_DEVICE = sys.implementation.name == "micropython"
+
+if not ON_DEVICE:
+    import os
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import sim
+
+    sim.install()
+
+import utime
+from machine import Pin, Timer
+
+from perfmon.stepper import DRV8825StepperMotor as Motor
+
+FREQUENCIES = (5_000, 10_000, 15_000, 20_000, 25_000, 30_000, 40_000, 50_000, 60_000)
+EDGES_FOR_COST = 2000
+
+
+class LegacyTimerContainer(Motor.NonBlockTimerContainer):
+    """The timer container as it was before, counting down an attribute"""
+
+    def __init__(
+        self,
+        timer: Timer,
+        target_steps=None,
+        keep_running_check_callback=None,
+        finished_callback=None,
+    ):
+        super().__init__(
+            timer, target_steps, keep_running_check_callback, finished_callback
+        )
+        self.steps_remaining = target_steps
+
+    # copied as it was
+    def make_pulse(self) -> bool:
+        if self.result._start_tick_ms is None:
+            self.result._start_tick_ms = utime.ticks_ms()
+        result = False
+
+        if self.keep_running_check_callback is not None:
+            result = self.keep_running_check_callback()
+        elif self.steps_remaining == 0:
+            result = False
+        elif self.steps_remaining:
+            self.steps_remaining = self.steps_remaining - 1
+            result = True
+        if result:
+            self.result.pulses_done = self.result.pulses_done + 1
+        # just to make the linter happy.
+        return result
+
+
+class LegacyMotor(Motor):
+    """The timer ISR as it was before: method calls and attribute chains on every edge"""
+
+    # copied as it was
+    def step(self):
+        """Create a single pulse on the STP pin. A.k.a make one step."""
+        self.step_pin.toggle()
+
+    # copied as it was
+    def _step_non_blocking_timer_callback(self, t: Timer):
+        if self._timer_container:
+            if self._timer_container.make_pulse():
+                self.step()
+                if self.ramp is not None:
+                    # one shot per pulse, the next one gets its own interval
+                    container = self._timer_container
+                    container.timer.init(
+                        mode=Timer.ONE_SHOT,
+                        period=self.ramp.half_period_us(
+                            container.result.pulses_done, container.total_pulses
+                        ),
+                        tick_hz=1_000_000,
+                        callback=self._timer_callback,
+                    )
+            else:
+                self._timer_container.finish()
+
+    def steps_non_blocking(
+        self, amount: int = 1, clockwise=None, callback=None, timer_id: int = -1
+    ):
+        return self._steps_non_blocking(
+            timer_container=LegacyTimerContainer(
+                timer=Timer(timer_id),
+                target_steps=amount * 2,
+                finished_callback=callback,
+            ),
+            clockwise=clockwise,
+        )
+
+
+def make(cls):
+    motor = cls(
+        step_pin=Pin(4, Pin.OUT),
+        direction_pin=Pin(5, Pin.OUT),
+        mode=Motor.MODE_ONE_32,
+        skip_motor_init=True,
+    )
+    motor.set_mode(Motor.MODE_ONE_32)
+    # the ISR caches this bound method at init, the legacy one must be cached after overriding
+    motor._timer_callback = motor._step_non_blocking_timer_callback
+    return motor
+
+
+def cost_per_edge_us(motor, container_cls) -> float:
+    container = container_cls(timer=Timer(-1), target_steps=EDGES_FOR_COST * 2)
+    motor._timer_container = container
+    callback = motor._timer_callback
+    start = utime.ticks_us()
+    for _ in range(EDGES_FOR_COST):
+        callback(None)
+    elapsed = utime.ticks_diff(utime.ticks_us(), start)
+    # the fake move never finishes, the motor would stay busy for the next one
+    motor._timer_container = None
+    return elapsed / EDGES_FOR_COST
+
+
+def stable(motor, freq: int) -> bool:
+    # `freq` edges per second, two edges per step
+    motor.set_speed(motor.steps_for_one_revolution * 2 * 1000 / freq)
+    pulses = freq // 2
+    result = motor.steps_non_blocking(amount=pulses // 2)
+    deadline = utime.ticks_add(utime.ticks_ms(), 2000)
+    while not result.done:
+        if utime.ticks_diff(deadline, utime.ticks_ms()) < 0:
+            motor._timer_container.timer.deinit()
+            motor._timer_container = None
+            return False
+        utime.sleep_ms(1)
+    # 500 ms nominal
+    return result.get_run_time_ms() <= 510 and result.pulses_done == pulses
+
+
+def run():
+    for name, cls, container_cls in (
+        ("before", LegacyMotor, LegacyTimerContainer),
+        ("after", Motor, Motor.NonBlockTimerContainer),
+    ):
+        motor = make(cls)
+        per_edge = cost_per_edge_us(motor, container_cls)
+        best = 0
+        for freq in FREQUENCIES:
+            if not stable(motor, freq):
+                break
+            best = freq
+        if not ON_DEVICE:
+            # Python code takes no virtual time, every variant costs 0 and is always stable
+            print("{:<7} ran, no numbers off the device".format(name))
+            continue
+        print(
+            "{:<7} {:>6.1f} us per edge, stable up to {} Hz edges ({} steps/s)".format(
+                name, per_edge, best, best // 2
+            )
+        )
+
+
+run()
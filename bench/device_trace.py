@@ -0,0 +1,91 @@
+"""Cost of one span of `perfmon.trace` on the pico.
+
+Runs on the device, with the package copied as source or built as .mpy:
+
+    mpremote cp -r perfmon : + soft-reset run bench/device_trace.py
+
+Times `SPANS` spans as the instrumented code records them (`ticks_us()` on enter,
+`tracer.record()` on exit), and a call of a function wrapped with `traced()`, each against the
+same loop without tracing. Reported per span in us, what a traced build adds to every
+instrumented frame, row, flush and ISR call. With `_TRACE = const(0)` none of it is compiled in.
+
+Under CPython it runs against the emulated modules from `sim/` and times with
+`time.perf_counter()`, the sim clock does not advance while code runs. Only useful to check the
+script itself.
+"""
+
+import gc
+import sys
+
+if sys.implementation.name != "micropython":
+    import os
+    import time
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import sim
+
+    sim.install()
+
+    def _now_us() -> float:
+        return time.perf_counter() * 1e6
+
+    def _diff_us(end: float, start: float) -> float:
+        return end - start
+
+else:
+    from utime import ticks_diff as _diff_us, ticks_us as _now_us
+
+import utime  # noqa: E402
+
+from perfmon.trace import SPAN_FRAME, tracer, traced  # noqa: E402
+
+SPANS = 10000
+
+
+def _bare(n: int):
+    for _ in range(n):
+        pass
+
+
+def _spans(n: int):
+    for _ in range(n):
+        start = utime.ticks_us()
+        tracer.record(SPAN_FRAME, start)
+
+
+def _work():
+    pass
+
+
+_traced_work = traced(SPAN_FRAME)(_work)
+
+
+def _calls(n: int):
+    for _ in range(n):
+        _work()
+
+
+def _traced_calls(n: int):
+    for _ in range(n):
+        _traced_work()
+
+
+def _time_us(loop) -> float:
+    gc.collect()
+    start = _now_us()
+    loop(SPANS)
+    return _diff_us(_now_us(), start)
+
+
+def run():
+    bare = _time_us(_bare)
+    span = (_time_us(_spans) - bare) / SPANS
+    calls = _time_us(_calls)
+    decorated = (_time_us(_traced_calls) - calls) / SPANS
+    tracer.clear()
+    print("{} spans, ring of {}".format(SPANS, tracer.capacity))
+    print("{:<24} {:>9.2f} us".format("record() span", span))
+    print("{:<24} {:>9.2f} us".format("traced() call", decorated))
+
+
+run()
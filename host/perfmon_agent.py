@@ -0,0 +1,455 @@
+"""Host side perfmon agent (CPython, Linux).
+
+Samples CPU load/temperature, GPU load/temperature (amdgpu sysfs), memory usage and disk
+throughput from /proc and /sys and streams them to the pico as `protocol` frames.
+
+All sources are opened once and re-read with `os.preadv()` into buffers that are reused
+between samples, nothing is spawned. Cells without a source on this machine are sent blank.
+
+Only changes are sent (delta frames, see `protocol.DeltaEncoder`), with a full keyframe
+every few seconds.
+
+Usage:
+    python host/perfmon_agent.py --device /dev/ttyACM0
+    python host/perfmon_agent.py --pty          # creates a pty and prints its path, for testing
+"""
+
+import argparse
+import os
+import sys
+import time
+import tty
+from typing import Dict, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from perfmon import protocol  # noqa: E402
+
+# Record as sent to the pico: (row, flags, unit_1, unit_2, value_1, value_2)
+Record = Tuple[int, int, int, int, int, int]
+
+UNIT_NONE = protocol.unit_index("")
+UNIT_C = protocol.unit_index("C")
+UNIT_PERCENT = protocol.unit_index("%")
+UNIT_GB = protocol.unit_index("GB")
+UNIT_MBS = protocol.unit_index("MB/s")
+
+# Warn flag thresholds, compared with >=
+DEFAULT_WARN_LEVELS: Dict[str, int] = {
+    "cpu_temp": 85,
+    "cpu_load": 95,
+    "gpu_temp": 85,
+    "gpu_load": 95,
+    "mem_percent": 90,
+}
+
+# Changes smaller than this are not sent, per row (cell 1, cell 2)
+DEFAULT_DEADBANDS: Dict[int, Tuple[int, int]] = {
+    # temperature in C, load in %
+    protocol.ROW_CPU: (1, 2),
+    protocol.ROW_GPU: (1, 2),
+    # GB, %
+    protocol.ROW_MEM: (1, 1),
+    # MB/s
+    protocol.ROW_HDD: (2, 1),
+}
+
+
+class SysFile:
+    """A /proc or /sys file that stays open and is re-read into the same buffer on every sample."""
+
+    def __init__(self, path: str, size: int = 4096):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY)
+        self.buffer = bytearray(size)
+
+    def read(self) -> int:
+        """Read the file from the start into `self.buffer`. Returns the amount of bytes read."""
+        return os.preadv(self.fd, [self.buffer], 0)
+
+    def read_int(self) -> int:
+        return int(self.buffer[: self.read()])
+
+    def field(self, length: int, key: bytes, index: int = 1) -> Optional[bytes]:
+        """Whitespace separated field `index` of the line containing `key`, None if there is none"""
+        buffer = self.buffer
+        start = buffer.find(key, 0, length)
+        if start < 0:
+            return None
+        end = buffer.find(b"\n", start, length)
+        fields = buffer[start : end if end >= 0 else length].split()
+        return fields[index] if index < len(fields) else None
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _open_optional(path: Optional[str], size: int = 64) -> Optional[SysFile]:
+    if not path:
+        return None
+    try:
+        return SysFile(path, size)
+    except OSError:
+        return None
+
+
+def find_hwmon_temp(
+    names: Sequence[str], root: str = "/sys/class/hwmon"
+) -> Optional[str]:
+    """Path of temp1_input of the first hwmon device with one of the given driver names"""
+    try:
+        entries = sorted(os.listdir(root))
+    except OSError:
+        return None
+    for name in names:
+        for entry in entries:
+            try:
+                with open(os.path.join(root, entry, "name")) as f:
+                    if f.read().strip() != name:
+                        continue
+            except OSError:
+                continue
+            path = os.path.join(root, entry, "temp1_input")
+            if os.path.exists(path):
+                return path
+    return None
+
+
+def find_thermal_zone(
+    types: Sequence[str], root: str = "/sys/class/thermal"
+) -> Optional[str]:
+    try:
+        entries = sorted(e for e in os.listdir(root) if e.startswith("thermal_zone"))
+    except OSError:
+        return None
+    for entry in entries:
+        try:
+            with open(os.path.join(root, entry, "type")) as f:
+                if f.read().strip() in types:
+                    return os.path.join(root, entry, "temp")
+        except OSError:
+            continue
+    return None
+
+
+def find_amdgpu_busy(root: str = "/sys/class/drm") -> Optional[str]:
+    try:
+        entries = sorted(os.listdir(root))
+    except OSError:
+        return None
+    for entry in entries:
+        path = os.path.join(root, entry, "device", "gpu_busy_percent")
+        if "-" not in entry and os.path.exists(path):
+            return path
+    return None
+
+
+def find_disks(root: str = "/sys/block") -> List[bytes]:
+    """Whole physical disks, partitions and virtual block devices would count the same I/O twice"""
+    skip = ("loop", "ram", "zram", "dm-", "md", "sr", "nbd")
+    try:
+        return [n.encode() for n in sorted(os.listdir(root)) if not n.startswith(skip)]
+    except OSError:
+        return []
+
+
+class Sampler:
+    """Reads all metrics and turns them into the records for the four display rows."""
+
+    def __init__(self, warn_levels: Optional[Dict[str, int]] = None):
+        self.warn_levels = dict(DEFAULT_WARN_LEVELS)
+        if warn_levels:
+            self.warn_levels.update(warn_levels)
+        # the aggregated "cpu" line is at the start, no need to read the per core lines
+        self._stat = SysFile("/proc/stat", 256)
+        self._meminfo = SysFile("/proc/meminfo", 256)
+        self._diskstats = SysFile("/proc/diskstats", 64 * 1024)
+        self._cpu_temp = _open_optional(
+            find_hwmon_temp(("k10temp", "coretemp", "zenpower", "cpu_thermal"))
+            or find_thermal_zone(("x86_pkg_temp", "cpu-thermal", "cpu_thermal"))
+        )
+        self._gpu_temp = _open_optional(find_hwmon_temp(("amdgpu",)))
+        self._gpu_busy = _open_optional(find_amdgpu_busy())
+        # " name " finds the disks line in /proc/diskstats without splitting all the other lines
+        self._disk_keys = [b" " + disk + b" " for disk in find_disks()]
+        self._last_cpu: Optional[Tuple[int, int]] = None
+        self._last_disk: Optional[Tuple[int, float]] = None
+
+    def close(self):
+        for f in (
+            self._stat,
+            self._meminfo,
+            self._diskstats,
+            self._cpu_temp,
+            self._gpu_temp,
+            self._gpu_busy,
+        ):
+            if f is not None:
+                f.close()
+
+    def cpu_load(self) -> Optional[int]:
+        """CPU utilization in percent since the last call, None on the first call"""
+        length = self._stat.read()
+        buffer = self._stat.buffer
+        fields = buffer[: buffer.find(b"\n", 0, length)].split()
+        # user nice system idle iowait irq softirq steal
+        values = [int(v) for v in fields[1:9]]
+        idle = values[3] + values[4]
+        total = sum(values)
+        last = self._last_cpu
+        self._last_cpu = (idle, total)
+        if last is None or total == last[1]:
+            return None
+        return round(100 * (1 - (idle - last[0]) / (total - last[1])))
+
+    def memory(self) -> Tuple[int, int]:
+        """Used memory in GB and percent"""
+        length = self._meminfo.read()
+        total = int(self._meminfo.field(length, b"MemTotal:") or 0)
+        available = int(self._meminfo.field(length, b"MemAvailable:") or 0)
+        used = total - available
+        return round(used / 1024 / 1024), round(100 * used / total) if total else 0
+
+    def disk_throughput(self) -> Optional[int]:
+        """Read+write throughput of all disks in MB/s since the last call, None on the first call"""
+        sectors = 0
+        diskstats = self._diskstats
+        length = diskstats.read()
+        for key in self._disk_keys:
+            # fields after the name: reads, reads merged, sectors read, ms reading, writes, writes merged, sectors written
+            read = diskstats.field(length, key, 3)
+            written = diskstats.field(length, key, 7)
+            if read is not None and written is not None:
+                # sectors are always 512 bytes in diskstats
+                sectors += int(read) + int(written)
+        now = time.monotonic()
+        last = self._last_disk
+        self._last_disk = (sectors, now)
+        if last is None or now == last[1]:
+            return None
+        return round((sectors - last[0]) * 512 / (now - last[1]) / 1_000_000)
+
+    @staticmethod
+    def _temp(source: Optional[SysFile]) -> Optional[int]:
+        if source is None:
+            return None
+        try:
+            return round(source.read_int() / 1000)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _int(source: Optional[SysFile]) -> Optional[int]:
+        if source is None:
+            return None
+        try:
+            return source.read_int()
+        except (OSError, ValueError):
+            return None
+
+    def _warn(self, key: str, value: Optional[int]) -> bool:
+        return value is not None and value >= self.warn_levels[key]
+
+    def sample(self) -> List[Record]:
+        cpu_temp = self._temp(self._cpu_temp)
+        cpu_load = self.cpu_load()
+        gpu_temp = self._temp(self._gpu_temp)
+        gpu_load = self._int(self._gpu_busy)
+        mem_gb, mem_percent = self.memory()
+        disk_mbs = self.disk_throughput()
+        return [
+            make_record(
+                protocol.ROW_CPU,
+                cpu_temp,
+                UNIT_C,
+                cpu_load,
+                UNIT_PERCENT,
+                self._warn("cpu_temp", cpu_temp) or self._warn("cpu_load", cpu_load),
+            ),
+            make_record(
+                protocol.ROW_GPU,
+                gpu_temp,
+                UNIT_C,
+                gpu_load,
+                UNIT_PERCENT,
+                self._warn("gpu_temp", gpu_temp) or self._warn("gpu_load", gpu_load),
+            ),
+            make_record(
+                protocol.ROW_MEM,
+                mem_gb,
+                UNIT_GB,
+                mem_percent,
+                UNIT_PERCENT,
+                self._warn("mem_percent", mem_percent),
+            ),
+            make_record(protocol.ROW_HDD, disk_mbs, UNIT_MBS, None, UNIT_NONE, False),
+        ]
+
+
+def make_record(
+    row: int,
+    value_1: Optional[int],
+    unit_1: int,
+    value_2: Optional[int],
+    unit_2: int,
+    warn: bool,
+) -> Record:
+    flags = protocol.FLAG_WARN if warn else 0
+    if value_1 is None:
+        flags |= protocol.FLAG_BLANK_1
+    if value_2 is None:
+        flags |= protocol.FLAG_BLANK_2
+    return (row, flags, unit_1, unit_2, value_1 or 0, value_2 or 0)
+
+
+class SerialLink:
+    """Write only connection to the pico's USB serial (or any tty/pty/file)"""
+
+    def __init__(self, fd: int, name: str):
+        self.fd = fd
+        self.name = name
+        self.bytes_sent = 0
+
+    @classmethod
+    def open(cls, path: str) -> "SerialLink":
+        fd = os.open(path, os.O_RDWR | os.O_NOCTTY)
+        if os.isatty(fd):
+            tty.setraw(fd)
+        return cls(fd, path)
+
+    @classmethod
+    def open_pty(cls) -> Tuple["SerialLink", str]:
+        """Create a pty pair. Returns the link (master side) and the path of the slave side."""
+        master, slave = os.openpty()
+        tty.setraw(slave)
+        return cls(master, "pty"), os.ttyname(slave)
+
+    def write(self, data: bytes):
+        view = memoryview(data)
+        while view:
+            written = os.write(self.fd, view)
+            view = view[written:]
+        self.bytes_sent += len(data)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class TraceWriter:
+    """Writes every sample as a CSV line (elapsed seconds, then the record fields), for `bench/bench_delta.py`"""
+
+    def __init__(self, path: str):
+        self.file = open(path, "w")
+        self.start = time.monotonic()
+
+    def write(self, records: List[Record]):
+        values = ["{:.3f}".format(time.monotonic() - self.start)]
+        for record in records:
+            values.extend(str(v) for v in record)
+        self.file.write(",".join(values) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+def read_trace(path: str) -> List[Tuple[float, List[Record]]]:
+    """Samples recorded by `TraceWriter`"""
+    samples = []
+    with open(path) as f:
+        for line in f:
+            values = line.strip().split(",")
+            if len(values) < 2:
+                continue
+            numbers = [int(v) for v in values[1:]]
+            records = [tuple(numbers[i : i + 6]) for i in range(0, len(numbers), 6)]
+            samples.append((float(values[0]), records))
+    return samples
+
+
+class Agent:
+    def __init__(
+        self,
+        sampler: Sampler,
+        link: SerialLink,
+        encoder: Optional[protocol.DeltaEncoder] = None,
+        trace: Optional[TraceWriter] = None,
+    ):
+        self.sampler = sampler
+        self.link = link
+        self.encoder = encoder or protocol.DeltaEncoder(deadbands=DEFAULT_DEADBANDS)
+        self.trace = trace
+
+    def tick(self):
+        """Take one sample and send what changed"""
+        records = self.sampler.sample()
+        if self.trace:
+            self.trace.write(records)
+        frame = self.encoder.encode(records)
+        if frame:
+            self.link.write(frame)
+
+    def run(self, rate_hz: float = 10.0, duration_s: Optional[float] = None):
+        """Send samples at `rate_hz`. Deadlines are absolute, so the rate does not drift."""
+        period = 1 / rate_hz
+        start = time.monotonic()
+        deadline = start
+        while duration_s is None or deadline - start < duration_s:
+            self.tick()
+            deadline += period
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # we fell behind, don't try to catch up with a burst
+                deadline = time.monotonic()
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--device", help="serial device of the pico, e.g. /dev/ttyACM0")
+    target.add_argument(
+        "--pty",
+        action="store_true",
+        help="create a pty and print the path of its other end",
+    )
+    parser.add_argument(
+        "--rate", type=float, default=10.0, help="samples per second (default: 10)"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=None, help="stop after this many seconds"
+    )
+    parser.add_argument(
+        "--keyframe-interval",
+        type=int,
+        default=50,
+        help="send the full state every n samples, deltas in between (default: 50)",
+    )
+    parser.add_argument(
+        "--record", metavar="FILE", help="also write every sample to a trace file"
+    )
+    args = parser.parse_args(argv)
+
+    if args.pty:
+        link, slave = SerialLink.open_pty()
+        print(slave, flush=True)
+    else:
+        link = SerialLink.open(args.device)
+    sampler = Sampler()
+    encoder = protocol.DeltaEncoder(args.keyframe_interval, DEFAULT_DEADBANDS)
+    trace = TraceWriter(args.record) if args.record else None
+    try:
+        Agent(sampler, link, encoder, trace).run(args.rate, args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sampler.close()
+        link.close()
+        if trace:
+            trace.close()
+
+
+if __name__ == "__main__":
+    main()
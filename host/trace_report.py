@@ -0,0 +1,179 @@
+"""Span trace report for the pico (CPython).
+
+Asks the pico for the ring of its span tracer (`protocol.CMD_DUMP_TRACE`, tracing has to be
+switched on, see `perfmon/trace.py`) or reads a saved dump, and prints per span:
+how often it ran, total, mean and max time, and its share of the traced time. Time spent in
+spans nested inside (e.g. the step ISR interrupting a frame) is shown separately as self time.
+`--folded` writes folded stacks for flamegraph.pl or speedscope.
+
+Usage:
+    python host/trace_report.py --device /dev/ttyACM0 [--save dump.txt] [--folded trace.folded]
+    python host/trace_report.py --input dump.txt
+"""
+
+import argparse
+import os
+import select
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from perfmon import protocol  # noqa: E402
+from perfmon_agent import SerialLink  # noqa: E402
+
+# `utime.ticks_us()` wraps at 2**30 on MicroPython
+TICKS_MASK = (1 << 30) - 1
+
+# (name, start us, end us) relative to the first span
+Span = Tuple[str, int, int]
+
+
+def request_dump(path: str, timeout_s: float = 3.0) -> List[str]:
+    """Send CMD_DUMP_TRACE and collect the lines of the answer"""
+    link = SerialLink.open(path)
+    try:
+        link.write(protocol.encode_command(protocol.CMD_DUMP_TRACE))
+        buffer = b""
+        lines: List[str] = []
+        deadline = time.monotonic() + timeout_s
+        while time.monotonic() < deadline:
+            ready, _, _ = select.select([link.fd], [], [], 0.1)
+            if not ready:
+                continue
+            buffer += os.read(link.fd, 4096)
+            *complete, buffer = buffer.split(b"\n")
+            for line in complete:
+                lines.append(line.decode(errors="replace").strip())
+                if lines[-1] == "trace end":
+                    return lines
+                if lines[-1].startswith("trace off"):
+                    raise SystemExit(lines[-1])
+        raise SystemExit("no complete trace dump from {}".format(path))
+    finally:
+        link.close()
+
+
+def parse_dump(lines: Sequence[str]) -> List[Span]:
+    """Spans of a dump, other output in between (e.g. render stats) is skipped"""
+    names: Dict[int, str] = {}
+    raw: List[Tuple[int, int, int]] = []
+    for line in lines:
+        parts = line.split()
+        if len(parts) < 2 or parts[0] != "trace":
+            continue
+        if parts[1] == "name":
+            names[int(parts[2])] = parts[3]
+        elif parts[1] == "span":
+            raw.append((int(parts[2]), int(parts[3]), int(parts[4])))
+    if not raw:
+        return []
+    # the ring is in the order the spans ended, the time base is the start furthest back
+    newest = raw[-1][2]
+    base = max(
+        (start for _, start, _ in raw), key=lambda start: (newest - start) & TICKS_MASK
+    )
+    spans = [
+        (
+            names.get(span, str(span)),
+            (start - base) & TICKS_MASK,
+            (end - base) & TICKS_MASK,
+        )
+        for span, start, end in raw
+    ]
+    spans.sort(key=lambda span: (span[1], -span[2]))
+    return spans
+
+
+def nest(spans: List[Span]) -> List[Tuple[str, int]]:
+    """Stack path and self time of every span (sorted by start), nesting by time containment"""
+    paths: List[str] = []
+    self_us: List[int] = []
+    # indices of the spans that are open at the current start
+    stack: List[int] = []
+    for index, (name, start, end) in enumerate(spans):
+        while stack and spans[stack[-1]][2] <= start:
+            stack.pop()
+        paths.append(paths[stack[-1]] + ";" + name if stack else name)
+        self_us.append(end - start)
+        if stack:
+            self_us[stack[-1]] -= end - start
+        stack.append(index)
+    return list(zip(paths, self_us))
+
+
+def report(spans: List[Span]) -> str:
+    if not spans:
+        return "no spans recorded"
+    wall = max(end for _, _, end in spans) - spans[0][1]
+    totals: Dict[str, List[int]] = {}
+    for (name, start, end), (_, self_us) in zip(spans, nest(spans)):
+        stats = totals.setdefault(name, [0, 0, 0, 0])
+        stats[0] += 1
+        stats[1] += end - start
+        stats[2] = max(stats[2], end - start)
+        stats[3] += self_us
+    lines = [
+        "{} spans over {:.1f} ms".format(len(spans), wall / 1000),
+        "{:<12} {:>7} {:>10} {:>9} {:>9} {:>10} {:>7}".format(
+            "span", "count", "total us", "mean us", "max us", "self us", "share"
+        ),
+    ]
+    for name, (count, total, worst, self_us) in sorted(
+        totals.items(), key=lambda item: -item[1][3]
+    ):
+        lines.append(
+            "{:<12} {:>7} {:>10} {:>9.1f} {:>9} {:>10} {:>6.1f}%".format(
+                name,
+                count,
+                total,
+                total / count,
+                worst,
+                self_us,
+                self_us / wall * 100 if wall else 0,
+            )
+        )
+    return "\n".join(lines)
+
+
+def folded(spans: List[Span]) -> str:
+    """Folded stacks (`a;b;c self_us` per line) for flamegraph.pl"""
+    stacks: Dict[str, int] = {}
+    for path, self_us in nest(spans):
+        stacks[path] = stacks.get(path, 0) + self_us
+    return "".join("{} {}\n".format(path, us) for path, us in sorted(stacks.items()))
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--device", help="serial device of the pico, e.g. /dev/ttyACM0")
+    source.add_argument("--input", help="a saved dump, '-' for stdin")
+    parser.add_argument("--save", metavar="FILE", help="also write the raw dump")
+    parser.add_argument(
+        "--folded", metavar="FILE", help="write folded stacks for flamegraph.pl"
+    )
+    args = parser.parse_args(argv)
+
+    if args.device:
+        lines = request_dump(args.device)
+    elif args.input == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(args.input) as f:
+            lines = f.read().splitlines()
+    if args.save:
+        with open(args.save, "w") as f:
+            f.write("\n".join(lines) + "\n")
+    spans = parse_dump(lines)
+    print(report(spans))
+    if args.folded:
+        with open(args.folded, "w") as f:
+            f.write(folded(spans))
+
+
+if __name__ == "__main__":
+    main()
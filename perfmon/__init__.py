@@ -0,0 +1,14 @@
+"""tiny-perfmon pico client.
+
+The subsystems are separate modules and nothing is imported here, so a program only pays
+(flash reads, compile or `.mpy` load, heap) for what it imports:
+
+* `perfmon.display`: SSD1306 rows, graph page and render scheduler
+* `perfmon.ingest`: metric frames from the host
+* `perfmon.protocol`: frame format, shared with the host scripts
+* `perfmon.stepper`: DRV8825 stepper driver (`perfmon.pio` for the PIO engine)
+* `perfmon.servo`: hobby servos and eased multi-servo sweeps
+* `perfmon.trace`: span tracer, only imported when tracing is switched on
+
+No module touches the hardware at import. `tools/build_mpy.py` cross-compiles the package.
+"""
@@ -0,0 +1,895 @@
+"""SSD1306 status display: the info rows, the graph page and the render scheduler.
+
+Importing this module does not touch the hardware, `init()` creates the I2C bus and the
+display driver. Rows need the display, create them after `init()` (see `default_rows()`).
+"""
+
+from machine import Pin, I2C
+import utime
+import uasyncio
+import ssd1306
+import framebuf
+from micropython import const
+import array
+
+try:
+    from typing import Literal, Optional, Tuple, Dict
+except ImportError:
+    # only for the type checker, MicroPython does not evaluate annotations
+    pass
+
+# Span tracing, see `perfmon.trace`
+_TRACE = const(0)
+if _TRACE:
+    from perfmon.trace import tracer, SPAN_FRAME, SPAN_ROW, SPAN_FLUSH
+
+display_w = 128
+display_h = 32
+row_height = 8
+
+# Set by `init()`
+i2c: Optional[I2C] = None
+display: Optional[ssd1306.SSD1306_I2C] = None
+dirty: Optional["DirtyPages"] = None
+
+
+def init(bus: Optional[I2C] = None) -> ssd1306.SSD1306_I2C:
+    """Create the display driver (using default address 0x3C) and `dirty`, once.
+
+    Args:
+        bus (Optional[I2C], optional): I2C bus of the display. Defaults to I2C 0 on GP20/GP21.
+
+    Returns:
+        ssd1306.SSD1306_I2C: the display, also available as `display`
+    """
+    global i2c, display, dirty
+    if display is None:
+        i2c = bus if bus is not None else I2C(id=0, sda=Pin(20), scl=Pin(21))
+        display = ssd1306.SSD1306_I2C(display_w, display_h, i2c)
+        dirty = DirtyPages(display, display_w, display_h)
+    return display
+
+
+class DirtyPages:
+    """Remembers which 8 pixel high pages (and which column range per page) of the
+    framebuffer got touched since the last flush and only sends those windows to the display.
+
+    A full `display.show()` pushes the whole framebuffer over I2C. When only a digit changed
+    that is a lot of wasted bus time. Drawing code calls `mark()` for the area it painted and
+    `flush()` replaces `display.show()`. Before sending, every window is compared against a copy
+    of what the panel already shows and shrunk to the columns that really changed.
+    """
+
+    # SSD1306 commands to set the column/page window for horizontal addressing mode
+    SET_COL_ADDR = 0x21
+    SET_PAGE_ADDR = 0x22
+
+    def __init__(self, display: ssd1306.SSD1306_I2C, width: int, height: int):
+        self.display = display
+        self.width = width
+        self.pages = height // 8
+        self._col_offset = (128 - width) // 2
+        self._buffer = memoryview(display.buffer)
+        # What the panel currently shows. `display.init_display()` cleared it, so do we.
+        self._sent = bytearray(len(display.buffer))
+        # Per page first/last dirty column. first > last means the page is clean.
+        self._first = bytearray([width] * self.pages)
+        self._last = bytearray(self.pages)
+        self._force = False
+        # Co=0, D/C#=0 control byte followed by the six address command bytes in one transfer
+        self._cmd = bytearray([0x00, self.SET_COL_ADDR, 0, 0, self.SET_PAGE_ADDR, 0, 0])
+        self.bytes_sent: int = 0
+
+    def mark(self, x: int, y: int, w: int, h: int):
+        """Flag a rectangle of the framebuffer as changed. Coordinates are clipped to the display."""
+        x0 = max(x, 0)
+        x1 = min(x + w, self.width) - 1
+        y0 = max(y, 0)
+        y1 = min(y + h, self.pages * 8) - 1
+        if x0 > x1 or y0 > y1:
+            return
+        for page in range(y0 >> 3, (y1 >> 3) + 1):
+            if x0 < self._first[page]:
+                self._first[page] = x0
+            if x1 > self._last[page]:
+                self._last[page] = x1
+
+    def invalidate(self):
+        """Send the whole framebuffer on the next flush, e.g. after something else wrote to the panel."""
+        self.mark(0, 0, self.width, self.pages * 8)
+        self._force = True
+
+    def flush(self) -> int:
+        """Send all dirty windows to the display.
+
+        Returns:
+            int: Amount of framebuffer bytes that were sent
+        """
+        if _TRACE:
+            start = utime.ticks_us()
+        buffer = self._buffer
+        sent = self._sent
+        total = 0
+        for page in range(self.pages):
+            x0 = self._first[page]
+            x1 = self._last[page]
+            if x0 > x1:
+                continue
+            self._first[page] = self.width
+            self._last[page] = 0
+            base = page * self.width
+            if not self._force:
+                # shrink the window to the columns that differ from what is on the panel
+                while x0 <= x1 and buffer[base + x0] == sent[base + x0]:
+                    x0 += 1
+                while x1 >= x0 and buffer[base + x1] == sent[base + x1]:
+                    x1 -= 1
+                if x0 > x1:
+                    continue
+            self._send_window(page, x0, x1)
+            sent[base + x0 : base + x1 + 1] = buffer[base + x0 : base + x1 + 1]
+            total += x1 - x0 + 1
+        self._force = False
+        self.bytes_sent += total
+        if _TRACE:
+            tracer.record(SPAN_FLUSH, start)
+        return total
+
+    def _send_window(self, page: int, x0: int, x1: int):
+        cmd = self._cmd
+        cmd[2] = x0 + self._col_offset
+        cmd[3] = x1 + self._col_offset
+        cmd[5] = page
+        cmd[6] = page
+        self.display.i2c.writeto(self.display.addr, cmd)
+        base = page * self.width
+        self.display.write_data(self._buffer[base + x0 : base + x1 + 1])
+
+
+class IconCache:
+    """Small status icons, each rasterized once into its own `framebuf.FrameBuffer`.
+    Drawing an icon is a single `display.blit()`, and it looks the same in every row.
+    """
+
+    WIDTH = 9
+    HEIGHT = 8
+
+    WARN = "warn"
+    TREND_UP = "up"
+    TREND_DOWN = "down"
+    DISCONNECTED = "disconnected"
+
+    def __init__(self):
+        self._icons: Dict[str, framebuf.FrameBuffer] = {}
+
+    def get(self, name: str) -> framebuf.FrameBuffer:
+        icon = self._icons.get(name)
+        if icon is None:
+            icon = framebuf.FrameBuffer(
+                bytearray(self.WIDTH * ((self.HEIGHT + 7) // 8)),
+                self.WIDTH,
+                self.HEIGHT,
+                framebuf.MONO_VLSB,
+            )
+            self._paint(name, icon)
+            self._icons[name] = icon
+        return icon
+
+    def _paint(self, name: str, fb: framebuf.FrameBuffer):
+        right = self.WIDTH - 1
+        bottom = self.HEIGHT - 1
+        center = right // 2
+        if name == self.WARN:
+            # triangle
+            fb.line(center, 0, right, bottom, 1)
+            fb.line(right, bottom, 0, bottom, 1)
+            fb.line(0, bottom, center, 0, 1)
+            # bang !
+            fb.line(
+                center,
+                bottom - int(self.HEIGHT * 0.3),
+                center,
+                bottom - int(self.HEIGHT * 0.6),
+                1,
+            )
+        elif name == self.TREND_UP:
+            fb.vline(center, 0, self.HEIGHT, 1)
+            fb.line(center, 0, center - 3, 3, 1)
+            fb.line(center, 0, center + 3, 3, 1)
+        elif name == self.TREND_DOWN:
+            fb.vline(center, 0, self.HEIGHT, 1)
+            fb.line(center, bottom, center - 3, bottom - 3, 1)
+            fb.line(center, bottom, center + 3, bottom - 3, 1)
+        elif name == self.DISCONNECTED:
+            fb.line(1, 0, right - 1, bottom, 1)
+            fb.line(right - 1, 0, 1, bottom, 1)
+        else:
+            raise ValueError("Unknown icon '{}'".format(name))
+
+
+icons = IconCache()
+
+
+# Precomputed fill strings (one per width, up to a full display row), so formatting a cell
+# does not build padding or overflow markers char by char.
+_max_row_chars = display_w // 8
+_PADDING = tuple(" " * i for i in range(_max_row_chars + 1))
+_OVERFLOW = tuple("#" * i for i in range(_max_row_chars + 1))
+
+
+def _fill(templates: Tuple[str, ...], char: str, width: int) -> str:
+    if width < len(templates):
+        return templates[width]
+    return char * width
+
+
+class InfoCell:
+    def __init__(
+        self,
+        value: Optional[str | int] = None,
+        unit: Optional[str] = None,
+        size: int = 4,
+    ):
+        if isinstance(value, int):
+            value = str(value)
+        self.value: str = value if value else ""
+        self.unit: str = unit if unit else ""
+        self.size: int = size
+        self._output: Optional[str] = None
+
+    def same_as(self, other: "InfoCell") -> bool:
+        """True if `other` would render exactly like this cell"""
+        return (
+            self.value == other.value
+            and self.unit == other.unit
+            and self.size == other.size
+        )
+
+    def gen(self) -> str:
+        """Output value+unit str and pad to self.size on the right side of the value.
+        The result is cached, a cell is not supposed to change after creation.
+
+        Returns:
+            str: _description_
+        """
+        if self._output is None:
+            value_size = self.size - len(self.unit)
+            if len(self.value) > value_size:
+                # Value to large to render. instead of crashing or showing wrong values (cut off strings) we just show some hashes "###"
+                value = _fill(_OVERFLOW, "#", max(value_size, 0))
+            else:
+                value = _fill(_PADDING, " ", value_size - len(self.value)) + self.value
+            self._output = value + self.unit
+        return self._output
+
+
+# One interned string per ASCII char. Rendering a row char by char with these does not allocate.
+_CHARS = tuple(chr(i) for i in range(128))
+_CHAR_SPACE = 0x20
+_CHAR_MINUS = 0x2D
+_CHAR_HASH = 0x23
+_CHAR_ZERO = 0x30
+
+
+class History:
+    """Fixed size ring of recent samples of one metric, one byte each.
+
+    Values are scaled to 0..255 of `scale` and stored in a preallocated `array('B')`, so the
+    memory per history is `size` bytes plus the object, known when it is created.
+    Between two `commit()`s `observe()` keeps the highest value seen, so a spike that was
+    shown only for a moment still ends up in the history.
+    """
+
+    def __init__(self, size: int = 32, scale: int = 100):
+        """
+        Args:
+            size (int, optional): Amount of samples kept. Defaults to 32.
+            scale (int, optional): Value that is drawn at full height. Defaults to 100.
+        """
+        self.size = size
+        self.scale = scale
+        self.samples = array.array("B", bytes(size))
+        # total amount of committed samples, the newest one is at (count - 1) % size
+        self.count: int = 0
+        self._last: int = 0
+        self._peak: int = 0
+
+    def observe(self, value: int):
+        """Take a new current value"""
+        scaled = value * 255 // self.scale
+        if scaled < 0:
+            scaled = 0
+        elif scaled > 255:
+            scaled = 255
+        self._last = scaled
+        if scaled > self._peak:
+            self._peak = scaled
+
+    def commit(self):
+        """Store the highest value observed since the last commit as the newest sample"""
+        self.samples[self.count % self.size] = self._peak
+        self.count += 1
+        self._peak = self._last
+
+    def get(self, age: int) -> int:
+        """Scaled sample (0..255), `age` 0 is the newest"""
+        return self.samples[(self.count - 1 - age) % self.size]
+
+
+# Sparkline column bytes for a bar of 0..8 pixels, bottom aligned (MONO_VLSB: bit 7 is the bottom)
+_BARS = bytes((0xFF00 >> n) & 0xFF for n in range(9))
+
+
+class InfoRow:
+    # Free columns between the status icon and the right display border
+    ICON_RIGHT_PADDING = 1
+
+    def __init__(self, title: str, row: Literal[0, 1, 2, 3]):
+        if len(title) > 3:
+            raise ValueError("Title length max is 3 chars. got {}".format(len(title)))
+        self.title = title
+        self.row = row
+        self._x_bottom = self.row * 8
+        self.cell_1: InfoCell = InfoCell()
+        self.cell_2: InfoCell = InfoCell()
+        # Name of the `IconCache` icon shown at the end of the row, if any
+        self.icon: Optional[str] = None
+        # The row text as it should look (`_line`) and as it was drawn last time (`_shown`).
+        # Values are written as ascii digits straight into `_line`, render() only draws the chars that differ.
+        self._line = bytearray(_max_row_chars)
+        self._shown = bytearray(_max_row_chars)
+        # Set when `_line` or the icon changed since the last render
+        self._changed: bool = True
+        self._icon_x = display_w - self.ICON_RIGHT_PADDING - IconCache.WIDTH
+        self._icon_first_char = self._icon_x // 8
+        self._icon_last_char = min(
+            (self._icon_x + IconCache.WIDTH - 1) // 8, _max_row_chars - 1
+        )
+        # Start index and width of the numeric part of each cell within `_line`
+        self._cell_1_start = 0
+        self._cell_1_digits = 0
+        self._cell_2_start = 0
+        self._cell_2_digits = 0
+        # Optional history of one cell, drawn as sparkline between the text and the icon
+        self.history: Optional[History] = None
+        self._history_cell = 2
+        self._spark_x = 0
+        self._spark_w = 0
+        self._spark_drawn = 0
+        self._buffer = display.buffer
+        self._layout()
+
+    def _layout(self):
+        """Write title, cells and units into the line buffer. Only needed when a cell (unit/size) is replaced."""
+        line = self._line
+        for i in range(len(line)):
+            line[i] = _CHAR_SPACE
+        pos = self._put_text(0, self.title)
+        pos = self._put_text(pos, ": ")
+        self._cell_1_start = pos
+        self._cell_1_digits = self.cell_1.size - len(self.cell_1.unit)
+        pos = self._put_text(pos, self.cell_1.gen())
+        pos = self._put_text(pos, " ")
+        self._cell_2_start = pos
+        self._cell_2_digits = self.cell_2.size - len(self.cell_2.unit)
+        self._put_text(pos, self.cell_2.gen())
+        # a cell without a unit counts as unused, its columns are free for the sparkline
+        text_end = pos + self.cell_2.size if self.cell_2.unit else pos - 1
+        self._spark_x = min(text_end * 8, display_w)
+        self._spark_w = 0
+        if self.history is not None:
+            self._spark_w = max(min(self.history.size, self._icon_x - self._spark_x), 0)
+        self._spark_drawn = 0
+        self._changed = True
+
+    def enable_history(self, size: int = 32, cell: Literal[1, 2] = 2, scale: int = 100):
+        """Keep a `History` of the values of `cell` and draw it as a sparkline in the free
+        columns right of the text. Samples are taken with `sample_history()`.
+
+        Args:
+            size (int, optional): Amount of samples kept, also the max sparkline width. Defaults to 32.
+            cell (Literal[1, 2], optional): Which cell to record. Defaults to 2.
+            scale (int, optional): Value drawn at full height. Defaults to 100.
+        """
+        self.history = History(size, scale)
+        self._history_cell = cell
+        self._layout()
+
+    def sample_history(self):
+        """Commit the peak value since the last call as the newest history sample"""
+        if self.history is not None:
+            self.history.commit()
+            self._changed = True
+
+    def _put_text(self, pos: int, text: str) -> int:
+        line = self._line
+        for char in text:
+            if pos < len(line):
+                line[pos] = ord(char)
+            pos += 1
+        return pos
+
+    def _put_number(self, start: int, digits: int, value: int) -> bool:
+        """Write `value` right aligned into `digits` chars of the line buffer, without allocating.
+
+        Returns:
+            bool: True if any char changed
+        """
+        line = self._line
+        end = min(start + digits, len(line))
+        negative = value < 0
+        if negative:
+            value = -value
+        needed = 1
+        rest = value // 10
+        while rest:
+            needed += 1
+            rest //= 10
+        if negative:
+            needed += 1
+        changed = False
+        pos = start + digits - 1
+        if needed > digits:
+            # Value to large to render, show hashes like InfoCell.gen() does
+            while pos >= start:
+                if pos < end and line[pos] != _CHAR_HASH:
+                    line[pos] = _CHAR_HASH
+                    changed = True
+                pos -= 1
+            return changed
+        while pos >= start:
+            if needed > 0:
+                if negative and needed == 1:
+                    char = _CHAR_MINUS
+                else:
+                    char = _CHAR_ZERO + value % 10
+                    value //= 10
+                needed -= 1
+            else:
+                char = _CHAR_SPACE
+            if pos < end and line[pos] != char:
+                line[pos] = char
+                changed = True
+            pos -= 1
+        return changed
+
+    def write_cell_1(self, c: InfoCell):
+        if not c.same_as(self.cell_1):
+            self.cell_1 = c
+            self._layout()
+
+    def write_cell_2(self, c: InfoCell):
+        if not c.same_as(self.cell_2):
+            self.cell_2 = c
+            self._layout()
+
+    def set_values(self, value_1: Optional[int] = None, value_2: Optional[int] = None):
+        """Update the numbers of both cells in place. Units and sizes stay as set by `write_cell_1()`/`write_cell_2()`.
+        Unlike writing new `InfoCell`s this does not allocate anything, so it can be called for every sample.
+
+        Args:
+            value_1 (Optional[int], optional): New value of cell 1. None keeps the current one. Defaults to None.
+            value_2 (Optional[int], optional): New value of cell 2. None keeps the current one. Defaults to None.
+        """
+        if value_1 is not None and self._put_number(
+            self._cell_1_start, self._cell_1_digits, value_1
+        ):
+            self._changed = True
+        if value_2 is not None and self._put_number(
+            self._cell_2_start, self._cell_2_digits, value_2
+        ):
+            self._changed = True
+        if self.history is not None:
+            value = value_1 if self._history_cell == 1 else value_2
+            if value is not None:
+                self.history.observe(value)
+
+    def clear_values(self, cell_1: bool = True, cell_2: bool = True):
+        """Show the cells without a number, only the unit stays"""
+        if cell_1 and self._put_blank(self._cell_1_start, self._cell_1_digits):
+            self._changed = True
+        if cell_2 and self._put_blank(self._cell_2_start, self._cell_2_digits):
+            self._changed = True
+
+    def _put_blank(self, start: int, digits: int) -> bool:
+        line = self._line
+        changed = False
+        for pos in range(start, min(start + digits, len(line))):
+            if line[pos] != _CHAR_SPACE:
+                line[pos] = _CHAR_SPACE
+                changed = True
+        return changed
+
+    @property
+    def warn_enabled(self) -> bool:
+        return self.icon == IconCache.WARN
+
+    def warn(self, on: bool = True):
+        if on:
+            self.set_icon(IconCache.WARN)
+        elif self.warn_enabled:
+            self.set_icon(None)
+
+    def set_icon(self, name: Optional[str]):
+        """Show one of the `IconCache` icons at the end of the row (or none with `None`)"""
+        if name != self.icon:
+            self.icon = name
+            # redraw the chars below the icon, this clears it when switched off
+            for i in range(self._icon_first_char, self._icon_last_char + 1):
+                self._shown[i] = 0
+            self._changed = True
+
+    def draw_icon(self):
+        if self.icon is None:
+            return
+        display.blit(icons.get(self.icon), self._icon_x, self._x_bottom)
+        dirty.mark(self._icon_x, self._x_bottom, IconCache.WIDTH, IconCache.HEIGHT)
+
+    def draw_sparkline(self):
+        """Bring the sparkline up to date with the history.
+
+        Only the new samples are drawn: the columns of the sparkline are shifted left in the
+        framebuffer by the amount of new samples and those are written as column bytes at the
+        right end. Everything is only redrawn if more samples are new than the line is wide.
+        """
+        width = self._spark_w
+        if not width:
+            return
+        history = self.history
+        new = history.count - self._spark_drawn
+        if not new:
+            return
+        if new > width:
+            new = width
+        self._spark_drawn = history.count
+        buffer = self._buffer
+        start = self.row * display_w + self._spark_x
+        for i in range(start, start + width - new):
+            buffer[i] = buffer[i + new]
+        end = start + width - 1
+        for age in range(new):
+            if age < history.count:
+                buffer[end - age] = _BARS[(history.get(age) * 8 + 254) // 255]
+            else:
+                buffer[end - age] = 0
+        dirty.mark(self._spark_x, self._x_bottom, width, row_height)
+
+    def render(self, force: bool = False):
+        """Draw the row into the framebuffer. Only chars that differ from the last render are drawn,
+        does nothing if nothing changed since the last call.
+
+        Args:
+            force (bool, optional): Draw even if nothing changed, e.g. after the framebuffer was cleared. Defaults to False.
+        """
+        if force:
+            for i in range(len(self._shown)):
+                self._shown[i] = 0
+        elif not self._changed:
+            return
+        if _TRACE:
+            start = utime.ticks_us()
+        self._changed = False
+        line = self._line
+        shown = self._shown
+        y = self._x_bottom
+        redraw_icon = False
+        spark_first_char = self._spark_x // 8
+        spark_last_char = (self._spark_x + self._spark_w - 1) // 8
+        for i in range(len(line)):
+            char = line[i]
+            if char == shown[i]:
+                continue
+            shown[i] = char
+            x = i * 8
+            # clear the char cell first, otherwise the new char is drawn on top of the old one
+            display.fill_rect(x, y, 8, row_height, 0)
+            display.text(_CHARS[char], x, y, 1)
+            dirty.mark(x, y, 8, row_height)
+            if self._icon_first_char <= i <= self._icon_last_char:
+                redraw_icon = True
+            if spark_first_char <= i <= spark_last_char:
+                # the char cleared part of the sparkline, draw all of it again
+                self._spark_drawn = 0
+        self.draw_sparkline()
+        if redraw_icon:
+            self.draw_icon()
+        if _TRACE:
+            tracer.record(SPAN_ROW, start)
+
+
+class GraphPage:
+    """Full screen graph of one row's `History`, newest sample on the right.
+
+    New samples are drawn incrementally: the framebuffer is scrolled left with
+    `framebuf.scroll()` by the amount of new samples and only those columns are drawn.
+    The title in the top left corner is drawn again after each scroll.
+    """
+
+    def __init__(self, row: InfoRow):
+        if row.history is None:
+            raise ValueError("Row {} keeps no history".format(row.title))
+        self.row = row
+        self.history = row.history
+        self._drawn = 0
+
+    def invalidate(self):
+        """Draw everything on the next `render()`, e.g. when the page gets shown"""
+        self._drawn = 0
+
+    def _draw_column(self, x: int, value: int):
+        display.vline(x, 0, display_h, 0)
+        height = (value * display_h + 254) // 255
+        if height:
+            display.vline(x, display_h - height, height, 1)
+
+    def render(self):
+        history = self.history
+        new = history.count - self._drawn
+        if not new and self._drawn:
+            return
+        if not self._drawn or new >= display_w:
+            display.fill(0)
+            new = min(history.count, history.size, display_w)
+        else:
+            display.scroll(-new, 0)
+        self._drawn = history.count
+        for age in range(new):
+            self._draw_column(display_w - 1 - age, history.get(age))
+        title_w = len(self.row.title) * 8
+        display.fill_rect(0, 0, title_w, row_height, 0)
+        display.text(self.row.title, 0, 0, 1)
+        dirty.invalidate()
+
+
+def default_rows() -> Tuple["InfoRow", ...]:
+    """The CPU, GPU, MEM and HDD rows with their units and placeholder values, call `init()` first"""
+    cpu = InfoRow("CPU", 0)
+    gpu = InfoRow("GPU", 1)
+    mem = InfoRow("MEM", 2)
+    hdd = InfoRow("HDD", 3)
+
+    # Set units and sizes once, values are updated in place with `set_values()`
+    cpu.write_cell_1(InfoCell(unit="C"))
+    cpu.write_cell_2(InfoCell(unit="%"))
+    cpu.set_values(100, 100)
+
+    gpu.write_cell_1(InfoCell(unit="C"))
+    gpu.write_cell_2(InfoCell(unit="%"))
+    gpu.set_values(1, 98)
+
+    mem.write_cell_1(InfoCell(unit="C"))
+    mem.write_cell_2(InfoCell(unit="%"))
+    mem.set_values(6, 1000)
+
+    hdd.write_cell_1(InfoCell(unit="MB/s", size=8))
+    hdd.set_values(1000)
+
+    hdd.warn()
+    gpu.warn()
+
+    # Sparklines of the load and the disk throughput, in the columns right of the values
+    cpu.enable_history(cell=2)
+    hdd.enable_history(cell=1, scale=1000)
+
+    return (cpu, gpu, mem, hdd)
+
+
+class RenderScheduler:
+    """Draws the rows in its own uasyncio task, at most `max_fps` times per second.
+
+    Producers only call `request(row)`, which marks the row and wakes the task. Any number of
+    updates between two frames are coalesced: the rows already hold the newest values, so a frame
+    renders each changed row once and sends it with a single `DirtyPages.flush()`. An update for
+    a row that is still waiting for its frame is counted in `coalesced`.
+
+    There is no lock, producers and the render task run on the same uasyncio loop and only share
+    the `_pending` bitmask and an `uasyncio.Event`.
+    """
+
+    def __init__(
+        self,
+        rows: Tuple[InfoRow, ...],
+        max_fps: int = 20,
+        stats_interval_ms: int = 0,
+        history_interval_ms: int = 1000,
+    ):
+        """
+        Args:
+            rows (Tuple[InfoRow, ...]): The rows to draw
+            max_fps (int, optional): Upper limit of frames per second. Defaults to 20.
+            stats_interval_ms (int, optional): Print `stats()` this often, 0 = never. Defaults to 0.
+            history_interval_ms (int, optional): Time between two `History` samples of the rows. Defaults to 1000.
+        """
+        self.rows = rows
+        self.frame_interval_ms = 1000 // max_fps
+        self.stats_interval_ms = stats_interval_ms
+        self.history_interval_ms = history_interval_ms
+        self._next_history = utime.ticks_add(utime.ticks_ms(), history_interval_ms)
+        # `GraphPage` shown instead of the rows, if any
+        self.page: Optional[GraphPage] = None
+        self._redraw_rows = False
+        self._pending = 0
+        self._event = uasyncio.Event()
+        self.requests: int = 0
+        self.coalesced: int = 0
+        self.frames: int = 0
+        self.bytes_sent: int = 0
+        self.last_frame_us: int = 0
+        self.max_frame_us: int = 0
+        self.total_frame_us: int = 0
+
+    def mark(self, row: int):
+        """Like `request()` but without waking the task, for `RenderWorker` on core 1"""
+        bit = 1 << row
+        self.requests += 1
+        if self._pending & bit:
+            self.coalesced += 1
+        self._pending |= bit
+
+    def request(self, row: int):
+        """Ask for `row` to be drawn with the next frame"""
+        self.mark(row)
+        self._event.set()
+
+    @property
+    def pending(self) -> bool:
+        return self._pending != 0
+
+    def request_all(self):
+        for row in range(len(self.rows)):
+            self.request(row)
+
+    def show_graph(self, page: GraphPage):
+        """Show `page` instead of the rows from the next frame on"""
+        self.page = page
+        page.invalidate()
+        self.request_all()
+
+    def show_rows(self):
+        self.page = None
+        self._redraw_rows = True
+        self.request_all()
+
+    def sample_history(self):
+        """Take a `History` sample of every row that keeps one, if the interval is over"""
+        now = utime.ticks_ms()
+        if utime.ticks_diff(now, self._next_history) < 0:
+            return
+        self._next_history = utime.ticks_add(now, self.history_interval_ms)
+        for i in range(len(self.rows)):
+            if self.rows[i].history is not None:
+                self.rows[i].sample_history()
+                self.mark(i)
+
+    def frame(self):
+        """Render the pending rows (or the graph page) and flush them to the display, right now"""
+        start = utime.ticks_us()
+        pending = self._pending
+        self._pending = 0
+        if self.page is not None:
+            self.page.render()
+        elif self._redraw_rows:
+            self._redraw_rows = False
+            display.fill(0)
+            for row in self.rows:
+                row.render(force=True)
+        else:
+            for i in range(len(self.rows)):
+                if pending & (1 << i):
+                    self.rows[i].render()
+        self.bytes_sent += dirty.flush()
+        if _TRACE:
+            tracer.record(SPAN_FRAME, start)
+        took = utime.ticks_diff(utime.ticks_us(), start)
+        self.frames += 1
+        self.last_frame_us = took
+        self.total_frame_us += took
+        if took > self.max_frame_us:
+            self.max_frame_us = took
+
+    def stats(self) -> str:
+        average = self.total_frame_us // self.frames if self.frames else 0
+        return (
+            "frames {} requests {} coalesced {} frame us avg {} max {} bytes {}".format(
+                self.frames,
+                self.requests,
+                self.coalesced,
+                average,
+                self.max_frame_us,
+                self.bytes_sent,
+            )
+        )
+
+    async def run(self):
+        """Render whenever rows are pending, forever"""
+        next_frame = utime.ticks_ms()
+        next_stats = utime.ticks_add(next_frame, self.stats_interval_ms)
+        while True:
+            await self._event.wait()
+            self._event.clear()
+            # keep the cap, updates arriving meanwhile are collected into this frame
+            wait = utime.ticks_diff(next_frame, utime.ticks_ms())
+            if wait > 0:
+                await uasyncio.sleep_ms(wait)
+            now = utime.ticks_ms()
+            next_frame = utime.ticks_add(now, self.frame_interval_ms)
+            self.frame()
+            if self.stats_interval_ms and utime.ticks_diff(now, next_stats) >= 0:
+                next_stats = utime.ticks_add(now, self.stats_interval_ms)
+                print(self.stats())
+
+    async def run_history(self):
+        """Sample the row histories every `history_interval_ms`, forever"""
+        while True:
+            await uasyncio.sleep_ms(
+                max(utime.ticks_diff(self._next_history, utime.ticks_ms()), 0)
+            )
+            self.sample_history()
+            if self._pending:
+                self._event.set()
+
+
+class RenderWorker:
+    """Draws the display from a `_thread` on core 1, so slow I2C transfers don't delay
+    the stepper timing on core 0.
+
+    Once started, core 1 owns the rows, `display` and the I2C bus. Core 0 only pushes parsed
+    records into `ring`; the worker applies them, renders with `scheduler.frame()` (the same
+    fps cap and stats as the uasyncio mode) and sleeps until the next frame.
+    """
+
+    def __init__(self, scheduler: RenderScheduler, ring: "RecordRing"):
+        from perfmon.ingest import MetricSink
+
+        self.scheduler = scheduler
+        self.ring = ring
+        self.sink = MetricSink(scheduler.rows, on_update=scheduler.mark)
+        self.running = False
+
+    def start(self):
+        try:
+            import _thread
+        except ImportError:
+            raise OSError("no _thread support on this port")
+        self.running = True
+        _thread.start_new_thread(self._run, ())
+
+    def stop(self):
+        """Ask the worker to end after the current frame"""
+        self.running = False
+
+    def _run(self):
+        scheduler = self.scheduler
+        while self.running:
+            start = utime.ticks_ms()
+            while self.ring.pop_into(self.sink):
+                pass
+            scheduler.sample_history()
+            if scheduler.pending:
+                scheduler.frame()
+            wait = scheduler.frame_interval_ms - utime.ticks_diff(
+                utime.ticks_ms(), start
+            )
+            utime.sleep_ms(wait if wait > 0 else 1)
+
+
+def info():
+    display.text("CPU: 100C 100%", 0, 0, 1)
+    display.text("GPU: 100C 100%", 0, 8, 1)
+    display.text("Mem: 100C 100%", 0, 16, 1)
+    display.text("HDD: 100MB/s", 0, 24, 1)
+
+
+def test_demo():
+    display.fill(0)
+    display.fill_rect(0, 0, 32, 32, 1)
+    display.fill_rect(2, 2, 28, 28, 0)
+    display.vline(9, 8, 22, 1)
+    display.vline(16, 2, 22, 1)
+    display.vline(23, 8, 22, 1)
+    display.fill_rect(26, 24, 2, 4, 1)
+    display.text("Hallo Maike", 40, 0, 1)
+    display.text("I love You", 40, 12, 1)
+    display.text(":)", 40, 24, 1)
+    display.show()
+    print("END")
@@ -0,0 +1,244 @@
+"""Metric frames from the host: parsing the serial stream and applying records to the rows.
+
+`RecordRing` hands the records to `display.RenderWorker` when the display is drawn on core 1.
+"""
+
+import sys
+import select
+import utime
+import uasyncio
+import micropython
+from micropython import const
+import array
+
+from perfmon import protocol
+from perfmon.display import InfoCell, InfoRow
+
+try:
+    from typing import Callable, Optional, Tuple
+except ImportError:
+    # only for the type checker, MicroPython does not evaluate annotations
+    pass
+
+# Span tracing, see `perfmon.trace`
+_TRACE = const(0)
+if _TRACE:
+    from perfmon.trace import tracer, SPAN_INGEST
+
+
+class MetricSink:
+    """Applies records parsed by `protocol.FrameParser` to the `InfoRow`s.
+
+    Values go straight into the rows with `InfoRow.set_values()`. A new `InfoCell` is only
+    created when the host switches the unit of a cell. Drawing is left to `on_update`,
+    which is called with the row index after every applied record.
+    """
+
+    def __init__(
+        self,
+        rows: Tuple[InfoRow, ...],
+        on_update: Optional[Callable[[int], None]] = None,
+    ):
+        self.rows = rows
+        self.on_update = on_update
+        # unit index currently shown per cell, 0xFF = not set by the host yet
+        self._units = bytearray([0xFF] * (len(rows) * 2))
+        # last flags per row, deltas without FIELD_FLAGS keep them
+        self._flags = bytearray(len(rows))
+        self.records: int = 0
+
+    def on_record(
+        self,
+        row: int,
+        fields: int,
+        flags: int,
+        unit_1: int,
+        unit_2: int,
+        value_1: int,
+        value_2: int,
+    ):
+        if row >= len(self.rows):
+            return
+        info_row = self.rows[row]
+        self.records += 1
+        if fields & protocol.FIELD_UNITS:
+            if unit_1 != self._units[row * 2] and unit_1 < len(protocol.UNITS):
+                self._units[row * 2] = unit_1
+                info_row.write_cell_1(
+                    InfoCell(unit=protocol.UNITS[unit_1], size=info_row.cell_1.size)
+                )
+            if unit_2 != self._units[row * 2 + 1] and unit_2 < len(protocol.UNITS):
+                self._units[row * 2 + 1] = unit_2
+                info_row.write_cell_2(
+                    InfoCell(unit=protocol.UNITS[unit_2], size=info_row.cell_2.size)
+                )
+        if fields & protocol.FIELD_FLAGS:
+            self._flags[row] = flags
+            info_row.warn(bool(flags & protocol.FLAG_WARN))
+        else:
+            flags = self._flags[row]
+        if flags & protocol.FLAG_BLANK_1:
+            info_row.clear_values(cell_2=False)
+        elif fields & protocol.FIELD_VALUE_1:
+            info_row.set_values(value_1=value_1)
+        if flags & protocol.FLAG_BLANK_2:
+            info_row.clear_values(cell_1=False)
+        elif fields & protocol.FIELD_VALUE_2:
+            info_row.set_values(value_2=value_2)
+        if self.on_update:
+            self.on_update(row)
+
+
+class SerialIngest:
+    """Reads metric frames from a byte stream (by default the USB serial `sys.stdin.buffer`)
+    into a `protocol.FrameParser`.
+
+    Bytes are read one at a time into a preallocated buffer, as long as the stream has data.
+    `poll()` does that without blocking, `run()` is the uasyncio version that waits for data.
+    Any stream that supports `readinto()` and `select.poll()` works, e.g. a pipe or pty on Linux.
+
+    Reading binary data from the USB serial needs Ctrl-C (0x03) handling switched off, otherwise
+    0x03 bytes in a frame would raise KeyboardInterrupt. To keep the REPL reachable
+    (e.g. for mpremote) a 0x03 received between frames still raises KeyboardInterrupt.
+    """
+
+    CTRL_C = 0x03
+
+    def __init__(
+        self,
+        parser: protocol.FrameParser,
+        stream=None,
+        on_frames: Optional[Callable[[], None]] = None,
+    ):
+        self.parser = parser
+        self.stream = stream if stream is not None else sys.stdin.buffer
+        self.on_frames = on_frames
+        self._byte = bytearray(1)
+        self._poll = select.poll()
+        self._poll.register(self.stream, select.POLLIN)
+        # `ipoll` does not allocate a result list (MicroPython only)
+        self._ipoll = getattr(self._poll, "ipoll", self._poll.poll)
+        self.bytes_read: int = 0
+
+    def _readable(self) -> bool:
+        for _ in self._ipoll(0):
+            return True
+        return False
+
+    def _feed_byte(self) -> int:
+        byte = self._byte[0]
+        if byte == self.CTRL_C and self.parser.idle and self.stream is sys.stdin.buffer:
+            micropython.kbd_intr(self.CTRL_C)
+            raise KeyboardInterrupt
+        self.bytes_read += 1
+        return self.parser.feed(self._byte)
+
+    def _drain(self) -> int:
+        if self.stream is sys.stdin.buffer:
+            micropython.kbd_intr(-1)
+        if _TRACE:
+            start = utime.ticks_us()
+        frames = 0
+        while self._readable():
+            if not self.stream.readinto(self._byte):
+                break
+            frames += self._feed_byte()
+        if _TRACE:
+            tracer.record(SPAN_INGEST, start)
+        return frames
+
+    def poll(self) -> int:
+        """Parse everything that is available right now, without blocking.
+
+        Returns:
+            int: Amount of complete frames
+        """
+        frames = self._drain()
+        if frames and self.on_frames:
+            self.on_frames()
+        return frames
+
+    async def run(self):
+        """Wait for data and parse it, forever"""
+        reader = uasyncio.StreamReader(self.stream)
+        while True:
+            if self.stream is sys.stdin.buffer:
+                micropython.kbd_intr(-1)
+            if not await reader.readinto(self._byte):
+                continue
+            # the first byte woke us up, then take whatever else already arrived
+            frames = self._feed_byte() + self._drain()
+            if frames and self.on_frames:
+                self.on_frames()
+
+
+class RecordRing:
+    """Lock-free single producer / single consumer queue of metric records.
+
+    Each slot holds one record as 7 int16 in a preallocated `array`, so neither side allocates.
+    Only the producer writes `head` and only the consumer writes `tail`, each after its slot
+    access is done. Storing a small int attribute is a single word write, so the other core
+    never sees a half updated index. If the ring is full, the record is dropped and counted.
+    """
+
+    SLOT = 7
+
+    def __init__(self, capacity: int = 32):
+        self.capacity = capacity
+        self._slots = array.array("h", bytes(2 * self.SLOT * capacity))
+        self.head: int = 0
+        self.tail: int = 0
+        self.dropped: int = 0
+
+    def push(
+        self,
+        row: int,
+        fields: int,
+        flags: int,
+        unit_1: int,
+        unit_2: int,
+        value_1: int,
+        value_2: int,
+    ):
+        """Producer side, has the signature of `MetricSink.on_record()`"""
+        head = self.head
+        next_head = head + 1
+        if next_head == self.capacity:
+            next_head = 0
+        if next_head == self.tail:
+            self.dropped += 1
+            return
+        slots = self._slots
+        i = head * self.SLOT
+        slots[i] = row
+        slots[i + 1] = fields
+        slots[i + 2] = flags
+        slots[i + 3] = unit_1
+        slots[i + 4] = unit_2
+        slots[i + 5] = value_1
+        slots[i + 6] = value_2
+        self.head = next_head
+
+    def pop_into(self, sink: MetricSink) -> bool:
+        """Consumer side, applies the oldest record to `sink`.
+
+        Returns:
+            bool: False if the ring was empty
+        """
+        tail = self.tail
+        if tail == self.head:
+            return False
+        slots = self._slots
+        i = tail * self.SLOT
+        sink.on_record(
+            slots[i],
+            slots[i + 1],
+            slots[i + 2],
+            slots[i + 3],
+            slots[i + 4],
+            slots[i + 5],
+            slots[i + 6],
+        )
+        tail += 1
+        self.tail = 0 if tail == self.capacity else tail
+        return True
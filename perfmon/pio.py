@@ -0,0 +1,214 @@
+"""STEP pulse generation with an RP2040 PIO state machine, see `PioStepEngine`.
+
+Loaded by `DRV8825StepperMotor.use_pio()`, assembling the PIO program only happens then.
+"""
+
+from machine import Pin
+
+from perfmon.stepper import StepRamp
+
+try:
+    from typing import Callable, Optional, Tuple
+except ImportError:
+    # only for the type checker, MicroPython does not evaluate annotations
+    pass
+
+try:
+    import rp2
+except ImportError:
+    # not an RP2040, `PioStepEngine` is not available
+    rp2 = None
+
+
+if rp2 is not None:
+
+    @rp2.asm_pio(set_init=rp2.PIO.OUT_LOW)
+    def _pio_step_program():
+        # Per segment two words: amount of steps - 1 and the delay loop count of each half period.
+        # A step takes 2 * delay + 7 cycles, see `PioStepEngine._delay()`, a segment 5 more.
+        wrap_target()
+        pull(block)
+        mov(x, osr)
+        pull(block)
+        label("step")
+        set(pins, 1)
+        mov(y, osr)
+        label("high")
+        jmp(y_dec, "high")
+        set(pins, 0)
+        mov(y, osr)
+        label("low")
+        jmp(y_dec, "low")
+        jmp(x_dec, "step")
+        # segment done: a word in the RX FIFO to count, the IRQ only wakes up the CPU
+        push(noblock)
+        irq(rel(0))
+        wrap()
+
+
+class PioStepEngine:
+    """Generates the STEP pulses with a PIO state machine, the CPU only feeds segments.
+
+    A move is split into segments of equal step interval, two FIFO words each. A step lasts an
+    odd number of state machine cycles (`_delay()`), so a run of steps whose time does not
+    divide into that is sent as two segments, the second one with steps 2 cycles longer, and
+    the run still takes its time to the cycle. A constant speed move is such a run and causes
+    at most two IRQs. With a `StepRamp` the acceleration and deceleration phases are split into
+    runs of at least `min_segment_us` with the average interval of their steps, so there are
+    at most 2 * 1000000 / min_segment_us IRQs per second. The cruise phase is again one run.
+
+    Every segment pushes a word into the RX FIFO when it is done and raises an IRQ. IRQs of
+    segments that end close together merge into one, so the handler counts the RX words. No
+    more than 3 segments are queued or running, the 4 word RX FIFO can not overflow.
+
+    The state machine owns the STEP pin from `__init__()` on, Python code can not toggle it anymore.
+    """
+
+    # PIO cycles of a step besides the two delay loops
+    STEP_OVERHEAD_CYCLES = 7
+    # PIO cycles between the last step of a segment and the first of the next one
+    SEGMENT_OVERHEAD_CYCLES = 5
+    # TX FIFO depth of a state machine (not joined)
+    TX_FIFO_WORDS = 4
+
+    def __init__(
+        self,
+        step_pin: Pin,
+        sm_id: int = 0,
+        freq: int = 2_000_000,
+        min_segment_us: int = 2000,
+    ):
+        """
+        Args:
+            step_pin (Pin): gpio connected to the drv8825 STP pin
+            sm_id (int, optional): PIO state machine to use (0-7). Defaults to 0.
+            freq (int, optional): State machine clock, sets the resolution of the step interval. Defaults to 2_000_000.
+            min_segment_us (int, optional): Shortest segment while ramping. Defaults to 2000.
+        """
+        if rp2 is None:
+            raise OSError("PIO step generation needs an RP2040")
+        self.freq = freq
+        self.min_segment_us = min_segment_us
+        self._sm = rp2.StateMachine(
+            sm_id, _pio_step_program, freq=freq, set_base=step_pin
+        )
+        self._sm.irq(self._on_irq)
+        self.ramp: Optional[StepRamp] = None
+        self._interval_ns = 0
+        self._total = 0
+        self._next_step = 0
+        self._queued = 0
+        # steps and their cycles of the second segment of a run, see `_segment()`
+        self._split = 0
+        self._split_cycles = 0
+        self._on_done: Optional[Callable[[], None]] = None
+        self.busy = False
+        self.segments: int = 0
+        self._sm.active(1)
+
+    def _cycles(self, ns: int) -> int:
+        return (ns * self.freq + 500_000_000) // 1_000_000_000
+
+    def _delay(self, cycles: int) -> int:
+        """Delay loop count of a step of `cycles` state machine cycles, which has to be odd"""
+        delay = (cycles - self.STEP_OVERHEAD_CYCLES) >> 1
+        return delay if delay > 0 else 0
+
+    def move(
+        self,
+        steps: int,
+        interval_ns: int,
+        ramp: Optional[StepRamp] = None,
+        on_done: Optional[Callable[[], None]] = None,
+    ):
+        """Start a move of `steps` steps and return right away.
+
+        Args:
+            steps (int): Amount of steps
+            interval_ns (int): Time per step in ns, used without `ramp`
+            ramp (Optional[StepRamp], optional): Accelerate and decelerate with this profile. Defaults to None.
+            on_done (Optional[Callable[[], None]], optional): Called (from a soft IRQ) when the last step is done. Defaults to None.
+        """
+        if self.busy:
+            raise ValueError("PIO step engine is still busy with the last move")
+        if steps <= 0:
+            if on_done:
+                on_done()
+            return
+        self.busy = True
+        self.ramp = ramp
+        self._interval_ns = interval_ns
+        self._total = steps
+        self._next_step = 0
+        self._split = 0
+        self._on_done = on_done
+        self._fill()
+
+    def _run(self, step: int) -> Tuple[int, int]:
+        """Amount of steps and their total time in ns of the run starting at `step`"""
+        ramp = self.ramp
+        total = self._total
+        if ramp is None:
+            return total - step, (total - step) * self._interval_ns
+        ramp_steps = len(ramp.intervals)
+        if ramp_steps <= step < total - ramp_steps:
+            # the whole cruise phase
+            count = total - ramp_steps - step
+            return count, count * ramp.cruise_us * 1000
+        count = 1
+        elapsed = ramp.interval_us(step, total)
+        while (
+            step + count < total
+            and elapsed < self.min_segment_us
+            and not ramp_steps <= step + count < total - ramp_steps
+        ):
+            elapsed += ramp.interval_us(step + count, total)
+            count += 1
+        return count, elapsed * 1000
+
+    def _segment(self, step: int) -> Tuple[int, int]:
+        """Amount of steps and the cycles of each of the segment starting at `step`"""
+        if self._split:
+            count = self._split
+            self._split = 0
+            return count, self._split_cycles
+        count, ns = self._run(step)
+        cycles = self._cycles(ns) - self.SEGMENT_OVERHEAD_CYCLES
+        # the longest odd step that fits, the rest are steps 2 cycles longer at the end
+        per_step = (cycles // count - 1) | 1
+        if per_step < self.STEP_OVERHEAD_CYCLES:
+            return count, self.STEP_OVERHEAD_CYCLES
+        longer = (cycles - per_step * count + 1) >> 1
+        if longer >= count:
+            return count, per_step + 2
+        if longer:
+            # the second segment has its own overhead
+            longer = (cycles - self.SEGMENT_OVERHEAD_CYCLES - per_step * count + 1) >> 1
+            if longer > 0:
+                self._split = longer
+                self._split_cycles = per_step + 2
+                return count - longer, per_step
+        return count, per_step
+
+    def _fill(self):
+        # every segment is two words
+        while (
+            self._next_step < self._total
+            and self._sm.tx_fifo() <= self.TX_FIFO_WORDS - 2
+        ):
+            count, cycles = self._segment(self._next_step)
+            self._sm.put(count - 1)
+            self._sm.put(self._delay(cycles))
+            self._next_step += count
+            self._queued += 1
+
+    def _on_irq(self, sm):
+        while sm.rx_fifo():
+            sm.get()
+            self._queued -= 1
+            self.segments += 1
+        self._fill()
+        if not self._queued and self._next_step >= self._total:
+            self.busy = False
+            if self._on_done:
+                self._on_done()
@@ -0,0 +1,468 @@
+"""Binary frame format used to stream perfmon samples from the host to the pico.
+
+This module is shared by the pico (MicroPython) and the host side (CPython).
+
+Frame layout:
+
+    SYNC_1 SYNC_2 LEN PAYLOAD[LEN] CRC_LO CRC_HI
+
+* SYNC_1, SYNC_2: 0xA5 0x5A, marks the start of a frame
+* LEN: payload length (1..MAX_PAYLOAD)
+* CRC: CRC-16/CCITT-FALSE over LEN and PAYLOAD, little endian
+
+Payload layout:
+
+    MSG_TYPE SEQ BODY
+
+SEQ counts up by one (wrapping at 256) with every frame the host sends.
+
+MSG_SAMPLE (keyframe) body: COUNT followed by COUNT records of RECORD_SIZE bytes:
+
+    ROW FLAGS UNIT_1 UNIT_2 VALUE_1 VALUE_2
+
+* ROW: index of the info row on the display (0: CPU, 1: GPU, 2: MEM, 3: HDD)
+* FLAGS: FLAG_* bits
+* UNIT_1, UNIT_2: index into UNITS
+* VALUE_1, VALUE_2: signed 16 bit little endian
+
+MSG_DELTA body: COUNT followed by COUNT records that only carry the fields that changed:
+
+    ROW FIELDS [FLAGS] [UNIT_1 UNIT_2] [VALUE_1] [VALUE_2]
+
+* FIELDS: FIELD_* bits, which of the optional parts follow (in this order)
+
+MSG_COMMAND body: a single CMD_* byte, asks the pico to do something (e.g. print a dump over
+the serial console). Commands are outside the sample stream, their SEQ is not checked.
+
+A delta only makes sense on top of the state the previous frame left. If the SEQ of a delta
+is not the successor of the last frame (a frame got lost or broken), the receiver ignores all
+deltas until the next keyframe. The host sends a keyframe periodically for that reason.
+"""
+
+from array import array
+
+try:
+    from micropython import const
+except ImportError:
+
+    def const(x):
+        return x
+
+
+SYNC_1 = const(0xA5)
+SYNC_2 = const(0x5A)
+MAX_PAYLOAD = const(64)
+
+MSG_SAMPLE = const(0x01)
+MSG_DELTA = const(0x02)
+MSG_COMMAND = const(0x03)
+
+# print the span tracer ring (`SpanTracer` in perfmon/trace.py)
+CMD_DUMP_TRACE = const(0x01)
+# print the step jitter histogram (`StepTelemetry` in perfmon/stepper.py)
+CMD_DUMP_JITTER = const(0x02)
+
+RECORD_SIZE = const(8)
+# payload bytes in front of the records: MSG_TYPE SEQ COUNT
+SAMPLE_HEADER_SIZE = const(3)
+
+# which parts of a record a delta carries
+FIELD_FLAGS = const(0x01)
+FIELD_UNITS = const(0x02)
+FIELD_VALUE_1 = const(0x04)
+FIELD_VALUE_2 = const(0x08)
+FIELD_ALL = const(0x0F)
+
+FLAG_WARN = const(0x01)
+# the cell has no value and is shown empty
+FLAG_BLANK_1 = const(0x02)
+FLAG_BLANK_2 = const(0x04)
+
+ROW_CPU = const(0)
+ROW_GPU = const(1)
+ROW_MEM = const(2)
+ROW_HDD = const(3)
+
+# Units a cell can show. The index is sent instead of the string.
+UNITS = ("", "C", "%", "MB/s", "GB/s", "KB/s", "GB", "MHz", "W")
+
+_STATE_SYNC_1 = const(0)
+_STATE_SYNC_2 = const(1)
+_STATE_LEN = const(2)
+_STATE_PAYLOAD = const(3)
+_STATE_CRC_LO = const(4)
+_STATE_CRC_HI = const(5)
+
+
+def _make_crc_table() -> array:
+    table = array("H", [0] * 256)
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = ((crc << 1) ^ 0x1021) & 0xFFFF
+            else:
+                crc = (crc << 1) & 0xFFFF
+        table[i] = crc
+    return table
+
+
+_CRC_TABLE = _make_crc_table()
+
+
+def crc16(data, crc: int = 0xFFFF) -> int:
+    """CRC-16/CCITT-FALSE of `data`, pass the previous result as `crc` to continue a checksum"""
+    table = _CRC_TABLE
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ table[((crc >> 8) ^ byte) & 0xFF]
+    return crc
+
+
+def encode_frame(payload: bytes) -> bytes:
+    """Wrap a payload into a frame (sync bytes, length and CRC)"""
+    if not 0 < len(payload) <= MAX_PAYLOAD:
+        raise ValueError(
+            "Payload length must be 1..{}. got {}".format(MAX_PAYLOAD, len(payload))
+        )
+    crc = crc16(payload, crc16((len(payload),)))
+    return (
+        bytes((SYNC_1, SYNC_2, len(payload)))
+        + bytes(payload)
+        + bytes((crc & 0xFF, crc >> 8))
+    )
+
+
+def encode_sample(seq: int, records) -> bytes:
+    """Build a MSG_SAMPLE frame.
+
+    Args:
+        seq (int): Sequence number of the frame, wraps at 256
+        records: Iterable of (row, flags, unit_1, unit_2, value_1, value_2) tuples
+
+    Returns:
+        bytes: The complete frame
+    """
+    body = bytearray()
+    count = 0
+    for row, flags, unit_1, unit_2, value_1, value_2 in records:
+        body += bytes((row, flags, unit_1, unit_2))
+        body += _int16(value_1) + _int16(value_2)
+        count += 1
+    return encode_frame(bytes((MSG_SAMPLE, seq & 0xFF, count)) + body)
+
+
+def encode_delta(seq: int, records) -> bytes:
+    """Build a MSG_DELTA frame.
+
+    Args:
+        seq (int): Sequence number of the frame, wraps at 256
+        records: Iterable of (row, fields, flags, unit_1, unit_2, value_1, value_2) tuples,
+            only the parts selected by `fields` are sent
+
+    Returns:
+        bytes: The complete frame
+    """
+    body = bytearray()
+    count = 0
+    for row, fields, flags, unit_1, unit_2, value_1, value_2 in records:
+        body += bytes((row, fields))
+        if fields & FIELD_FLAGS:
+            body.append(flags)
+        if fields & FIELD_UNITS:
+            body += bytes((unit_1, unit_2))
+        if fields & FIELD_VALUE_1:
+            body += _int16(value_1)
+        if fields & FIELD_VALUE_2:
+            body += _int16(value_2)
+        count += 1
+    return encode_frame(bytes((MSG_DELTA, seq & 0xFF, count)) + body)
+
+
+def encode_command(command: int) -> bytes:
+    """Build a MSG_COMMAND frame for one of the CMD_* commands"""
+    return encode_frame(bytes((MSG_COMMAND, 0, command)))
+
+
+def _int16(value: int) -> bytes:
+    value = max(-0x8000, min(0x7FFF, int(value))) & 0xFFFF
+    return bytes((value & 0xFF, value >> 8))
+
+
+def unit_index(unit: str) -> int:
+    return UNITS.index(unit)
+
+
+class FrameParser:
+    """Incremental parser for the frame format. Feed it bytes as they arrive, in chunks of any size.
+
+    Every record of a valid frame is passed to
+    `on_record(row, fields, flags, unit_1, unit_2, value_1, value_2)`, `fields` tells which of the
+    values are set (FIELD_ALL for keyframes). The parser works on preallocated buffers, feeding
+    bytes and decoding records does not allocate.
+    Broken frames (bad length or CRC) are dropped and the parser looks for the next sync bytes.
+    Deltas are ignored from a sequence gap on until the next keyframe.
+    A MSG_COMMAND frame calls `on_command(command)`.
+    """
+
+    def __init__(self, on_record, on_command=None):
+        self.on_record = on_record
+        self.on_command = on_command
+        self.payload = bytearray(MAX_PAYLOAD)
+        self._state = _STATE_SYNC_1
+        self._length = 0
+        self._pos = 0
+        self._crc = 0
+        self._crc_lo = 0
+        self.last_seq = -1
+        # True while deltas can be applied: got a keyframe and no frame was lost since
+        self.synced = False
+        # statistics
+        self.frames = 0
+        self.keyframes = 0
+        self.deltas = 0
+        self.dropped_deltas = 0
+        self.crc_errors = 0
+        self.invalid_frames = 0
+
+    @property
+    def idle(self) -> bool:
+        """True while the parser is between frames, looking for sync bytes"""
+        return self._state == _STATE_SYNC_1
+
+    def feed(self, data, length: int = -1) -> int:
+        """Parse bytes.
+
+        Args:
+            data: bytes, bytearray or memoryview with the received data
+            length (int, optional): Only parse the first `length` bytes of `data`. Defaults to all.
+
+        Returns:
+            int: Amount of valid frames completed by these bytes
+        """
+        if length < 0:
+            length = len(data)
+        completed = 0
+        table = _CRC_TABLE
+        for i in range(length):
+            byte = data[i]
+            state = self._state
+            if state == _STATE_PAYLOAD:
+                self.payload[self._pos] = byte
+                self._pos += 1
+                self._crc = ((self._crc << 8) & 0xFFFF) ^ table[
+                    ((self._crc >> 8) ^ byte) & 0xFF
+                ]
+                if self._pos == self._length:
+                    self._state = _STATE_CRC_LO
+            elif state == _STATE_SYNC_1:
+                if byte == SYNC_1:
+                    self._state = _STATE_SYNC_2
+            elif state == _STATE_SYNC_2:
+                if byte == SYNC_2:
+                    self._state = _STATE_LEN
+                elif byte != SYNC_1:
+                    self._state = _STATE_SYNC_1
+            elif state == _STATE_LEN:
+                if 0 < byte <= MAX_PAYLOAD:
+                    self._length = byte
+                    self._pos = 0
+                    # CRC starts at 0xFFFF and covers the length byte
+                    self._crc = 0xFF00 ^ table[0xFF ^ byte]
+                    self._state = _STATE_PAYLOAD
+                else:
+                    self.invalid_frames += 1
+                    self._state = _STATE_SYNC_1
+            elif state == _STATE_CRC_LO:
+                self._crc_lo = byte
+                self._state = _STATE_CRC_HI
+            else:
+                self._state = _STATE_SYNC_1
+                if self._crc == (self._crc_lo | (byte << 8)):
+                    if self._dispatch():
+                        self.frames += 1
+                        completed += 1
+                    else:
+                        self.invalid_frames += 1
+                else:
+                    self.crc_errors += 1
+        return completed
+
+    def _dispatch(self) -> bool:
+        payload = self.payload
+        length = self._length
+        if length < SAMPLE_HEADER_SIZE:
+            return False
+        msg = payload[0]
+        seq = payload[1]
+        count = payload[2]
+        if msg == MSG_COMMAND:
+            if length != SAMPLE_HEADER_SIZE:
+                return False
+            if self.on_command:
+                self.on_command(count)
+            return True
+        if msg == MSG_SAMPLE:
+            if SAMPLE_HEADER_SIZE + count * RECORD_SIZE != length:
+                return False
+            self.last_seq = seq
+            self.synced = True
+            self.keyframes += 1
+            pos = SAMPLE_HEADER_SIZE
+            for _ in range(count):
+                self.on_record(
+                    payload[pos],
+                    FIELD_ALL,
+                    payload[pos + 1],
+                    payload[pos + 2],
+                    payload[pos + 3],
+                    self._int16(pos + 4),
+                    self._int16(pos + 6),
+                )
+                pos += RECORD_SIZE
+            return True
+        if msg == MSG_DELTA:
+            if not self._delta_length_ok(count, length):
+                return False
+            in_sequence = seq == ((self.last_seq + 1) & 0xFF)
+            self.last_seq = seq
+            if not (self.synced and in_sequence):
+                self.synced = False
+                self.dropped_deltas += 1
+                return True
+            self.deltas += 1
+            pos = SAMPLE_HEADER_SIZE
+            for _ in range(count):
+                row = payload[pos]
+                fields = payload[pos + 1]
+                pos += 2
+                flags = unit_1 = unit_2 = value_1 = value_2 = 0
+                if fields & FIELD_FLAGS:
+                    flags = payload[pos]
+                    pos += 1
+                if fields & FIELD_UNITS:
+                    unit_1 = payload[pos]
+                    unit_2 = payload[pos + 1]
+                    pos += 2
+                if fields & FIELD_VALUE_1:
+                    value_1 = self._int16(pos)
+                    pos += 2
+                if fields & FIELD_VALUE_2:
+                    value_2 = self._int16(pos)
+                    pos += 2
+                self.on_record(row, fields, flags, unit_1, unit_2, value_1, value_2)
+            return True
+        return False
+
+    def _delta_length_ok(self, count: int, length: int) -> bool:
+        # check the whole frame before applying anything, a delta is applied completely or not at all
+        payload = self.payload
+        pos = SAMPLE_HEADER_SIZE
+        for _ in range(count):
+            if pos + 2 > length:
+                return False
+            fields = payload[pos + 1]
+            pos += 2
+            if fields & FIELD_FLAGS:
+                pos += 1
+            if fields & FIELD_UNITS:
+                pos += 2
+            if fields & FIELD_VALUE_1:
+                pos += 2
+            if fields & FIELD_VALUE_2:
+                pos += 2
+        return pos == length
+
+    def _int16(self, pos: int) -> int:
+        value = self.payload[pos] | (self.payload[pos + 1] << 8)
+        if value & 0x8000:
+            value -= 0x10000
+        return value
+
+
+class DeltaEncoder:
+    """Host side: decides per sample what has to be sent.
+
+    Every `keyframe_interval` samples a full keyframe goes out, in between only delta frames
+    with the fields that changed. A value only counts as changed if it moved by at least the
+    deadband of its cell compared to what the pico currently shows, so noise does not cost
+    bandwidth or redraws. Flag and unit changes are always sent.
+    """
+
+    def __init__(self, keyframe_interval: int = 50, deadbands=None):
+        """
+        Args:
+            keyframe_interval (int, optional): Send a keyframe every n samples. Defaults to 50.
+            deadbands (optional): dict of row -> (deadband_1, deadband_2). Rows not in there use 1 (every change).
+        """
+        self.keyframe_interval = keyframe_interval
+        self.deadbands = deadbands if deadbands else {}
+        self.seq = 0
+        self._since_keyframe = -1
+        # row -> [flags, unit_1, unit_2, value_1, value_2] as the pico has it
+        self._sent = {}
+
+    def force_keyframe(self):
+        self._since_keyframe = -1
+
+    def encode(self, records):
+        """Encode one sample.
+
+        Args:
+            records: Iterable of (row, flags, unit_1, unit_2, value_1, value_2) tuples, all rows
+
+        Returns:
+            Optional[bytes]: A frame to send or None if nothing changed enough
+        """
+        records = list(records)
+        if (
+            self._since_keyframe < 0
+            or self._since_keyframe + 1 >= self.keyframe_interval
+        ):
+            self._since_keyframe = 0
+            for row, flags, unit_1, unit_2, value_1, value_2 in records:
+                self._sent[row] = [flags, unit_1, unit_2, value_1, value_2]
+            return self._next(encode_sample(self.seq, records))
+        self._since_keyframe += 1
+        changes = []
+        for row, flags, unit_1, unit_2, value_1, value_2 in records:
+            sent = self._sent.get(row)
+            if sent is None:
+                # a row the last keyframe did not have
+                sent = self._sent[row] = [None, None, None, None, None]
+                fields = FIELD_ALL
+            else:
+                fields = 0
+                if flags != sent[0]:
+                    fields |= FIELD_FLAGS
+                if unit_1 != sent[1] or unit_2 != sent[2]:
+                    # the pico clears the values with a new unit
+                    fields |= FIELD_UNITS | FIELD_VALUE_1 | FIELD_VALUE_2
+                deadband_1, deadband_2 = self.deadbands.get(row, (1, 1))
+                blank_changed = (flags ^ sent[0]) if sent[0] is not None else 0
+                if not flags & FLAG_BLANK_1 and (
+                    blank_changed & FLAG_BLANK_1 or abs(value_1 - sent[3]) >= deadband_1
+                ):
+                    fields |= FIELD_VALUE_1
+                if not flags & FLAG_BLANK_2 and (
+                    blank_changed & FLAG_BLANK_2 or abs(value_2 - sent[4]) >= deadband_2
+                ):
+                    fields |= FIELD_VALUE_2
+            if not fields:
+                continue
+            if fields & FIELD_FLAGS:
+                sent[0] = flags
+            if fields & FIELD_UNITS:
+                sent[1] = unit_1
+                sent[2] = unit_2
+            if fields & FIELD_VALUE_1:
+                sent[3] = value_1
+            if fields & FIELD_VALUE_2:
+                sent[4] = value_2
+            changes.append((row, fields, flags, unit_1, unit_2, value_1, value_2))
+        if not changes:
+            return None
+        return self._next(encode_delta(self.seq, changes))
+
+    def _next(self, frame: bytes) -> bytes:
+        self.seq = (self.seq + 1) & 0xFF
+        return frame
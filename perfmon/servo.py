@@ -0,0 +1,245 @@
+"""Hobby servos on PWM pins.
+
+`Servo.write()` jumps to an angle, `ServoGroup` sweeps any number of servos at once along an
+easing curve, from a single uasyncio task that updates all of them every PWM period.
+"""
+
+from machine import Pin, PWM
+import utime
+import uasyncio
+import array
+from micropython import const
+
+try:
+    from typing import Optional, Tuple
+except ImportError:
+    # only for the type checker, MicroPython does not evaluate annotations
+    pass
+
+# Easing curves are tables of _EASE_STEPS + 1 points, progress 0.._EASE_ONE over the time of a sweep
+_EASE_STEPS = const(64)
+_EASE_ONE = const(1024)
+
+
+def _ease_table(curve) -> array.array:
+    return array.array(
+        "H", (round(curve(i / _EASE_STEPS) * _EASE_ONE) for i in range(_EASE_STEPS + 1))
+    )
+
+
+LINEAR = _ease_table(lambda t: t)
+EASE_IN = _ease_table(lambda t: t * t)
+EASE_OUT = _ease_table(lambda t: t * (2 - t))
+# smoothstep, starts and stops gently
+EASE_IN_OUT = _ease_table(lambda t: t * t * (3 - 2 * t))
+
+
+class Servo:
+    """Hobby servo on a PWM pin.
+
+    The pulse width of every whole degree from `min_deg` to `max_deg` is computed once into
+    `duty_ns` (an `array('I')`, 4 bytes per degree), positioning is a lookup in it. Angles
+    outside the range are clamped.
+    """
+
+    def __init__(
+        self,
+        pin_id: int,
+        min_us: int = 544,
+        max_us: int = 2400,
+        min_deg: int = 0,
+        max_deg: int = 180,
+        freq: int = 50,
+    ):
+        """
+        Args:
+            pin_id (int): board gpio connected to the signal wire of the servo
+            min_us (int, optional): Pulse width at `min_deg`. Defaults to 544.
+            max_us (int, optional): Pulse width at `max_deg`. Defaults to 2400.
+            min_deg (int, optional): Smallest angle. Defaults to 0.
+            max_deg (int, optional): Largest angle. Defaults to 180.
+            freq (int, optional): PWM frequency. Defaults to 50.
+        """
+        span = max_deg - min_deg
+        if span == 0:
+            raise ValueError("min_deg and max_deg are both {}".format(min_deg))
+        if span < 0:
+            raise ValueError("max_deg {} is below min_deg {}".format(max_deg, min_deg))
+        self.pwm = PWM(Pin(pin_id))
+        self.pwm.freq(freq)
+        self.min_deg = min_deg
+        self.max_deg = max_deg
+        self.duty_ns = array.array(
+            "I",
+            (
+                min_us * 1000 + (max_us - min_us) * 1000 * i // span
+                for i in range(span + 1)
+            ),
+        )
+        # last angle written, None before the first `write()` and after `write_us()`/`off()`
+        self.angle: Optional[int] = None
+        # sweep state, set by `ServoGroup.move()`
+        self.moving = False
+        self._from = 0
+        self._to = 0
+        self._start_ms = 0
+        self._duration_ms = 0
+        self._ease = LINEAR
+
+    def clamp(self, deg: int) -> int:
+        if deg < self.min_deg:
+            return self.min_deg
+        if deg > self.max_deg:
+            return self.max_deg
+        return deg
+
+    def _set(self, deg: int):
+        self.angle = deg
+        self.pwm.duty_ns(self.duty_ns[deg - self.min_deg])
+
+    def write(self, deg: int):
+        """Move to `deg` right away, ends a sweep of this servo"""
+        self.moving = False
+        self._set(self.clamp(round(deg)))
+
+    def read(self) -> Optional[int]:
+        return self.angle
+
+    def write_us(self, us: int):
+        """Send a raw pulse width, e.g. to find `min_us`/`max_us` of a servo"""
+        self.moving = False
+        self.angle = None
+        self.pwm.duty_ns(us * 1000)
+
+    def read_us(self) -> int:
+        return self.pwm.duty_ns() // 1000
+
+    def off(self):
+        """Stop the pulses, the servo goes limp"""
+        self.moving = False
+        self.angle = None
+        self.pwm.duty_ns(0)
+
+
+class ServoGroup:
+    """Sweeps servos to new angles along an easing curve, all of them from one uasyncio task.
+
+    `move()` only stores start, target, start time and duration in the servo and wakes `run()`.
+    Every `period_ms` (one PWM period by default) the task calls `update()`, a single pass over
+    the moving servos: the time into the sweep picks a point on the curve table, the angle is
+    interpolated with integers and its pulse width comes from the table of the servo. There is
+    no float math and no allocation per update, the display task keeps running in between.
+    `update()` can also be called from elsewhere, e.g. scheduled by a `Timer`.
+
+    Sweeps up to 60 s keep the interpolation in small ints.
+    """
+
+    def __init__(self, servos: Tuple[Servo, ...], period_ms: int = 20):
+        """
+        Args:
+            servos (Tuple[Servo, ...]): The servos to drive
+            period_ms (int, optional): Time between two updates. Defaults to 20 (one period at 50 Hz).
+        """
+        self.servos = servos
+        self.period_ms = period_ms
+        self._event = uasyncio.Event()
+        self._idle = uasyncio.Event()
+        self._idle.set()
+        self.updates: int = 0
+        self.max_update_us: int = 0
+
+    def _start(self, servo: Servo, deg: int, duration_ms: int, ease, now: int):
+        deg = servo.clamp(round(deg))
+        if servo.angle is None or duration_ms <= 0:
+            # nowhere to sweep from
+            servo.write(deg)
+            return
+        servo._from = servo.angle
+        servo._to = deg
+        servo._start_ms = now
+        servo._duration_ms = duration_ms
+        servo._ease = ease
+        servo.moving = True
+        self._idle.clear()
+        self._event.set()
+
+    def move(
+        self, servo: Servo, deg: int, duration_ms: int, ease: array.array = EASE_IN_OUT
+    ):
+        """Sweep `servo` from its current angle to `deg` in `duration_ms`. A servo that has no
+        angle yet (see `Servo.angle`) jumps there.
+
+        Args:
+            servo (Servo): One of `servos`
+            deg (int): Target angle
+            duration_ms (int): Duration of the sweep
+            ease (array, optional): `LINEAR`, `EASE_IN`, `EASE_OUT` or `EASE_IN_OUT`. Defaults to EASE_IN_OUT.
+        """
+        self._start(servo, deg, duration_ms, ease, utime.ticks_ms())
+
+    def move_all(
+        self,
+        degs: Tuple[int, ...],
+        duration_ms: int,
+        ease: array.array = EASE_IN_OUT,
+    ):
+        """Sweep every servo to its angle in `degs`, they start and arrive together"""
+        now = utime.ticks_ms()
+        for servo, deg in zip(self.servos, degs):
+            self._start(servo, deg, duration_ms, ease, now)
+
+    @property
+    def busy(self) -> bool:
+        return not self._idle.is_set()
+
+    def update(self) -> bool:
+        """Set every moving servo to where it should be now.
+
+        Returns:
+            bool: True while any servo is still moving
+        """
+        now = utime.ticks_ms()
+        moving = False
+        for servo in self.servos:
+            if not servo.moving:
+                continue
+            elapsed = utime.ticks_diff(now, servo._start_ms)
+            if elapsed >= servo._duration_ms:
+                servo.moving = False
+                servo._set(servo._to)
+                continue
+            # position on the curve in 1/256 of a table step
+            position = elapsed * (_EASE_STEPS << 8) // servo._duration_ms
+            i = position >> 8
+            ease = servo._ease
+            low = ease[i]
+            eased = low + (((ease[i + 1] - low) * (position & 0xFF)) >> 8)
+            deg = servo._from + (servo._to - servo._from) * eased // _EASE_ONE
+            if deg != servo.angle:
+                servo._set(deg)
+            moving = True
+        return moving
+
+    async def run(self):
+        """Update the servos every `period_ms` while any moves, sleep otherwise, forever"""
+        while True:
+            await self._event.wait()
+            self._event.clear()
+            next_update = utime.ticks_ms()
+            while True:
+                start = utime.ticks_us()
+                moving = self.update()
+                took = utime.ticks_diff(utime.ticks_us(), start)
+                self.updates += 1
+                if took > self.max_update_us:
+                    self.max_update_us = took
+                if not moving:
+                    break
+                next_update = utime.ticks_add(next_update, self.period_ms)
+                wait = utime.ticks_diff(next_update, utime.ticks_ms())
+                await uasyncio.sleep_ms(wait if wait > 0 else 0)
+            self._idle.set()
+
+    async def wait(self):
+        """Until all sweeps are done"""
+        await self._idle.wait()
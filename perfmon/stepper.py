@@ -0,0 +1,1760 @@
+"""DRV8825 stepper driver with blocking, timer, async, queued and PIO step engines, and
+`MultiAxisStepper` for coordinated moves.
+
+Nothing here touches the hardware at import, the pins are passed to the motor. The PIO engine
+(`perfmon.pio`) is only loaded by `DRV8825StepperMotor.use_pio()`.
+"""
+
+from machine import Pin, Timer, idle, disable_irq, enable_irq
+import utime
+from utime import sleep_us
+import uasyncio
+import micropython
+from micropython import const
+import array
+
+try:
+    from typing import Tuple, Literal, Callable, Awaitable, Optional, Dict, Any
+except ImportError:
+    # only for the type checker, MicroPython does not evaluate annotations
+    pass
+
+# Span tracing, see `perfmon.trace`
+_TRACE = const(0)
+if _TRACE:
+    from perfmon.trace import tracer, SPAN_STEP_ISR, SPAN_QUEUE_ISR
+
+
+class StepRamp:
+    """Acceleration/deceleration profile as a table of step intervals.
+
+    `intervals` holds the time in us between the steps of the acceleration phase,
+    from standing still to `max_steps_per_s`. The table is an `array('H')` (2 bytes per step of
+    the ramp, `steps = max_speed² / (2 * acceleration)`), computed once and used for every move:
+    deceleration is the same table read backwards and steps between the two phases use
+    `cruise_us`. Moves too short to reach full speed use a shorter ramp up and down.
+
+    TRAPEZOID accelerates with constant acceleration, the intervals come from
+    D. Austin's recurrence `c_n = c_(n-1) - 2 * c_(n-1) / (4n + 1)` ("Generate stepper-motor
+    speed profiles in real time", 2005). S_CURVE follows a smoothstep velocity curve, the
+    acceleration ramps up and down (limited jerk), the peak acceleration is `acceleration`.
+    """
+
+    TRAPEZOID = "trapezoid"
+    S_CURVE = "s-curve"
+
+    # longest interval that fits the table
+    MAX_INTERVAL_US = 0xFFFF
+
+    def __init__(
+        self,
+        max_steps_per_s: float,
+        acceleration_steps_per_s2: float,
+        profile: str = TRAPEZOID,
+    ):
+        """
+        Args:
+            max_steps_per_s (float): Cruise speed in (micro)steps per second
+            acceleration_steps_per_s2 (float): Acceleration in (micro)steps per second²
+            profile (str, optional): `StepRamp.TRAPEZOID` or `StepRamp.S_CURVE`. Defaults to TRAPEZOID.
+        """
+        if max_steps_per_s <= 0 or acceleration_steps_per_s2 <= 0:
+            raise ValueError("Speed and acceleration must be positive")
+        self.profile = profile
+        self.cruise_us = max(int(1_000_000 / max_steps_per_s), 1)
+        self.intervals = array.array("H")
+        if profile == StepRamp.TRAPEZOID:
+            self._austin(acceleration_steps_per_s2)
+        elif profile == StepRamp.S_CURVE:
+            self._s_curve(max_steps_per_s, acceleration_steps_per_s2)
+        else:
+            raise ValueError("Unknown ramp profile {}".format(profile))
+
+    def _austin(self, acceleration: float):
+        # first interval with Austin's 0.676 correction of the first step
+        c = 0.676 * (2 / acceleration) ** 0.5 * 1_000_000
+        n = 0
+        while c > self.cruise_us:
+            self.intervals.append(min(int(c), self.MAX_INTERVAL_US))
+            n += 1
+            c = c - 2 * c / (4 * n + 1)
+
+    def _s_curve(self, max_steps_per_s: float, acceleration: float):
+        # v(t) = v_max * (3u² - 2u³), u = t / T. Its peak acceleration is 1.5 * v_max / T.
+        duration = 1.5 * max_steps_per_s / acceleration
+        total = max_steps_per_s * duration / 2
+
+        def position(t: float) -> float:
+            u = t / duration
+            return max_steps_per_s * duration * (u * u * u - u * u * u * u / 2)
+
+        def velocity(t: float) -> float:
+            u = t / duration
+            return max_steps_per_s * (3 * u * u - 2 * u * u * u)
+
+        last = 0.0
+        t = 0.0
+        step = 1
+        while step < total:
+            # the time of step `step` by bisection on the monotonic position curve. A fixed
+            # number of halvings: 24 reach the resolution of a single precision float (the
+            # device has no doubles), an absolute tolerance may never be met at t >= 1 s.
+            low, high = t, duration
+            for _ in range(24):
+                middle = (low + high) / 2
+                if position(middle) < step:
+                    low = middle
+                else:
+                    high = middle
+            t = high
+            interval = int((t - last) * 1_000_000)
+            if interval <= self.cruise_us and velocity(t) >= max_steps_per_s * 0.999:
+                break
+            self.intervals.append(
+                min(max(interval, self.cruise_us), self.MAX_INTERVAL_US)
+            )
+            last = t
+            step += 1
+
+    def interval_us(self, step: int, total: int = -1) -> int:
+        """Time before step `step` (0 based) of a move of `total` steps, -1 for an open end (no deceleration)"""
+        index = step
+        if total >= 0:
+            to_end = total - 1 - step
+            if to_end < index:
+                index = to_end
+        if index < len(self.intervals):
+            return self.intervals[index]
+        return self.cruise_us
+
+    def half_period_us(self, pulse: int, total_pulses: int = -1) -> int:
+        """Time before STEP pin toggle `pulse`. Every step is two toggles, each gets half of its interval."""
+        interval = self.interval_us(
+            pulse >> 1, total_pulses >> 1 if total_pulses >= 0 else -1
+        )
+        half = interval >> 1
+        return half if not pulse & 1 else interval - half
+
+
+class StepCalibration:
+    """Correction of the pulse delay per stepping mode and engine, in us per edge.
+
+    The engines don't hit the nominal delay exactly: the blocking one pays the interpreter
+    overhead of `sleep_us()` and the pin toggle on every edge, the Timer one runs on whole
+    microseconds. `DRV8825StepperMotor.calibrate()` measures the real time per edge with
+    `ticks_us` and stores the difference here, it can be saved to flash as JSON.
+    """
+
+    ENGINES = ("blocking", "timer", "async")
+
+    def __init__(self, offsets_us: Optional[Dict[str, Dict[str, float]]] = None):
+        # mode name -> engine -> us to add to the delay of every edge
+        self.offsets_us: Dict[str, Dict[str, float]] = offsets_us or {}
+
+    def offset_us(self, mode_name: str, engine: str) -> float:
+        return self.offsets_us.get(mode_name, {}).get(engine, 0)
+
+    def set(self, mode_name: str, engine: str, offset_us: float):
+        if mode_name not in self.offsets_us:
+            self.offsets_us[mode_name] = {}
+        self.offsets_us[mode_name][engine] = offset_us
+
+    def save(self, path: str):
+        import json
+
+        with open(path, "w") as f:
+            json.dump(self.offsets_us, f)
+
+    @classmethod
+    def load(cls, path: str) -> "StepCalibration":
+        """Load a saved calibration, an empty one if there is none"""
+        try:
+            with open(path) as f:
+                import json
+
+                return cls(json.load(f))
+        except (OSError, ValueError):
+            return cls()
+
+
+class StepTelemetry:
+    """Opt-in histogram of how evenly the STEP edges come out, see
+    `DRV8825StepperMotor.enable_telemetry()`.
+
+    For every edge the engine records the deviation of the time since the last edge from the
+    interval it asked for, into `bins` fixed bins of `bin_us` centered on 0 (the first and last
+    bin also take everything beyond). Counts saturate at 0xFFFF. `record()` runs in the timer
+    ISR, so it only does small int math and writes into the preallocated `array`.
+    """
+
+    def __init__(self, bins: int = 32, bin_us: int = 4, late_us: int = 50):
+        """
+        Args:
+            bins (int, optional): Amount of bins. Defaults to 32.
+            bin_us (int, optional): Width of a bin. Defaults to 4.
+            late_us (int, optional): Edges later than this count as late. Defaults to 50.
+        """
+        self.bin_us = bin_us
+        self.late_us = late_us
+        self.bins = array.array("H", bytes(2 * bins))
+        self._half = bins >> 1
+        self.reset()
+
+    def reset(self):
+        for index in range(len(self.bins)):
+            self.bins[index] = 0
+        self.min_us = 1 << 29
+        self.max_us = -(1 << 29)
+        self.late = 0
+        self._last_us = -1
+
+    def start(self):
+        """A move starts, the time since the last move is not an interval"""
+        self._last_us = -1
+
+    @micropython.native
+    def record(self, expected_us: int):
+        now = utime.ticks_us()
+        last = self._last_us
+        self._last_us = now
+        if last < 0:
+            return
+        deviation = utime.ticks_diff(now, last) - expected_us
+        if deviation < self.min_us:
+            self.min_us = deviation
+        if deviation > self.max_us:
+            self.max_us = deviation
+        if deviation > self.late_us:
+            self.late += 1
+        bins = self.bins
+        index = self._half + deviation // self.bin_us
+        if index < 0:
+            index = 0
+        elif index >= len(bins):
+            index = len(bins) - 1
+        count = bins[index]
+        if count < 0xFFFF:
+            bins[index] = count + 1
+
+    def dump(self):
+        """Print the histogram over the serial console, one line per non empty bin"""
+        edges = sum(self.bins)
+        if not edges:
+            print("step jitter: no edges recorded")
+            return
+        print(
+            "step jitter: {} edges, min {:+d} us, max {:+d} us, {} late (> {} us)".format(
+                edges, self.min_us, self.max_us, self.late, self.late_us
+            )
+        )
+        last = len(self.bins) - 1
+        for index, count in enumerate(self.bins):
+            if count:
+                low = (index - self._half) * self.bin_us
+                print(
+                    "{}{:+6d} us {:>6}".format(
+                        "<=" if index == 0 else ">=" if index == last else "  ",
+                        low + self.bin_us if index == 0 else low,
+                        count,
+                    )
+                )
+
+
+# Slots of the counter array shared by the timer ISR and `NonBlockResult`
+_PULSES_REMAINING = const(0)  # -1 while a `keep_running_check_callback` decides
+_PULSES_DONE = const(1)
+
+# Delays per edge are kept in 1/256 us, the engines spread the fraction over the edges
+_FRAC_BITS = const(8)
+_FRAC_MASK = const(0xFF)
+
+
+def _fixed_us(delay_us: float, minimum_us: int = 0) -> int:
+    """`delay_us` in 1/256 us, at least `minimum_us`"""
+    return max(minimum_us << _FRAC_BITS, round(delay_us * (1 << _FRAC_BITS)))
+
+
+@micropython.native
+def _edge_us(delay_fixed: int, edge: int) -> int:
+    """Whole us before STEP pin edge `edge` for a delay in 1/256 us. The fraction is spread
+    evenly, 19.5 us alternates 19 and 20 us, and any 256 edges in a row add up exactly.
+    """
+    frac = delay_fixed & _FRAC_MASK
+    edge &= _FRAC_MASK
+    return (
+        (delay_fixed >> _FRAC_BITS)
+        + ((edge + 1) * frac >> _FRAC_BITS)
+        - (edge * frac >> _FRAC_BITS)
+    )
+
+
+class MoveQueue:
+    """Fixed capacity queue of moves for `DRV8825StepperMotor.queue_steps()`.
+
+    Each move is 4 int32 in a preallocated `array`: pulses, direction (0/1 or `KEEP_DIRECTION`),
+    pulse half period in 1/256 us and whether it ends a sequence, so the timer ISR pops without
+    allocating. Lock-free single
+    producer / single consumer like `RecordRing`: only `push()` writes `head`, only the ISR
+    writes `tail`.
+    """
+
+    SLOT = 4
+    KEEP_DIRECTION = -1
+
+    def __init__(self, capacity: int = 16):
+        self.capacity = capacity
+        # one slot stays free to tell a full ring from an empty one
+        self._size = capacity + 1
+        self._slots = array.array("i", bytes(4 * self.SLOT * self._size))
+        self.head: int = 0
+        self.tail: int = 0
+        # state of the move the ISR is running, only written by the ISR
+        self.running = False
+        self.remaining: int = 0
+        # half period of the running move in 1/256 us, and the whole us to the next edge
+        self.interval_fixed: int = 0
+        self.interval_us: int = 0
+        # the timer runs periodic at `interval_us`, otherwise one shot per edge until `due_us`
+        self.periodic = False
+        self.due_us: int = 0
+        # the running move was queued with `last=True`
+        self.last: bool = False
+        # how often the queue ran dry after a move that was not the last of its sequence,
+        # the motor stopped while more moves were expected
+        self.underruns: int = 0
+        # how often the queue ran dry after a move queued with `last=True`
+        self.sequences: int = 0
+
+    @property
+    def depth(self) -> int:
+        """Moves waiting, without the running one"""
+        depth = self.head - self.tail
+        return depth + self._size if depth < 0 else depth
+
+    def push(
+        self, pulses: int, direction: int, interval_fixed: int, last: bool
+    ) -> bool:
+        """Producer side.
+
+        Returns:
+            bool: False if the queue is full
+        """
+        head = self.head
+        next_head = head + 1
+        if next_head == self._size:
+            next_head = 0
+        if next_head == self.tail:
+            return False
+        slots = self._slots
+        i = head * self.SLOT
+        slots[i] = pulses
+        slots[i + 1] = direction
+        slots[i + 2] = interval_fixed
+        slots[i + 3] = last
+        self.head = next_head
+        return True
+
+    def next_interval_fixed(self) -> int:
+        return self._slots[self.tail * self.SLOT + 2]
+
+
+class DRV8825StepperMotor:
+    # https://www.studiopieters.nl/drv8825-pinout/
+    HIGH = True
+    LOW = False
+
+    class DRV8825SteppingMode:
+        def __init__(
+            self,
+            name: str,
+            mode_setting: Tuple[bool, bool, bool],
+            microsteps: Literal[1, 2, 4, 8, 16, 32],
+        ):
+            self.name = name
+            self.mode_setting = mode_setting
+            self.microsteps = microsteps
+
+    MODE_FULL = DRV8825SteppingMode("FULL", (LOW, LOW, LOW), 1)
+    MODE_HALF = DRV8825SteppingMode("HALF", (HIGH, LOW, LOW), 2)
+    MODE_QUARTER = DRV8825SteppingMode("QUARTER", (LOW, HIGH, LOW), 4)
+    MODE_ONE_8 = DRV8825SteppingMode("1/8", (HIGH, HIGH, LOW), 8)
+    MODE_ONE_16 = DRV8825SteppingMode("1/16", (LOW, LOW, HIGH), 16)
+    MODE_ONE_32 = DRV8825SteppingMode("1/32", (HIGH, LOW, HIGH), 32)
+
+    # Async moves with shorter pulses than this run on the Timer engine. uasyncio only sleeps in
+    # ms, the deadline path waits the rest of every pulse blocking, at 2 ms at most half of it.
+    ASYNC_TIMER_THRESHOLD_US = 2000
+    # Moves `queue_steps()` can hold besides the running one
+    MOVE_QUEUE_CAPACITY = 16
+    # `position` counts in steps of the finest mode, so it stays valid when the mode changes
+    POSITION_MICROSTEPS = 32
+    # written by `calibrate(persist=True)`, loaded on init
+    CALIBRATION_FILE = "step_calibration.json"
+    # `home_async()` ramps with this if no ramp is set
+    HOMING_ACCELERATION_REV_PER_S2 = 4
+
+    class NonBlockResult:
+        """State of a move that runs in the background. Can be awaited in a coroutine
+        (`await m.rotate_non_blocking(1)` returns the result when the move is done) or waited
+        for with `wait()`.
+        """
+
+        def __init__(self):
+            self.done = False
+            # written by the timer ISR, see `_PULSES_REMAINING`/`_PULSES_DONE`
+            self.counters = array.array("i", (0, 0))
+            self._start_tick_ms: Optional[float] = None
+            self._finish_tick_ms: Optional[float] = None
+            self.callback_result: Any = None
+            self._flag = uasyncio.ThreadSafeFlag()
+
+        def _finish(
+            self,
+            callback: Optional[
+                Callable[["DRV8825StepperMotor.NonBlockResult"], Any]
+            ] = None,
+        ):
+            # never called from a hard IRQ: the engines defer it with `micropython.schedule()`
+            self._finish_tick_ms = utime.ticks_ms()
+            self.done = True
+            if callback:
+                self.callback_result = callback(self)
+            self._flag.set()
+
+        def __iter__(self):
+            while not self.done:
+                yield from self._flag.wait()
+            return self
+
+        __await__ = __iter__
+
+        def wait(self, timeout_ms: Optional[int] = None) -> bool:
+            """Block until the move is done.
+
+            Args:
+                timeout_ms (Optional[int], optional): Give up after this time. Defaults to None (wait forever).
+
+            Returns:
+                bool: True if the move is done, False on timeout
+            """
+            start = utime.ticks_ms()
+            while not self.done:
+                if (
+                    timeout_ms is not None
+                    and utime.ticks_diff(utime.ticks_ms(), start) >= timeout_ms
+                ):
+                    return False
+                # sleeps until the next interrupt, the scheduled finish runs in between
+                idle()
+            return True
+
+        def get_run_time_ms(self) -> float:
+            if self._start_tick_ms is None:
+                raise ValueError("Non blocking function not yet started.")
+            if self._finish_tick_ms is None:
+                return utime.ticks_diff(utime.ticks_ms(), self._start_tick_ms)
+            return utime.ticks_diff(self._finish_tick_ms, self._start_tick_ms)
+
+        @property
+        def pulses_done(self) -> int:
+            return self.counters[_PULSES_DONE]
+
+        @pulses_done.setter
+        def pulses_done(self, value: int):
+            self.counters[_PULSES_DONE] = value
+
+        def get_steps_done(self) -> float:
+            return self.pulses_done / 2
+
+    class NonBlockTimerContainer:
+
+        def __init__(
+            self,
+            timer: Timer,
+            target_steps: Optional[int] = None,
+            keep_running_check_callback: Optional[Callable[[], bool]] = None,
+            finished_callback: Optional[
+                Optional[
+                    Callable[
+                        ["DRV8825StepperMotor.NonBlockResult"],
+                        "DRV8825StepperMotor.NonBlockResult",
+                    ]
+                ]
+            ] = None,
+        ):
+            if target_steps and keep_running_check_callback:
+                raise ValueError(
+                    f"Either set 'target_steps' or 'keep_running_check_callback', not both."
+                )
+            elif not target_steps and not keep_running_check_callback:
+                raise ValueError(
+                    f"Either set 'target_steps' or 'keep_running_check_callback'."
+                )
+            self.timer = timer
+            self.keep_running_check_callback = keep_running_check_callback
+            self.finished_callback = finished_callback
+            self.result = DRV8825StepperMotor.NonBlockResult()
+            # pulses of the whole move, -1 while `keep_running_check_callback` decides
+            self.total_pulses = target_steps if target_steps else -1
+            self.result.counters[_PULSES_REMAINING] = self.total_pulses
+
+        def finish(self) -> "DRV8825StepperMotor.NonBlockResult":
+            self.timer.deinit()
+            self.result._finish(self.finished_callback)
+            return self.result
+
+    def __init__(
+        self,
+        step_pin: Pin,
+        direction_pin: Optional[Pin] = None,
+        reset_pin: Optional[Pin] = None,
+        sleep_pin: Optional[Pin] = None,
+        enable_pin: Optional[Pin] = None,
+        mode_pins: Optional[Tuple[Pin, Pin, Pin]] = None,
+        fault_pin: Optional[Pin] = None,
+        mode: DRV8825SteppingMode = MODE_FULL,
+        full_steps_for_one_revolution: int = 200,
+        target_time_for_one_revolution_ms: float = 500,
+        skip_motor_init: bool = False,
+    ):
+        """Init function for DRV8825StepperMotor
+
+        Args:
+            step_pin (Pin): board gpio that connect to the drv8825 STP pin
+            direction_pin (Optional[Pin], optional): board gpio that connect to the drv8825 DIR pin. Defaults to None.
+            reset_pin (Optional[Pin], optional): board gpio that connect to the drv8825 RST pin. Defaults to None.
+            sleep_pin (Optional[Pin], optional): board gpio that connect to the drv8825 SLP pin. Defaults to None.
+            enable_pin (Optional[Pin], optional): board gpio that connect to the drv8825 EN pin. Defaults to None.
+            mode_pins (Optional[Tuple[Pin, Pin, Pin]], optional): Tuple of board gpio pins that connect to the drv8225s M0, M1, M2 pin. Defaults to None.
+            fault_pin (Optional[Pin], optional): board gpio that connect to the drv8825 FLT pin. Defaults to None.
+            mode (Optional[DRV8825SteppingMode], optional): Microstepping mode defined in class `DRV8825Modes`. Defaults to DRV8825Modes.FULL
+            full_steps_for_one_revolution (Optional[int], optional): Amount of steps needed for a fill revolution in FULL step mode. Depends on the motor you are using. Look up in the specs. Defaults to 200.. Defaults to 200.
+            target_time_for_one_revolution_ms (Optional[float], optional): Translates into speed. We try to match the target time but can not guarante it. Defaults to 500.. Defaults to 500.
+            skip_motor_init (Optional[bool], optional): if set to true and the respective pins are provided the motor will be enabled, un-reseted, un-sleeped and the stepper mode will be set. If set to False you need to prepare the motor yourself.
+        """
+        self.step_pin = step_pin
+        self.direction_pin = direction_pin
+        self.reset_pin = reset_pin
+        self.sleep_pin = sleep_pin
+        self.enable_pin = enable_pin
+        self.mode_pins = mode_pins
+        self.fault_pin = fault_pin
+        self.full_steps_for_one_revolution = full_steps_for_one_revolution
+        self.target_time_for_one_revolution_ms = target_time_for_one_revolution_ms
+        self.mode = mode
+
+        self.pulse_delay_us: int = 0
+        self.steps_for_one_revolution = 0
+        # delay per edge of each engine in 1/256 us, the exact pulse delay corrected by `calibration`
+        self.calibration = StepCalibration.load(self.CALIBRATION_FILE)
+        self._blocking_delay_fixed = 0
+        self._timer_period_fixed = 1 << _FRAC_BITS
+        self._async_delay_fixed = 0
+        # time per step of the PIO engine, which counts state machine cycles and needs no calibration
+        self._pio_interval_ns = 0
+        # Acceleration profile, see `set_ramp()`. None steps at `pulse_delay_us` from the first pulse.
+        self.ramp: Optional[StepRamp] = None
+        self.acceleration_rev_per_s2: Optional[float] = None
+        self.ramp_profile = StepRamp.TRAPEZOID
+        # see `position`, every step adds `_step_increment`: the unit of the mode, signed by DIR
+        self._position = 0
+        self._step_unit = self.POSITION_MICROSTEPS // mode.microsteps
+        self._step_increment = (
+            -self._step_unit
+            if direction_pin is not None and not direction_pin.value()
+            else self._step_unit
+        )
+
+        if not skip_motor_init:
+            self._init_motor()
+        self._timer_container: Optional[DRV8825StepperMotor.NonBlockTimerContainer] = (
+            None
+        )
+        # Creating a bound method allocates, so the ones the timer ISR needs are created once here
+        self._timer_callback = self._step_non_blocking_timer_callback
+        self._finish_callback = self._finish_non_blocking
+        self._toggle = self.step_pin.toggle
+        # set by `use_pio()`
+        self._pio: Optional["PioStepEngine"] = None
+        # move of the `MultiAxisStepper` this motor is an axis of, set by `MultiAxisStepper.move()`
+        self._group_result: Optional[DRV8825StepperMotor.NonBlockResult] = None
+        # stops the Timer engine under `rotate_while_async()`
+        self._async_keep_running = False
+        # see `queue_steps()`, runs on its own Timer that stays initialized while moves are queued
+        self.moves = MoveQueue(self.MOVE_QUEUE_CAPACITY)
+        self._queue_timer: Optional[Timer] = None
+        self._queue_callback = self._queue_timer_callback
+        self._set_direction = direction_pin.value if direction_pin else None
+        # see `enable_telemetry()`
+        self.telemetry: Optional[StepTelemetry] = None
+        # interval the timer ISR waits for the next edge, for `telemetry`
+        self._period_us = 0
+        # `ticks_us` the next edge is due, while the period alternates (see `_edge_us()`)
+        self._due_us = 0
+        # set by `home_async()`
+        self._endstop: Optional[Pin] = None
+        self._endstop_level = 0
+
+    def _init_motor(self):
+        if self.enable_pin:
+            self.enable()
+        if self.reset_pin:
+            self.reset(False)
+        if self.sleep_pin:
+            self.sleep(False)
+        self.set_mode(self.mode)
+
+    def set_mode(self, mode: DRV8825SteppingMode):
+        """All modes are defined in DRV8825Modes
+
+        Args:
+            res (Tuple[bool, bool, bool]): _description_
+        """
+        self.steps_for_one_revolution = mode.microsteps * (
+            self.full_steps_for_one_revolution
+        )
+
+        # Set the microstepping on the DRV8825 driver
+        if self.mode_pins and len(self.mode_pins) == 3:
+            for index, pin in enumerate(self.mode_pins):
+                pin.value(mode.mode_setting[index])
+        else:
+            print(
+                f"Warning: Microstepping mode set to {mode.name}, but mode pins (M0,M1,M3) were not provided. Make sure mode pins are set otherwise/externaly."
+            )
+        self.mode = mode
+        self._update_pulse_delay()
+        self._step_unit = self.POSITION_MICROSTEPS // mode.microsteps
+        self._step_increment = (
+            self._step_unit if self._step_increment > 0 else -self._step_unit
+        )
+        if self.acceleration_rev_per_s2:
+            self.set_ramp(self.acceleration_rev_per_s2, self.ramp_profile)
+
+    def set_speed(self, target_time_for_one_revolution_ms: float):
+        """Change the speed, see `target_time_for_one_revolution_ms` of `__init__()`. A ramp set
+        with `set_ramp()` is recomputed for the new speed.
+        """
+        self.target_time_for_one_revolution_ms = target_time_for_one_revolution_ms
+        self._update_pulse_delay()
+        if self.acceleration_rev_per_s2:
+            self.set_ramp(self.acceleration_rev_per_s2, self.ramp_profile)
+
+    def _update_pulse_delay(self):
+        # Calcuate pulse delay time (Wait time before triggering the next motor step aka. energizing to next the coil)
+        delay_us = (
+            self.target_time_for_one_revolution_ms
+            * 1000
+            / (self.steps_for_one_revolution * 2)
+        )
+        self.pulse_delay_us = round(delay_us)
+        name = self.mode.name
+        calibration = self.calibration
+        # kept below a us, rounding 19.53 us to 19 would already be 2.7% off
+        self._blocking_delay_fixed = _fixed_us(
+            delay_us + calibration.offset_us(name, "blocking")
+        )
+        self._timer_period_fixed = _fixed_us(
+            delay_us + calibration.offset_us(name, "timer"), 1
+        )
+        self._async_delay_fixed = _fixed_us(
+            delay_us + calibration.offset_us(name, "async")
+        )
+        # a step is two pulses
+        self._pio_interval_ns = round(delay_us * 2000)
+
+    async def calibrate(
+        self,
+        modes: Optional[Tuple[DRV8825SteppingMode, ...]] = None,
+        steps: Optional[int] = None,
+        persist: bool = False,
+    ) -> StepCalibration:
+        """Measure the real time per edge of the blocking, Timer and async engine with `ticks_us`
+        and store the correction per mode in `calibration`. The motor turns while calibrating:
+        `steps` steps per mode and engine. Ramps are off during the measurement and don't use
+        the correction.
+
+        Args:
+            modes (Optional[Tuple[DRV8825SteppingMode, ...]], optional): Modes to calibrate. Defaults to None (all six).
+            steps (Optional[int], optional): Steps per measurement. Defaults to None (1/8 revolution).
+            persist (bool, optional): Save the calibration to `CALIBRATION_FILE`. Defaults to False.
+        """
+        if modes is None:
+            modes = (
+                self.MODE_FULL,
+                self.MODE_HALF,
+                self.MODE_QUARTER,
+                self.MODE_ONE_8,
+                self.MODE_ONE_16,
+                self.MODE_ONE_32,
+            )
+        mode_before = self.mode
+        acceleration = self.acceleration_rev_per_s2
+        self.set_ramp(None, self.ramp_profile)
+        try:
+            for mode in modes:
+                self.set_mode(mode)
+                amount = steps or max(1, self.steps_for_one_revolution // 8)
+                edges = amount * 2
+                target_us = (
+                    self.target_time_for_one_revolution_ms
+                    * 1000
+                    * amount
+                    / self.steps_for_one_revolution
+                )
+                for engine in StepCalibration.ENGINES:
+                    self.calibration.set(mode.name, engine, 0)
+                    self._update_pulse_delay()
+                    start = utime.ticks_us()
+                    if engine == "blocking":
+                        self.steps(amount)
+                    elif engine == "timer":
+                        await self.steps_non_blocking(amount)
+                    else:
+                        await self._steps_deadline_async(edges)
+                    took_us = utime.ticks_diff(utime.ticks_us(), start)
+                    if engine == "timer":
+                        # the ISR notices the end one period after the last edge
+                        took_us -= self._period_us
+                    self.calibration.set(
+                        mode.name, engine, (target_us - took_us) / edges
+                    )
+        finally:
+            self.set_mode(mode_before)
+            self.set_ramp(acceleration, self.ramp_profile)
+        if persist:
+            self.calibration.save(self.CALIBRATION_FILE)
+        return self.calibration
+
+    def set_ramp(
+        self,
+        acceleration_rev_per_s2: Optional[float],
+        profile: str = StepRamp.TRAPEZOID,
+    ):
+        """Accelerate up to the speed given by `target_time_for_one_revolution_ms` and decelerate
+        before the end of a move, instead of stepping at full speed from the first pulse.
+        The `StepRamp` table is computed here, once per speed and stepping mode.
+
+        Args:
+            acceleration_rev_per_s2 (Optional[float]): Acceleration in revolutions per second². None switches ramps off.
+            profile (str, optional): `StepRamp.TRAPEZOID` or `StepRamp.S_CURVE`. Defaults to StepRamp.TRAPEZOID.
+        """
+        self.acceleration_rev_per_s2 = acceleration_rev_per_s2
+        self.ramp_profile = profile
+        if not acceleration_rev_per_s2:
+            self.ramp = None
+            return
+        self.ramp = StepRamp(
+            max_steps_per_s=self.steps_for_one_revolution
+            * 1000
+            / self.target_time_for_one_revolution_ms,
+            acceleration_steps_per_s2=acceleration_rev_per_s2
+            * self.steps_for_one_revolution,
+            profile=profile,
+        )
+
+    def enable(self, enable: bool = True):
+        """Enable or disable the driver"""
+        # from https://lastminuteengineers.com/drv8825-stepper-motor-driver-arduino-tutorial/
+        """EN is an active low input pin.
+        When this pin is pulled LOW, the DRV8825 driver is enabled.
+        By default, this pin is pulled low, so unless you pull it high,
+        the driver is always enabled.
+        This pin is particularly useful when implementing an emergency stop or shutdown system.
+        """
+        if self.enable_pin:
+            self.enable_pin.value(not enable)
+        else:
+            raise ValueError(
+                "Can not switch EN pin. Pin was not provided on instantiation of `DRV8825StepperMotor`."
+            )
+
+    def sleep(self, sleep_: bool = True):
+        """Set the driver in "sleep"-mode (or disable sleep mode)"""
+        # from https://lastminuteengineers.com/drv8825-stepper-motor-driver-arduino-tutorial/
+        """SLP is an active low input pin.
+        Pulling this pin LOW puts the driver into sleep mode,
+        reducing power consumption to a minimum.
+        You can use this to save power, especially when the motor is not in use."""
+        if self.sleep_pin:
+            self.sleep_pin.value(not sleep_)
+        else:
+            raise ValueError(
+                "Can not switch SLP pin. Pin was not provided on instantiation of `DRV8825StepperMotor`."
+            )
+
+    def reset(self, reset: bool = False):
+        """Activate or disable reset mode"""
+        # from https://lastminuteengineers.com/drv8825-stepper-motor-driver-arduino-tutorial/
+        """RST is an active low input as well. 
+        When this pin is pulled LOW, all STEP inputs are ignored. 
+        It also resets the driver by setting the internal translator to a predefined “home” state. 
+        Home state is basically the initial position from which the motor starts, 
+        and it varies based on microstep resolution.
+        """
+        if self.reset_pin:
+            self.reset_pin.value(not reset)
+        else:
+            raise ValueError(
+                "Can not switch RST pin. Pin was not provided on instantiation of `DRV8825StepperMotor`."
+            )
+
+    def direction_clockwise(self, clockwise: Optional[bool] = True):
+        """If set True the motor will turn clockwise. Otherwise counterclockwise
+
+        Args:
+            clockwise (bool, optional): _description_. Defaults to True.
+        """
+        # from https://lastminuteengineers.com/drv8825-stepper-motor-driver-arduino-tutorial/
+        """
+        DIR input controls the spinning direction of the motor. Pulling it HIGH turns the motor clockwise, while pulling it LOW turns it counterclockwise.
+        """
+        if self.direction_pin:
+            self.direction_pin.value(clockwise)
+            self._step_increment = self._step_unit if clockwise else -self._step_unit
+        else:
+            raise ValueError(
+                "Can not switch DIR pin. Pin was not provided on instantiation of `DRV8825StepperMotor`."
+            )
+
+    def is_direction_clockwise(self) -> bool:
+        """Check current set roatation direction of motor
+
+        Raises:
+            ValueError: Fails if DIR pin is not provided
+
+        Returns:
+            bool: _description_
+        """
+        if self.direction_pin:
+            return bool(self.direction_pin.value())
+        else:
+            raise ValueError(
+                "Can determine direction. DIR pin was not provided on instantiation of `DRV8825StepperMotor`."
+            )
+
+    def step(self):
+        """Create a single pulse on the STP pin. A.k.a make one step."""
+        if self._pio is not None:
+            # the PIO owns the pin, the toggle would not reach the driver but count in `position`
+            self._check_no_pio()
+        self.step_pin.toggle()
+        if self.step_pin.value():
+            self._position += self._step_increment
+
+    @property
+    def position(self) -> int:
+        """Shaft position in 1/32 microsteps (`POSITION_MICROSTEPS`), counted by every step
+        engine. Clockwise is positive. Set by `home_async()` or `set_position()`.
+        """
+        return self._position
+
+    def set_position(self, position: int = 0):
+        self._position = position
+
+    def steps(self, amount: int = 1, clockwise: Optional[bool] = None):
+        """Turn the motor one step. This is the most simple method but also a blocking one.
+        It is easy to understand but comes with some caveats:
+            * The speed can vary based the work load of the microcontroller.
+            * You can not do anything else until the motor movement is finished.
+        If you need a non blocking way have a look at DRV8825StepperMotor.steps_non_blocking() and/or DRV8825StepperMotor.steps_async()
+
+        Args:
+            amount (int, optional): _description_. Defaults to 1.
+            clockwise (bool, optional): _description_. Defaults to None.
+        """
+        if clockwise:
+            self.direction_clockwise(clockwise)
+        telemetry = self.telemetry
+        if telemetry is not None:
+            telemetry.start()
+        if self.ramp is not None:
+            pulses = amount * 2
+            for pulse in range(pulses):
+                delay_us = self.ramp.half_period_us(pulse, pulses)
+                sleep_us(delay_us)
+                self.step()
+                if telemetry is not None:
+                    telemetry.record(delay_us)
+            return
+        delay = self._blocking_delay_fixed
+        delay_us = delay >> _FRAC_BITS
+        frac = delay & _FRAC_MASK
+        # the fractions add up and every whole us carried over goes into the next delay
+        carry = 0
+        for i in range(amount * 2):
+            carry += frac
+            sleep_us(delay_us + (carry >> _FRAC_BITS))
+            carry &= _FRAC_MASK
+            self.step()
+            if telemetry is not None:
+                telemetry.record(self.pulse_delay_us)
+
+    def _blocking_step(self, pulse: int) -> int:
+        """One step of an open ended move, returns the next pulse index"""
+        for _ in range(2):
+            if self.ramp is not None:
+                expected_us = delay_us = self.ramp.half_period_us(pulse)
+            else:
+                expected_us = self.pulse_delay_us
+                delay_us = _edge_us(self._blocking_delay_fixed, pulse)
+            sleep_us(delay_us)
+            self.step()
+            if self.telemetry is not None:
+                self.telemetry.record(expected_us)
+            pulse += 1
+        return pulse
+
+    def rotate(
+        self,
+        revolutions: float = 1.0,
+        clockwise: Optional[bool] = None,
+    ):
+        """Turn the motor X revolutions (One revolution -> 360°). Can be a float to turn fractional revolution (1.5 will make one and a half revolution)
+        This is a blocking function, see DRV8825StepperMotor.steps() to be aware of the caveats.
+
+        Args:
+            revolutions (float, optional): _description_. Defaults to 1.0.
+            clockwise (bool, optional): _description_. Defaults to False.
+        """
+        step_count = int(self.steps_for_one_revolution * revolutions)
+        self.steps(
+            amount=step_count,
+            clockwise=clockwise,
+        )
+
+    def rotate_while(
+        self, while_check_func: Callable[[], bool], clockwise: Optional[bool] = None
+    ):
+        """Provide a function that returns a boolean. The motor will rotate until the function returns False.
+        Args:
+            while_check_func (Callable[[], bool]): _description_
+            clockwise (bool, optional): _description_. Defaults to None.
+        """
+        if clockwise:
+            self.direction_clockwise(clockwise)
+        if self.telemetry is not None:
+            self.telemetry.start()
+        pulse = 0
+        while while_check_func():
+            pulse = self._blocking_step(pulse)
+
+    @micropython.native
+    def _step_non_blocking_timer_callback(self, t: Timer):
+        """Timer ISR, one call per STEP pin edge. It must not allocate: the pin toggle is a cached
+        bound method, the counters live in a preallocated array and everything after the
+        last pulse runs later via `micropython.schedule()`.
+        """
+        if _TRACE:
+            start = utime.ticks_us()
+        container = self._timer_container
+        if container is None:
+            return
+        counters = container.result.counters
+        remaining = counters[_PULSES_REMAINING]
+        done = counters[_PULSES_DONE]
+        if remaining == 0 or (
+            # open ended moves ask before every step, not on every edge
+            remaining < 0
+            and not done & 1
+            and not container.keep_running_check_callback()
+        ):
+            container.timer.deinit()
+            micropython.schedule(self._finish_callback, 0)
+            return
+        telemetry = self.telemetry
+        if telemetry is not None:
+            telemetry.record(self._period_us)
+        self._toggle()
+        if not done & 1:
+            # rising edge, STEP starts low
+            self._position += self._step_increment
+        counters[_PULSES_DONE] = done + 1
+        if remaining > 0:
+            counters[_PULSES_REMAINING] = remaining - 1
+        ramp = self.ramp
+        if ramp is not None:
+            # one shot per pulse, the next one gets its own interval
+            period = ramp.half_period_us(done + 1, container.total_pulses)
+            self._period_us = period
+            container.timer.init(
+                mode=Timer.ONE_SHOT,
+                period=period,
+                tick_hz=1_000_000,
+                callback=self._timer_callback,
+            )
+        elif self._timer_period_fixed & _FRAC_MASK:
+            # The alarm runs on whole us, the periods alternate to hit the fraction on average.
+            # One shot per edge against an absolute deadline, so the ISR latency does not add up.
+            period = _edge_us(self._timer_period_fixed, done + 1)
+            self._period_us = period
+            due = utime.ticks_add(self._due_us, period)
+            self._due_us = due
+            wait = utime.ticks_diff(due, utime.ticks_us())
+            container.timer.init(
+                mode=Timer.ONE_SHOT,
+                period=wait if wait > 0 else 1,
+                tick_hz=1_000_000,
+                callback=self._timer_callback,
+            )
+        if _TRACE:
+            tracer.record(SPAN_STEP_ISR, start)
+
+    def _finish_non_blocking(self, _):
+        if self._timer_container is not None:
+            self._timer_container.finish()
+
+    def _engine_busy(self) -> bool:
+        """True while a non blocking, PIO or `MultiAxisStepper` move drives the STEP pin"""
+        return (
+            (
+                self._timer_container is not None
+                and not self._timer_container.result.done
+            )
+            or (self._group_result is not None and not self._group_result.done)
+            or (self._pio is not None and self._pio.busy)
+        )
+
+    def _check_idle(self):
+        if self.moves.running or self._engine_busy():
+            raise ValueError(
+                "The motor is still running a move, use `queue_steps()` to run moves back to back"
+            )
+
+    def _check_no_pio(self):
+        if self._pio is not None:
+            raise ValueError(
+                "The PIO drives the STEP pin since `use_pio()`, use `steps_pio()`/`rotate_pio()`"
+            )
+
+    def _steps_non_blocking(
+        self, timer_container: NonBlockTimerContainer, clockwise: Optional[bool] = None
+    ):
+        self._check_no_pio()
+        self._check_idle()
+        if clockwise:
+            self.direction_clockwise(clockwise)
+
+        self._timer_container = timer_container
+        timer_container.result._start_tick_ms = utime.ticks_ms()
+        if self.telemetry is not None:
+            self.telemetry.start()
+        if self.ramp is not None:
+            self._period_us = self.ramp.half_period_us(0, timer_container.total_pulses)
+            self._timer_container.timer.init(
+                mode=Timer.ONE_SHOT,
+                period=self._period_us,
+                tick_hz=1_000_000,
+                callback=self._timer_callback,
+            )
+            return self._timer_container.result
+        self._period_us = _edge_us(self._timer_period_fixed, 0)
+        self._due_us = utime.ticks_add(utime.ticks_us(), self._period_us)
+        # a period in us, a frequency in whole Hz would round the delay a second time
+        self._timer_container.timer.init(
+            mode=Timer.PERIODIC,
+            period=self._period_us,
+            tick_hz=1_000_000,
+            callback=self._timer_callback,
+        )
+        return self._timer_container.result
+
+    def steps_non_blocking(
+        self,
+        amount: int = 1,
+        clockwise: Optional[bool] = None,
+        callback: Optional[Callable[[NonBlockResult], Any]] = None,
+        timer_id: int = -1,
+    ) -> NonBlockResult:
+        """Do x steps. Same as DRV8825StepperMotor.steps(), but non blocking.
+        This means you can call this function and the code will continue and not wait for the motor move to be finished.
+        The non blocking behaviour is achieved by using a Machine.Timer().
+
+        Args:
+            steps (int, optional): _description_. Defaults to 1.
+            clockwise (Optional[bool], optional): _description_. Defaults to None.
+            callback (Optional[Callable], optional): _description_. Defaults to None.
+            timer_id (int, optional): _description_. Defaults to -1.
+        """
+        non_block_timer_container = DRV8825StepperMotor.NonBlockTimerContainer(
+            timer=Timer(timer_id),
+            target_steps=amount * 2,
+            finished_callback=callback,
+        )
+        return self._steps_non_blocking(
+            timer_container=non_block_timer_container,
+            clockwise=clockwise,
+        )
+
+    def rotate_non_blocking(
+        self,
+        revolutions: float = 1.0,
+        clockwise: Optional[bool] = None,
+        callback: Optional[Callable[[NonBlockResult], Any]] = None,
+        timer_id: int = -1,
+    ) -> NonBlockResult:
+        """Do x revolutions. Same as DRV8825StepperMotor.rotate(), but non blocking.
+        This means you can call this function and the code will continue and not wait for the motor move to be finished.
+        The non blocking behaviour is achieved by using a Machine.Timer().
+
+        Args:
+            revolutions (float, optional): _description_. Defaults to 1.0.
+            clockwise (Optional[bool], optional): _description_. Defaults to None.
+            callback (Optional[Callable], optional): _description_. Defaults to None.
+            timer_id (int, optional): _description_. Defaults to -1.
+        """
+        step_count = int(self.steps_for_one_revolution * revolutions)
+        return self.steps_non_blocking(
+            amount=step_count,
+            clockwise=clockwise,
+            timer_id=timer_id,
+            callback=callback,
+        )
+
+    def rotate_while_non_blocking(
+        self,
+        while_check_func: Callable[[], bool],
+        clockwise: Optional[bool] = None,
+        callback: Optional[Callable[[NonBlockResult], Any]] = None,
+        timer_id: int = -1,
+    ) -> NonBlockResult:
+        """Provide a function that returns a boolean. The motor will rotate until the function returns False.
+        example:
+        ```python
+        def button_is_pressed() -> bool:
+            return my_button_pin.value()
+        m.rotate_while(button_is_pressed)
+        ```
+        Args:
+            while_check_func (Callable[[], bool]): _description_
+            clockwise (bool, optional): _description_. Defaults to None.
+        """
+        if clockwise:
+            self.direction_clockwise(clockwise)
+
+        return self._steps_non_blocking(
+            timer_container=DRV8825StepperMotor.NonBlockTimerContainer(
+                timer=Timer(timer_id),
+                keep_running_check_callback=while_check_func,
+                finished_callback=callback,
+            )
+        )
+
+    @micropython.native
+    def _queue_timer_callback(self, t: Timer):
+        """Timer ISR of the move queue, one call per STEP pin edge. At the end of a move the
+        next one is popped within the same call, so moves follow each other without a gap.
+        """
+        if _TRACE:
+            start = utime.ticks_us()
+        moves = self.moves
+        remaining = moves.remaining
+        # this edge still comes from the interval of the move before
+        expected_us = moves.interval_us
+        if remaining == 0:
+            tail = moves.tail
+            if tail == moves.head:
+                # ran dry, the next `queue_steps()` starts the timer again
+                t.deinit()
+                moves.running = False
+                if moves.last:
+                    moves.sequences += 1
+                else:
+                    moves.underruns += 1
+                return
+            slots = moves._slots
+            i = tail * 4
+            remaining = slots[i]
+            direction = slots[i + 1]
+            moves.interval_fixed = slots[i + 2]
+            moves.last = slots[i + 3] != 0
+            tail += 1
+            moves.tail = 0 if tail == moves._size else tail
+            if direction >= 0:
+                # the last move ended with STEP low, DIR changes before the next rising edge
+                self._set_direction(direction)
+                self._step_increment = (
+                    self._step_unit if direction else -self._step_unit
+                )
+        telemetry = self.telemetry
+        if telemetry is not None:
+            telemetry.record(expected_us)
+        self._toggle()
+        if not remaining & 1:
+            # rising edge, every move is an even amount of pulses
+            self._position += self._step_increment
+        moves.remaining = remaining - 1
+        # period to the next edge, a new move or a fraction of a us changes it
+        interval = moves.interval_fixed
+        if interval & _FRAC_MASK:
+            # alternating whole us, one shot per edge like the Timer engine
+            period = _edge_us(interval, remaining)
+            due = utime.ticks_add(moves.due_us, period)
+            moves.due_us = due
+            wait = utime.ticks_diff(due, utime.ticks_us())
+            moves.periodic = False
+            t.init(
+                mode=Timer.ONE_SHOT,
+                period=wait if wait > 0 else 1,
+                tick_hz=1_000_000,
+                callback=self._queue_callback,
+            )
+        else:
+            period = interval >> _FRAC_BITS
+            moves.due_us = utime.ticks_add(moves.due_us, period)
+            if not moves.periodic or period != moves.interval_us:
+                moves.periodic = True
+                t.init(
+                    mode=Timer.PERIODIC,
+                    period=period,
+                    tick_hz=1_000_000,
+                    callback=self._queue_callback,
+                )
+        moves.interval_us = period
+        if _TRACE:
+            tracer.record(SPAN_QUEUE_ISR, start)
+
+    def queue_steps(
+        self,
+        amount: int = 1,
+        clockwise: Optional[bool] = None,
+        target_time_for_one_revolution_ms: Optional[float] = None,
+        timer_id: int = -1,
+        last: bool = False,
+    ) -> bool:
+        """Append a move to the move queue and return right away. Queued moves run back to back
+        on one Timer: no gap and no re-init between them, DIR is switched at the boundary.
+        Queued moves run at a constant speed, `set_ramp()` does not apply to them.
+        Watch `moves.depth`, `moves.running`, `moves.underruns` (the queue ran dry before a
+        move queued with `last=True`) and `moves.sequences` (it ran dry after one).
+
+        Args:
+            amount (int, optional): Amount of steps. Defaults to 1.
+            clockwise (Optional[bool], optional): Direction of this move, None keeps the direction of the move before. Defaults to None.
+            target_time_for_one_revolution_ms (Optional[float], optional): Speed of this move. Defaults to None (the speed set on the motor).
+            timer_id (int, optional): Timer used when the queue starts. Defaults to -1.
+            last (bool, optional): This move ends the sequence, the motor stopping after it is planned. Defaults to False.
+
+        Returns:
+            bool: False if the queue is full and the move was not added
+        """
+        self._check_no_pio()
+        if self._engine_busy():
+            raise ValueError("The motor is still running a non blocking move")
+        if clockwise is not None and self._set_direction is None:
+            raise ValueError(
+                "Can not switch DIR pin. Pin was not provided on instantiation of `DRV8825StepperMotor`."
+            )
+        if amount <= 0:
+            return True
+        interval = self._timer_period_fixed
+        if target_time_for_one_revolution_ms is not None:
+            # same correction as `_update_pulse_delay()`, the queue runs on a Timer
+            interval = _fixed_us(
+                target_time_for_one_revolution_ms
+                * 1000
+                / (self.steps_for_one_revolution * 2)
+                + self.calibration.offset_us(self.mode.name, "timer"),
+                1,
+            )
+        moves = self.moves
+        if not moves.push(
+            amount * 2,
+            MoveQueue.KEEP_DIRECTION if clockwise is None else int(clockwise),
+            interval,
+            last,
+        ):
+            return False
+        irq_state = disable_irq()
+        if not moves.running:
+            moves.running = True
+            moves.remaining = 0
+            if self.telemetry is not None:
+                self.telemetry.start()
+            moves.interval_fixed = moves.next_interval_fixed()
+            moves.interval_us = moves.interval_fixed >> _FRAC_BITS
+            moves.periodic = True
+            moves.due_us = utime.ticks_add(utime.ticks_us(), moves.interval_us)
+            if self._queue_timer is None:
+                self._queue_timer = Timer(timer_id)
+            self._queue_timer.init(
+                mode=Timer.PERIODIC,
+                period=moves.interval_us,
+                tick_hz=1_000_000,
+                callback=self._queue_callback,
+            )
+        enable_irq(irq_state)
+        return True
+
+    def queue_rotate(
+        self,
+        revolutions: float = 1.0,
+        clockwise: Optional[bool] = None,
+        target_time_for_one_revolution_ms: Optional[float] = None,
+        last: bool = False,
+    ) -> bool:
+        """Same as `queue_steps()` in revolutions"""
+        return self.queue_steps(
+            amount=int(self.steps_for_one_revolution * revolutions),
+            clockwise=clockwise,
+            target_time_for_one_revolution_ms=target_time_for_one_revolution_ms,
+            last=last,
+        )
+
+    def move_to(
+        self,
+        position: int,
+        shortest_path: bool = False,
+        target_time_for_one_revolution_ms: Optional[float] = None,
+        callback: Optional[Callable[[NonBlockResult], Any]] = None,
+    ) -> NonBlockResult:
+        """Move to an absolute `position` on the Timer engine (with the ramp, if set) and
+        return right away. Await the result or `wait()` for it.
+
+        Args:
+            position (int): Target in 1/32 microsteps, see `position`
+            shortest_path (bool, optional): For endless rotating axes: turn at most half a revolution, in the shorter direction. Defaults to False.
+            target_time_for_one_revolution_ms (Optional[float], optional): Move at this speed, it stays the motor's speed (see `set_speed()`). Defaults to None.
+            callback (Optional[Callable[[NonBlockResult], Any]], optional): Called with the result when the move is done. Defaults to None.
+        """
+        if target_time_for_one_revolution_ms is not None:
+            self.set_speed(target_time_for_one_revolution_ms)
+        delta = position - self._position
+        if shortest_path:
+            revolution = self.steps_for_one_revolution * self._step_unit
+            delta = (delta + revolution // 2) % revolution - revolution // 2
+        amount = abs(delta) // self._step_unit
+        if not amount:
+            result = DRV8825StepperMotor.NonBlockResult()
+            result._start_tick_ms = utime.ticks_ms()
+            result._finish(callback)
+            return result
+        if delta < 0 or self.direction_pin:
+            self.direction_clockwise(delta > 0)
+        return self.steps_non_blocking(amount=amount, callback=callback)
+
+    def _endstop_triggered(self) -> bool:
+        return self._endstop.value() == self._endstop_level
+
+    def _endstop_released(self) -> bool:
+        return self._endstop.value() != self._endstop_level
+
+    async def home_async(
+        self,
+        endstop: Pin,
+        clockwise: bool = False,
+        triggered_level: int = 0,
+        fast_time_for_one_revolution_ms: Optional[float] = None,
+        slow_time_for_one_revolution_ms: Optional[float] = None,
+        back_off_steps: Optional[int] = None,
+        position: int = 0,
+        acceleration_rev_per_s2: Optional[float] = None,
+    ):
+        """Find the home position at an endstop in two phases: approach fast, back off until
+        the endstop is released plus `back_off_steps`, then approach again slowly for an exact
+        stop. `position` is set at the endstop. Every move accelerates from standstill on a
+        ramp (see `set_ramp()`), also the slow ones; the approaches stop at the endstop without
+        decelerating. All moves run on the Timer engine, the endstop is checked before every
+        step. Speed and ramp are restored afterwards.
+
+        Args:
+            endstop (Pin): Input of the endstop switch, e.g. `Pin(15, Pin.IN, pull=1)`
+            clockwise (bool, optional): Direction towards the endstop. Defaults to False.
+            triggered_level (int, optional): Pin value when the endstop is hit. Defaults to 0.
+            fast_time_for_one_revolution_ms (Optional[float], optional): Speed of the first approach. Defaults to None (the motor's speed).
+            slow_time_for_one_revolution_ms (Optional[float], optional): Speed of the second approach. Defaults to None (4 times slower than the first).
+            back_off_steps (Optional[int], optional): Steps to move away after the endstop released. Defaults to None (1/16 revolution).
+            position (int, optional): Position of the endstop. Defaults to 0.
+            acceleration_rev_per_s2 (Optional[float], optional): Acceleration of all moves. Defaults to None (the one of `set_ramp()`, `HOMING_ACCELERATION_REV_PER_S2` without a ramp).
+        """
+        speed = self.target_time_for_one_revolution_ms
+        acceleration = self.acceleration_rev_per_s2
+        profile = self.ramp_profile
+        fast = fast_time_for_one_revolution_ms or speed
+        slow = slow_time_for_one_revolution_ms or fast * 4
+        if back_off_steps is None:
+            back_off_steps = max(1, self.steps_for_one_revolution // 16)
+        self._endstop = endstop
+        self._endstop_level = triggered_level
+        try:
+            # recomputed for every speed by `set_speed()`
+            self.acceleration_rev_per_s2 = (
+                acceleration_rev_per_s2
+                or acceleration
+                or self.HOMING_ACCELERATION_REV_PER_S2
+            )
+            self.set_speed(fast)
+            self.direction_clockwise(clockwise)
+            if not self._endstop_triggered():
+                await self.rotate_while_non_blocking(self._endstop_released)
+            self.set_speed(slow)
+            self.direction_clockwise(not clockwise)
+            await self.rotate_while_non_blocking(self._endstop_triggered)
+            await self.steps_non_blocking(amount=back_off_steps)
+            self.direction_clockwise(clockwise)
+            await self.rotate_while_non_blocking(self._endstop_released)
+        finally:
+            self.set_ramp(None)
+            self.set_speed(speed)
+            self.set_ramp(acceleration, profile)
+        self._position = position
+
+    def enable_telemetry(
+        self, bins: int = 32, bin_us: int = 4, late_us: int = 50
+    ) -> StepTelemetry:
+        """Record how evenly the blocking, async, Timer and queue engines place the STEP edges
+        into a `StepTelemetry` histogram (`telemetry`), e.g. to see what a display refresh rate
+        or the serial ingest costs in smoothness. Print it with `m.telemetry.dump()`,
+        switch it off again with `m.telemetry = None`. The PIO engine is not recorded.
+
+        Args:
+            bins (int, optional): Amount of bins. Defaults to 32.
+            bin_us (int, optional): Width of a bin. Defaults to 4.
+            late_us (int, optional): Edges later than this count as late. Defaults to 50.
+        """
+        self.telemetry = StepTelemetry(bins, bin_us, late_us)
+        return self.telemetry
+
+    def use_pio(self, sm_id: int = 0, freq: int = 2_000_000):
+        """Generate the STEP pulses with a PIO state machine (see `perfmon.pio`) for
+        `steps_pio()`/`rotate_pio()`. The state machine takes over the STEP pin, the other
+        step functions raise a ValueError afterwards.
+
+        Args:
+            sm_id (int, optional): PIO state machine to use (0-7). Defaults to 0.
+            freq (int, optional): State machine clock. Defaults to 2_000_000.
+        """
+        from perfmon.pio import PioStepEngine
+
+        self._check_idle()
+        self._pio = PioStepEngine(self.step_pin, sm_id=sm_id, freq=freq)
+
+    def steps_pio(
+        self,
+        amount: int = 1,
+        clockwise: Optional[bool] = None,
+        callback: Optional[Callable[[NonBlockResult], Any]] = None,
+    ) -> NonBlockResult:
+        """Same as DRV8825StepperMotor.steps_non_blocking(), but the pulses come from the PIO.
+        The CPU is only interrupted once per move (or per ramp segment, see `set_ramp()`),
+        which allows much higher step rates. Call `use_pio()` first.
+
+        Args:
+            amount (int, optional): Amount of steps. Defaults to 1.
+            clockwise (Optional[bool], optional): Direction. Defaults to None.
+            callback (Optional[Callable[[NonBlockResult], Any]], optional): Called with the result when the move is done. Defaults to None.
+        """
+        if self._pio is None:
+            raise ValueError("Call `use_pio()` before using PIO step functions")
+        self._check_idle()
+        if clockwise:
+            self.direction_clockwise(clockwise)
+        result = DRV8825StepperMotor.NonBlockResult()
+        result._start_tick_ms = utime.ticks_ms()
+
+        # `PioStepEngine` calls this from its soft IRQ handler, not from a hard IRQ
+        def done():
+            result.pulses_done = amount * 2
+            self._position += amount * self._step_increment
+            result._finish(callback)
+
+        self._pio.move(amount, self._pio_interval_ns, self.ramp, done)
+        return result
+
+    def rotate_pio(
+        self,
+        revolutions: float = 1.0,
+        clockwise: Optional[bool] = None,
+        callback: Optional[Callable[[NonBlockResult], Any]] = None,
+    ) -> NonBlockResult:
+        """Same as DRV8825StepperMotor.rotate_non_blocking(), but the pulses come from the PIO, see `steps_pio()`"""
+        return self.steps_pio(
+            amount=int(self.steps_for_one_revolution * revolutions),
+            clockwise=clockwise,
+            callback=callback,
+        )
+
+    def _pulse_us(self, pulse: int, pulses: int = -1) -> int:
+        if self.ramp is not None:
+            return self.ramp.half_period_us(pulse, pulses)
+        return _edge_us(self._async_delay_fixed, pulse)
+
+    def _shortest_pulse_us(self) -> int:
+        if self.ramp is not None:
+            return self.ramp.cruise_us >> 1
+        return int(self.pulse_delay_us)
+
+    async def _pulse_at(self, deadline: int, interval_us: int):
+        """Wait for the `ticks_us` deadline, then make the pulse. uasyncio sleeps in whole ms,
+        the rest (< 1 ms) is waited blocking. A late wake up is caught up by the next deadline.
+        """
+        wait = utime.ticks_diff(deadline, utime.ticks_us())
+        # always yield once, the display and ingest tasks get their turn between pulses
+        await uasyncio.sleep_ms(wait // 1000 if wait >= 1000 else 0)
+        wait = utime.ticks_diff(deadline, utime.ticks_us())
+        if wait > 0:
+            sleep_us(wait)
+        self.step()
+        if self.telemetry is not None:
+            self.telemetry.record(interval_us)
+
+    def _async_keep_running_check(self) -> bool:
+        return self._async_keep_running
+
+    async def step_async(self, steps: int = 1, clockwise: Optional[bool] = None):
+        """Async (uasyncio) version of DRV8825StepperMotor.step()
+
+        Pulses are timed against absolute `ticks_us` deadlines, so scheduling delays don't add up.
+        If pulses are shorter than `ASYNC_TIMER_THRESHOLD_US` the move is handed to the Timer
+        engine (see `steps_non_blocking()`) and this only waits for it to finish.
+
+        Args:
+            steps (int, optional): _description_. Defaults to 1.
+            clockwise (bool, optional): _description_. Defaults to None.
+        """
+        if clockwise:
+            self.direction_clockwise(clockwise)
+        if self._shortest_pulse_us() < self.ASYNC_TIMER_THRESHOLD_US:
+            await self.steps_non_blocking(amount=steps)
+            return
+        await self._steps_deadline_async(steps * 2)
+
+    async def _steps_deadline_async(self, pulses: int):
+        if self.telemetry is not None:
+            self.telemetry.start()
+        deadline = utime.ticks_us()
+        for pulse in range(pulses):
+            interval_us = self._pulse_us(pulse, pulses)
+            deadline = utime.ticks_add(deadline, interval_us)
+            await self._pulse_at(deadline, interval_us)
+
+    async def rotate_async(
+        self, revolutions: int | float = 1.0, clockwise: bool = False
+    ):
+        """Async (uasyncio) version of DRV8825StepperMotor.rotate()
+        Turn the motor X revolutions (One revolution -> 360°). Can be a float to turn fractional revolution (1.5 will make one and a half revolution)
+
+        Args:
+            rotations (float, optional): _description_. Defaults to 1.0.
+            clockwise (bool, optional): _description_. Defaults to False.
+        """
+        await self.step_async(
+            steps=int(self.steps_for_one_revolution * revolutions),
+            clockwise=clockwise,
+        )
+
+    async def rotate_while_async(
+        self,
+        while_check_func: Callable[[], Awaitable[bool]],
+        clockwise: Optional[bool] = None,
+        check_interval_ms: int = 10,
+    ):
+        """Provide a async function that returns a boolean. The motor will rotate until the function returns True.
+        Fast moves (see `step_async()`) run on the Timer engine, `while_check_func` is then awaited every `check_interval_ms`.
+        example:
+        Args:
+            while_check_func (Callable[[], Awaitable[bool]]): _description_
+            clockwise (bool, optional): _description_. Defaults to None.
+            check_interval_ms (int, optional): How often to check while the Timer engine steps. Defaults to 10.
+        """
+        if clockwise:
+            self.direction_clockwise(clockwise)
+        if self._shortest_pulse_us() < self.ASYNC_TIMER_THRESHOLD_US:
+            self._async_keep_running = True
+            result = self.rotate_while_non_blocking(self._async_keep_running_check)
+            while not await while_check_func():
+                await uasyncio.sleep_ms(check_interval_ms)
+            self._async_keep_running = False
+            await result
+            return
+        if self.telemetry is not None:
+            self.telemetry.start()
+        pulse = 0
+        deadline = utime.ticks_us()
+        while not await while_check_func():
+            # one step: two pulses
+            for _ in range(2):
+                interval_us = self._pulse_us(pulse)
+                deadline = utime.ticks_add(deadline, interval_us)
+                await self._pulse_at(deadline, interval_us)
+                pulse += 1
+
+
+class MultiAxisStepper:
+    """Moves several `DRV8825StepperMotor` together from one Timer.
+
+    The timer runs at the pulse rate of the axis with the most steps (the dominant axis).
+    On every tick each axis adds its pulse count to an error term (integer Bresenham/DDA) and
+    toggles its STEP pin when the term overflows the dominant count, so all axes start and
+    arrive together and the path is a straight line. The dominant axis motor's speed and ramp
+    (see `DRV8825StepperMotor.set_ramp()`) are used for the whole move.
+
+    example:
+    ```python
+    xy = MultiAxisStepper((motor_x, motor_y))
+    await xy.move((400, -200))
+    ```
+    """
+
+    def __init__(self, motors: Tuple[DRV8825StepperMotor, ...], timer_id: int = -1):
+        """
+        Args:
+            motors (Tuple[DRV8825StepperMotor, ...]): The axes, in the order `move()` takes the steps
+            timer_id (int, optional): Timer to use. Defaults to -1.
+        """
+        self.motors = motors
+        # per axis: pulses of the move and the Bresenham error term
+        self._deltas = array.array("i", bytes(4 * len(motors)))
+        self._errors = array.array("i", bytes(4 * len(motors)))
+        # per axis: pulses done, every other one is a rising edge that moves `position`
+        self._toggled = array.array("i", bytes(4 * len(motors)))
+        self._dominant = 0
+        # `ticks_us` the next tick is due while the period alternates, see `_edge_us()`
+        self._due_us = 0
+        self._motor: Optional[DRV8825StepperMotor] = None
+        self._result: Optional[DRV8825StepperMotor.NonBlockResult] = None
+        self._callback: Optional[
+            Callable[[DRV8825StepperMotor.NonBlockResult], Any]
+        ] = None
+        self._timer = Timer(timer_id)
+        # Creating a bound method allocates, so the ones the timer ISR needs are created once here
+        self._toggles = tuple(motor.step_pin.toggle for motor in motors)
+        self._timer_callback = self._step_timer_callback
+        self._finish_callback = self._finish
+
+    @property
+    def busy(self) -> bool:
+        return self._result is not None and not self._result.done
+
+    def move(
+        self,
+        steps: Tuple[int, ...],
+        callback: Optional[Callable[[DRV8825StepperMotor.NonBlockResult], Any]] = None,
+    ) -> DRV8825StepperMotor.NonBlockResult:
+        """Start a coordinated move and return right away.
+
+        Args:
+            steps (Tuple[int, ...]): Steps per axis, negative values turn counterclockwise
+            callback (Optional[Callable[[NonBlockResult], Any]], optional): Called with the result when the move is done. Defaults to None.
+
+        Returns:
+            NonBlockResult: `pulses_done` counts the pulses of the dominant axis
+        """
+        if len(steps) != len(self.motors):
+            raise ValueError(
+                "Expected steps for {} axes, got {}".format(
+                    len(self.motors), len(steps)
+                )
+            )
+        if self.busy:
+            raise ValueError("MultiAxisStepper is still busy with the last move")
+        # before any DIR pin changes, an axis may still be moving on its own
+        for motor in self.motors:
+            motor._check_no_pio()
+            motor._check_idle()
+        dominant = 0
+        for axis, motor in enumerate(self.motors):
+            amount = steps[axis]
+            if amount < 0 or motor.direction_pin:
+                motor.direction_clockwise(amount >= 0)
+            pulses = abs(amount) * 2
+            self._deltas[axis] = pulses
+            if pulses > dominant:
+                dominant = pulses
+                self._motor = motor
+        self._dominant = dominant
+        for axis in range(len(self.motors)):
+            # start half way, the steps of a minor axis are centered between the dominant ones
+            self._errors[axis] = dominant >> 1
+            self._toggled[axis] = 0
+        result = DRV8825StepperMotor.NonBlockResult()
+        result.counters[_PULSES_REMAINING] = dominant
+        result._start_tick_ms = utime.ticks_ms()
+        self._result = result
+        self._callback = callback
+        # the axes refuse moves of their own until this one is done, see `_check_idle()`
+        for motor in self.motors:
+            motor._group_result = result
+        if not dominant:
+            result._finish(callback)
+            return result
+        motor = self._motor
+        if motor.ramp is not None:
+            self._timer.init(
+                mode=Timer.ONE_SHOT,
+                period=motor.ramp.half_period_us(0, dominant),
+                tick_hz=1_000_000,
+                callback=self._timer_callback,
+            )
+        else:
+            period = _edge_us(motor._timer_period_fixed, 0)
+            self._due_us = utime.ticks_add(utime.ticks_us(), period)
+            self._timer.init(
+                mode=Timer.PERIODIC,
+                period=period,
+                tick_hz=1_000_000,
+                callback=self._timer_callback,
+            )
+        return result
+
+    @micropython.native
+    def _step_timer_callback(self, t: Timer):
+        """Timer ISR, one call per pulse of the dominant axis. Allocation-free like
+        `DRV8825StepperMotor._step_non_blocking_timer_callback()`.
+        """
+        result = self._result
+        if result is None:
+            return
+        counters = result.counters
+        remaining = counters[_PULSES_REMAINING]
+        if remaining == 0:
+            t.deinit()
+            micropython.schedule(self._finish_callback, 0)
+            return
+        dominant = self._dominant
+        deltas = self._deltas
+        errors = self._errors
+        toggles = self._toggles
+        toggled = self._toggled
+        motors = self.motors
+        for axis in range(len(toggles)):
+            error = errors[axis] + deltas[axis]
+            if error >= dominant:
+                error -= dominant
+                toggles[axis]()
+                pulses = toggled[axis]
+                if not pulses & 1:
+                    # rising edge, STEP starts low
+                    axis_motor = motors[axis]
+                    axis_motor._position += axis_motor._step_increment
+                toggled[axis] = pulses + 1
+            errors[axis] = error
+        done = counters[_PULSES_DONE] + 1
+        counters[_PULSES_DONE] = done
+        counters[_PULSES_REMAINING] = remaining - 1
+        motor = self._motor
+        ramp = motor.ramp
+        if ramp is not None:
+            t.init(
+                mode=Timer.ONE_SHOT,
+                period=ramp.half_period_us(done, dominant),
+                tick_hz=1_000_000,
+                callback=self._timer_callback,
+            )
+        elif motor._timer_period_fixed & _FRAC_MASK:
+            # alternating whole us, one shot per edge like the Timer engine of the motor
+            due = utime.ticks_add(
+                self._due_us, _edge_us(motor._timer_period_fixed, done)
+            )
+            self._due_us = due
+            wait = utime.ticks_diff(due, utime.ticks_us())
+            t.init(
+                mode=Timer.ONE_SHOT,
+                period=wait if wait > 0 else 1,
+                tick_hz=1_000_000,
+                callback=self._timer_callback,
+            )
+
+    def _finish(self, _):
+        if self._result is not None and not self._result.done:
+            self._result._finish(self._callback)
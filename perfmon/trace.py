@@ -0,0 +1,110 @@
+"""Span tracing of the render, ingest and stepper ISR paths.
+
+Nothing imports this module unless tracing is switched on: every instrumented module has its
+own `_TRACE = const(0)` and only imports `tracer` inside `if _TRACE:`, which the compiler drops
+together with all the recording code. Set `_TRACE = const(1)` in the modules to trace, or build
+with `python tools/build_mpy.py --trace`.
+"""
+
+import array
+import utime
+import micropython
+from micropython import const
+
+try:
+    from typing import Tuple
+except ImportError:
+    # only for the type checker, MicroPython does not evaluate annotations
+    pass
+
+# Span ids, the index into `SPAN_NAMES`
+SPAN_FRAME = const(0)
+SPAN_ROW = const(1)
+SPAN_FLUSH = const(2)
+SPAN_INGEST = const(3)
+SPAN_STEP_ISR = const(4)
+SPAN_QUEUE_ISR = const(5)
+SPAN_NAMES = ("frame", "row", "flush", "ingest", "step_isr", "queue_isr")
+
+
+class SpanTracer:
+    """Ring of the last `capacity` spans, each as span id, enter and exit `ticks_us` in a
+    preallocated `array`, recording does not allocate. Instrumented code looks like this, so
+    it compiles to nothing with `_TRACE = const(0)`:
+
+    ```python
+    _TRACE = const(0)
+    if _TRACE:
+        from perfmon.trace import tracer, SPAN_FRAME
+    ...
+    if _TRACE:
+        start = utime.ticks_us()
+    ...
+    if _TRACE:
+        tracer.record(SPAN_FRAME, start)
+    ```
+    Spans recorded from an ISR that interrupts `record()` can overwrite a slot. `dump()` prints
+    the ring over the serial console (also on `protocol.CMD_DUMP_TRACE`), `host/trace_report.py`
+    turns it into a per span summary or a flame graph.
+    """
+
+    SLOT = 3
+
+    def __init__(self, names: Tuple[str, ...], capacity: int = 256):
+        self.names = names
+        self.capacity = capacity
+        self._ring = array.array("i", bytes(4 * self.SLOT * capacity))
+        self.index: int = 0
+        self.count: int = 0
+
+    @micropython.native
+    def record(self, span: int, start: int):
+        """Record a span that started at `start` (`ticks_us`) and ends now"""
+        ring = self._ring
+        i = self.index * 3
+        ring[i] = span
+        ring[i + 1] = start
+        ring[i + 2] = utime.ticks_us()
+        index = self.index + 1
+        self.index = 0 if index == self.capacity else index
+        if self.count < self.capacity:
+            self.count += 1
+
+    def clear(self):
+        self.index = 0
+        self.count = 0
+
+    def dump(self):
+        """Print the names and all spans, oldest first"""
+        print("trace begin {} {}".format(len(self.names), self.count))
+        for span, name in enumerate(self.names):
+            print("trace name {} {}".format(span, name))
+        ring = self._ring
+        first = self.index - self.count
+        if first < 0:
+            first += self.capacity
+        for n in range(self.count):
+            i = ((first + n) % self.capacity) * self.SLOT
+            print("trace span {} {} {}".format(ring[i], ring[i + 1], ring[i + 2]))
+        print("trace end")
+
+
+def traced(span: int):
+    """Decorator version of a span for code outside the hot paths, the wrapper allocates its
+    argument tuple on every call. Apply it inside `if _TRACE:` like the import.
+    """
+
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            start = utime.ticks_us()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.record(span, start)
+
+        return wrapper
+
+    return decorator
+
+
+tracer = SpanTracer(SPAN_NAMES)
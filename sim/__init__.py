@@ -0,0 +1,24 @@
+"""CPython stand-ins for the MicroPython modules the pico client uses.
+
+`install()` puts `sim/mp` in front of `sys.path`, after that `import machine`, `import ssd1306`,
+`import utime` ... resolve to the emulated versions in this package. Time is virtual
+(see `sim.clock`), I2C transfers end up in a modeled SSD1306 panel (see `sim.panel`).
+
+Example:
+```python
+import sim
+sim.install()
+import main
+```
+"""
+
+import os
+import sys
+
+MP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mp")
+
+
+def install():
+    """Make the emulated MicroPython modules importable. Calling it twice is harmless."""
+    if MP_DIR not in sys.path:
+        sys.path.insert(0, MP_DIR)
@@ -0,0 +1,89 @@
+"""Virtual microsecond clock.
+
+Everything in the simulation that needs time (`utime`, `machine.Timer`) reads and advances
+this clock instead of the wall clock, which makes runs deterministic and lets a benchmark
+simulate seconds of motor movement in a few milliseconds.
+"""
+
+import heapq
+from typing import Callable, List, Tuple
+
+_now_us: int = 0
+_seq: int = 0
+# (due_us, seq, callback) heap of pending timer events
+_events: List[Tuple[int, int, Callable[[], None]]] = []
+_cancelled = set()
+_scheduled: List[Tuple[Callable, object]] = []
+_in_event = False
+
+
+def now_us() -> int:
+    return _now_us
+
+
+def reset():
+    """Back to t=0 without any pending events."""
+    global _now_us, _seq, _in_event
+    _now_us = 0
+    _seq = 0
+    _in_event = False
+    _events.clear()
+    _cancelled.clear()
+    _scheduled.clear()
+
+
+def call_at(due_us: int, callback: Callable[[], None]) -> int:
+    """Run `callback` once the clock reaches `due_us`. Returns a handle for `cancel()`."""
+    global _seq
+    _seq += 1
+    heapq.heappush(_events, (int(due_us), _seq, callback))
+    return _seq
+
+
+def cancel(handle: int):
+    _cancelled.add(handle)
+
+
+def next_event_us():
+    """Due time of the next pending event or None."""
+    while _events and _events[0][1] in _cancelled:
+        _cancelled.discard(heapq.heappop(_events)[1])
+    return _events[0][0] if _events else None
+
+
+def schedule(func: Callable, arg):
+    """Queue a soft callback like `micropython.schedule()`; it runs after the current event."""
+    _scheduled.append((func, arg))
+
+
+def _run_scheduled():
+    while _scheduled:
+        func, arg = _scheduled.pop(0)
+        func(arg)
+
+
+def advance(us: int):
+    """Move the clock forward by `us`, firing all events that come due on the way."""
+    advance_to(_now_us + int(us))
+
+
+def advance_to(target_us: int):
+    global _now_us, _in_event
+    if _in_event:
+        # A callback that sleeps (it should not) only moves time, the outer loop dispatches.
+        _now_us = max(_now_us, target_us)
+        return
+    while True:
+        due = next_event_us()
+        if due is None or due > target_us:
+            break
+        _, handle, callback = heapq.heappop(_events)
+        _now_us = max(_now_us, due)
+        _in_event = True
+        try:
+            callback()
+        finally:
+            _in_event = False
+        _run_scheduled()
+    _now_us = max(_now_us, target_us)
+    _run_scheduled()
@@ -0,0 +1,287 @@
+"""Pure Python stand-in for MicroPython's `framebuf` module (MONO_VLSB only).
+
+The drawing primitives follow the algorithms of MicroPython's extmod/modframebuf.c, so a
+buffer drawn here has the same bytes as on the device. The only difference is the glyph set of
+`text()`: MicroPython's petme128 font is not available under CPython, a CP437 8x8 font with
+the same column layout (bit 0 is the top pixel) is used instead.
+"""
+
+MONO_VLSB = 0
+MONO_HLSB = 3
+MONO_HMSB = 4
+
+# 8x8 CP437 glyphs for chr(32)..chr(127), one byte per column.
+# Taken from luma.core (https://github.com/rm-hull/luma.core), MIT License,
+# Copyright (c) 2017-2026 Richard Hull and contributors
+# fmt: off
+_FONT = bytes(
+    [
+    0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,  # ' '
+    0x00, 0x06, 0x5f, 0x5f, 0x06, 0x00, 0x00, 0x00,  # '!'
+    0x00, 0x07, 0x07, 0x00, 0x07, 0x07, 0x00, 0x00,  # '"'
+    0x14, 0x7f, 0x7f, 0x14, 0x7f, 0x7f, 0x14, 0x00,  # '#'
+    0x24, 0x2e, 0x6b, 0x6b, 0x3a, 0x12, 0x00, 0x00,  # '$'
+    0x46, 0x66, 0x30, 0x18, 0x0c, 0x66, 0x62, 0x00,  # '%'
+    0x30, 0x7a, 0x4f, 0x5d, 0x37, 0x7a, 0x48, 0x00,  # '&'
+    0x04, 0x07, 0x03, 0x00, 0x00, 0x00, 0x00, 0x00,  # "'"
+    0x00, 0x1c, 0x3e, 0x63, 0x41, 0x00, 0x00, 0x00,  # '('
+    0x00, 0x41, 0x63, 0x3e, 0x1c, 0x00, 0x00, 0x00,  # ')'
+    0x08, 0x2a, 0x3e, 0x1c, 0x1c, 0x3e, 0x2a, 0x08,  # '*'
+    0x08, 0x08, 0x3e, 0x3e, 0x08, 0x08, 0x00, 0x00,  # '+'
+    0x00, 0x80, 0xe0, 0x60, 0x00, 0x00, 0x00, 0x00,  # ','
+    0x08, 0x08, 0x08, 0x08, 0x08, 0x08, 0x00, 0x00,  # '-'
+    0x00, 0x00, 0x60, 0x60, 0x00, 0x00, 0x00, 0x00,  # '.'
+    0x60, 0x30, 0x18, 0x0c, 0x06, 0x03, 0x01, 0x00,  # '/'
+    0x3e, 0x7f, 0x71, 0x59, 0x4d, 0x7f, 0x3e, 0x00,  # '0'
+    0x40, 0x42, 0x7f, 0x7f, 0x40, 0x40, 0x00, 0x00,  # '1'
+    0x62, 0x73, 0x59, 0x49, 0x6f, 0x66, 0x00, 0x00,  # '2'
+    0x22, 0x63, 0x49, 0x49, 0x7f, 0x36, 0x00, 0x00,  # '3'
+    0x18, 0x1c, 0x16, 0x53, 0x7f, 0x7f, 0x50, 0x00,  # '4'
+    0x27, 0x67, 0x45, 0x45, 0x7d, 0x39, 0x00, 0x00,  # '5'
+    0x3c, 0x7e, 0x4b, 0x49, 0x79, 0x30, 0x00, 0x00,  # '6'
+    0x03, 0x03, 0x71, 0x79, 0x0f, 0x07, 0x00, 0x00,  # '7'
+    0x36, 0x7f, 0x49, 0x49, 0x7f, 0x36, 0x00, 0x00,  # '8'
+    0x06, 0x4f, 0x49, 0x69, 0x3f, 0x1e, 0x00, 0x00,  # '9'
+    0x00, 0x00, 0x66, 0x66, 0x00, 0x00, 0x00, 0x00,  # ':'
+    0x00, 0x80, 0xe6, 0x66, 0x00, 0x00, 0x00, 0x00,  # ';'
+    0x08, 0x1c, 0x36, 0x63, 0x41, 0x00, 0x00, 0x00,  # '<'
+    0x24, 0x24, 0x24, 0x24, 0x24, 0x24, 0x00, 0x00,  # '='
+    0x00, 0x41, 0x63, 0x36, 0x1c, 0x08, 0x00, 0x00,  # '>'
+    0x02, 0x03, 0x51, 0x59, 0x0f, 0x06, 0x00, 0x00,  # '?'
+    0x3e, 0x7f, 0x41, 0x5d, 0x5d, 0x1f, 0x1e, 0x00,  # '@'
+    0x7c, 0x7e, 0x13, 0x13, 0x7e, 0x7c, 0x00, 0x00,  # 'A'
+    0x41, 0x7f, 0x7f, 0x49, 0x49, 0x7f, 0x36, 0x00,  # 'B'
+    0x1c, 0x3e, 0x63, 0x41, 0x41, 0x63, 0x22, 0x00,  # 'C'
+    0x41, 0x7f, 0x7f, 0x41, 0x63, 0x3e, 0x1c, 0x00,  # 'D'
+    0x41, 0x7f, 0x7f, 0x49, 0x5d, 0x41, 0x63, 0x00,  # 'E'
+    0x41, 0x7f, 0x7f, 0x49, 0x1d, 0x01, 0x03, 0x00,  # 'F'
+    0x1c, 0x3e, 0x63, 0x41, 0x51, 0x73, 0x72, 0x00,  # 'G'
+    0x7f, 0x7f, 0x08, 0x08, 0x7f, 0x7f, 0x00, 0x00,  # 'H'
+    0x00, 0x41, 0x7f, 0x7f, 0x41, 0x00, 0x00, 0x00,  # 'I'
+    0x30, 0x70, 0x40, 0x41, 0x7f, 0x3f, 0x01, 0x00,  # 'J'
+    0x41, 0x7f, 0x7f, 0x08, 0x1c, 0x77, 0x63, 0x00,  # 'K'
+    0x41, 0x7f, 0x7f, 0x41, 0x40, 0x60, 0x70, 0x00,  # 'L'
+    0x7f, 0x7f, 0x0e, 0x1c, 0x0e, 0x7f, 0x7f, 0x00,  # 'M'
+    0x7f, 0x7f, 0x06, 0x0c, 0x18, 0x7f, 0x7f, 0x00,  # 'N'
+    0x1c, 0x3e, 0x63, 0x41, 0x63, 0x3e, 0x1c, 0x00,  # 'O'
+    0x41, 0x7f, 0x7f, 0x49, 0x09, 0x0f, 0x06, 0x00,  # 'P'
+    0x1e, 0x3f, 0x21, 0x71, 0x7f, 0x5e, 0x00, 0x00,  # 'Q'
+    0x41, 0x7f, 0x7f, 0x09, 0x19, 0x7f, 0x66, 0x00,  # 'R'
+    0x26, 0x6f, 0x4d, 0x59, 0x73, 0x32, 0x00, 0x00,  # 'S'
+    0x03, 0x41, 0x7f, 0x7f, 0x41, 0x03, 0x00, 0x00,  # 'T'
+    0x7f, 0x7f, 0x40, 0x40, 0x7f, 0x7f, 0x00, 0x00,  # 'U'
+    0x1f, 0x3f, 0x60, 0x60, 0x3f, 0x1f, 0x00, 0x00,  # 'V'
+    0x7f, 0x7f, 0x30, 0x18, 0x30, 0x7f, 0x7f, 0x00,  # 'W'
+    0x43, 0x67, 0x3c, 0x18, 0x3c, 0x67, 0x43, 0x00,  # 'X'
+    0x07, 0x4f, 0x78, 0x78, 0x4f, 0x07, 0x00, 0x00,  # 'Y'
+    0x47, 0x63, 0x71, 0x59, 0x4d, 0x67, 0x73, 0x00,  # 'Z'
+    0x00, 0x7f, 0x7f, 0x41, 0x41, 0x00, 0x00, 0x00,  # '['
+    0x01, 0x03, 0x06, 0x0c, 0x18, 0x30, 0x60, 0x00,  # '\\'
+    0x00, 0x41, 0x41, 0x7f, 0x7f, 0x00, 0x00, 0x00,  # ']'
+    0x08, 0x0c, 0x06, 0x03, 0x06, 0x0c, 0x08, 0x00,  # '^'
+    0x80, 0x80, 0x80, 0x80, 0x80, 0x80, 0x80, 0x80,  # '_'
+    0x00, 0x00, 0x03, 0x07, 0x04, 0x00, 0x00, 0x00,  # '`'
+    0x20, 0x74, 0x54, 0x54, 0x3c, 0x78, 0x40, 0x00,  # 'a'
+    0x41, 0x7f, 0x3f, 0x48, 0x48, 0x78, 0x30, 0x00,  # 'b'
+    0x38, 0x7c, 0x44, 0x44, 0x6c, 0x28, 0x00, 0x00,  # 'c'
+    0x30, 0x78, 0x48, 0x49, 0x3f, 0x7f, 0x40, 0x00,  # 'd'
+    0x38, 0x7c, 0x54, 0x54, 0x5c, 0x18, 0x00, 0x00,  # 'e'
+    0x48, 0x7e, 0x7f, 0x49, 0x03, 0x02, 0x00, 0x00,  # 'f'
+    0x98, 0xbc, 0xa4, 0xa4, 0xf8, 0x7c, 0x04, 0x00,  # 'g'
+    0x41, 0x7f, 0x7f, 0x08, 0x04, 0x7c, 0x78, 0x00,  # 'h'
+    0x00, 0x44, 0x7d, 0x7d, 0x40, 0x00, 0x00, 0x00,  # 'i'
+    0x60, 0xe0, 0x80, 0x80, 0xfd, 0x7d, 0x00, 0x00,  # 'j'
+    0x41, 0x7f, 0x7f, 0x10, 0x38, 0x6c, 0x44, 0x00,  # 'k'
+    0x00, 0x41, 0x7f, 0x7f, 0x40, 0x00, 0x00, 0x00,  # 'l'
+    0x7c, 0x7c, 0x18, 0x38, 0x1c, 0x7c, 0x78, 0x00,  # 'm'
+    0x7c, 0x7c, 0x04, 0x04, 0x7c, 0x78, 0x00, 0x00,  # 'n'
+    0x38, 0x7c, 0x44, 0x44, 0x7c, 0x38, 0x00, 0x00,  # 'o'
+    0x84, 0xfc, 0xf8, 0xa4, 0x24, 0x3c, 0x18, 0x00,  # 'p'
+    0x18, 0x3c, 0x24, 0xa4, 0xf8, 0xfc, 0x84, 0x00,  # 'q'
+    0x44, 0x7c, 0x78, 0x4c, 0x04, 0x1c, 0x18, 0x00,  # 'r'
+    0x48, 0x5c, 0x54, 0x54, 0x74, 0x24, 0x00, 0x00,  # 's'
+    0x00, 0x04, 0x3e, 0x7f, 0x44, 0x24, 0x00, 0x00,  # 't'
+    0x3c, 0x7c, 0x40, 0x40, 0x3c, 0x7c, 0x40, 0x00,  # 'u'
+    0x1c, 0x3c, 0x60, 0x60, 0x3c, 0x1c, 0x00, 0x00,  # 'v'
+    0x3c, 0x7c, 0x70, 0x38, 0x70, 0x7c, 0x3c, 0x00,  # 'w'
+    0x44, 0x6c, 0x38, 0x10, 0x38, 0x6c, 0x44, 0x00,  # 'x'
+    0x9c, 0xbc, 0xa0, 0xa0, 0xfc, 0x7c, 0x00, 0x00,  # 'y'
+    0x4c, 0x64, 0x74, 0x5c, 0x4c, 0x64, 0x00, 0x00,  # 'z'
+    0x08, 0x08, 0x3e, 0x77, 0x41, 0x41, 0x00, 0x00,  # '{'
+    0x00, 0x00, 0x00, 0x77, 0x77, 0x00, 0x00, 0x00,  # '|'
+    0x41, 0x41, 0x77, 0x3e, 0x08, 0x08, 0x00, 0x00,  # '}'
+    0x02, 0x03, 0x01, 0x03, 0x02, 0x03, 0x01, 0x00,  # '~'
+    0x70, 0x78, 0x4c, 0x46, 0x4c, 0x78, 0x70, 0x00,  # '\x7f'
+    ]
+)
+# fmt: on
+
+
+class FrameBuffer:
+    def __init__(self, buffer, width, height, format, stride=None):
+        if format != MONO_VLSB:
+            raise ValueError("only MONO_VLSB is emulated")
+        self.buffer = buffer
+        self.width = width
+        self.height = height
+        self.format = format
+        self.stride = width if stride is None else stride
+
+    def _set(self, x, y, c):
+        index = (y >> 3) * self.stride + x
+        bit = 1 << (y & 7)
+        if c:
+            self.buffer[index] |= bit
+        else:
+            self.buffer[index] &= ~bit & 0xFF
+
+    def _get(self, x, y):
+        return (self.buffer[(y >> 3) * self.stride + x] >> (y & 7)) & 1
+
+    def _fill_rect(self, x, y, w, h, c):
+        if (
+            w < 1
+            or h < 1
+            or x + w <= 0
+            or y + h <= 0
+            or y >= self.height
+            or x >= self.width
+        ):
+            return
+        xend = min(self.width, x + w)
+        yend = min(self.height, y + h)
+        x = max(x, 0)
+        y = max(y, 0)
+        for yy in range(y, yend):
+            for xx in range(x, xend):
+                self._set(xx, yy, c)
+
+    def fill(self, c):
+        value = 0xFF if c else 0x00
+        for i in range(len(self.buffer)):
+            self.buffer[i] = value
+
+    def pixel(self, x, y, c=None):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            if c is None:
+                return self._get(x, y)
+            self._set(x, y, c)
+        return None
+
+    def hline(self, x, y, w, c):
+        self._fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self._fill_rect(x, y, 1, h, c)
+
+    def fill_rect(self, x, y, w, h, c):
+        self._fill_rect(x, y, w, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self._fill_rect(x, y, w, h, c)
+        else:
+            self._fill_rect(x, y, w, 1, c)
+            self._fill_rect(x, y + h - 1, w, 1, c)
+            self._fill_rect(x, y, 1, h, c)
+            self._fill_rect(x + w - 1, y, 1, h, c)
+
+    def line(self, x1, y1, x2, y2, c):
+        dx = x2 - x1
+        if dx > 0:
+            sx = 1
+        else:
+            dx = -dx
+            sx = -1
+        dy = y2 - y1
+        if dy > 0:
+            sy = 1
+        else:
+            dy = -dy
+            sy = -1
+        steep = dy > dx
+        if steep:
+            x1, y1 = y1, x1
+            dx, dy = dy, dx
+            sx, sy = sy, sx
+        e = 2 * dy - dx
+        for _ in range(dx):
+            if steep:
+                if 0 <= y1 < self.width and 0 <= x1 < self.height:
+                    self._set(y1, x1, c)
+            elif 0 <= x1 < self.width and 0 <= y1 < self.height:
+                self._set(x1, y1, c)
+            while e >= 0:
+                y1 += sy
+                e -= 2 * dx
+            x1 += sx
+            e += 2 * dy
+        if 0 <= x2 < self.width and 0 <= y2 < self.height:
+            self._set(x2, y2, c)
+
+    def text(self, s, x0, y0, c=1):
+        if not isinstance(s, str):
+            raise TypeError(
+                "can't convert '{}' object to str implicitly".format(type(s).__name__)
+            )
+        for ch in s:
+            code = ord(ch)
+            if code < 32 or code > 127:
+                code = 127
+            glyph = (code - 32) * 8
+            for j in range(8):
+                x = x0 + j
+                if 0 <= x < self.width:
+                    column = _FONT[glyph + j]
+                    y = y0
+                    while column:
+                        if column & 1 and 0 <= y < self.height:
+                            self._set(x, y, c)
+                        column >>= 1
+                        y += 1
+            x0 += 8
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        if x >= self.width or y >= self.height or -x >= fbuf.width or -y >= fbuf.height:
+            return
+        x0 = max(0, x)
+        y0 = max(0, y)
+        x1 = max(0, -x)
+        y1 = max(0, -y)
+        x0end = min(self.width, x + fbuf.width)
+        y0end = min(self.height, y + fbuf.height)
+        cy1 = y1
+        for cy0 in range(y0, y0end):
+            cx1 = x1
+            for cx0 in range(x0, x0end):
+                col = fbuf._get(cx1, cy1)
+                if palette is not None:
+                    col = palette._get(col, 0)
+                if col != key:
+                    self._set(cx0, cy0, col)
+                cx1 += 1
+            cy1 += 1
+
+    def scroll(self, xstep, ystep):
+        if xstep < 0:
+            sx, xend, dx = 0, self.width + xstep, 1
+            if xend <= 0:
+                return
+        else:
+            sx, xend, dx = self.width - 1, xstep - 1, -1
+            if xend >= sx:
+                return
+        if ystep < 0:
+            y, yend, dy = 0, self.height + ystep, 1
+            if yend <= 0:
+                return
+        else:
+            y, yend, dy = self.height - 1, ystep - 1, -1
+            if yend >= y:
+                return
+        while y != yend:
+            x = sx
+            while x != xend:
+                self._set(x, y, self._get(x - xstep, y - ystep))
+                x += dx
+            y += dy
@@ -0,0 +1,277 @@
+"""Emulated `machine` module: Pin, I2C, Timer and PWM on top of the virtual clock.
+
+* `Pin` remembers every level change with its virtual timestamp in `Pin.edges`.
+* `I2C` hands write transactions to attached device models (an SSD1306 panel on 0x3C by
+  default) and counts transactions, bytes and the resulting bus time.
+* `Timer` fires its callback from the virtual clock, see `sim.clock`.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sim import clock
+from sim.panel import SSD1306Panel
+
+# addr -> factory for devices every new I2C bus gets
+device_factories: Dict[int, Callable[[], Any]] = {0x3C: SSD1306Panel}
+
+
+def freq(hz: Optional[int] = None) -> int:
+    return 125_000_000
+
+
+def idle():
+    """Wait for the next interrupt, which here means the next timer event (or 1 ms)."""
+    due = clock.next_event_us()
+    now = clock.now_us()
+    clock.advance_to(due if due is not None and due > now else now + 1000)
+
+
+def disable_irq() -> int:
+    return 0
+
+
+def enable_irq(state: int = 0):
+    pass
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    # id -> last Pin object created for it, lets a benchmark find pins created by the code under test
+    pins: Dict[int, "Pin"] = {}
+    # Virtual time every level change costs, models the interpreter overhead of a pin write
+    write_cost_us: int = 0
+
+    def __init__(
+        self, id: int, mode: int = -1, pull: int = -1, value: Optional[int] = None
+    ):
+        self.id = id
+        self.mode = mode
+        self.pull = pull
+        self._value = 1 if pull == Pin.PULL_UP else 0
+        self.edges: List[Tuple[int, int]] = []
+        self.record = True
+        self._irq_handler: Optional[Callable] = None
+        self._irq_trigger = 0
+        if value is not None:
+            self._value = 1 if value else 0
+        Pin.pins[id] = self
+
+    def _set(self, level: int):
+        if Pin.write_cost_us:
+            clock.advance(Pin.write_cost_us)
+        level = 1 if level else 0
+        if level == self._value:
+            return
+        self._value = level
+        if self.record:
+            self.edges.append((clock.now_us(), level))
+        if self._irq_handler is not None:
+            if (level and self._irq_trigger & Pin.IRQ_RISING) or (
+                not level and self._irq_trigger & Pin.IRQ_FALLING
+            ):
+                self._irq_handler(self)
+
+    def init(self, mode: int = -1, pull: int = -1, value: Optional[int] = None):
+        if mode != -1:
+            self.mode = mode
+        if pull != -1:
+            self.pull = pull
+        if value is not None:
+            self._set(value)
+
+    def value(self, x: Optional[Any] = None):
+        if x is None:
+            return self._value
+        self._set(x)
+        return None
+
+    def __call__(self, x: Optional[Any] = None):
+        return self.value(x)
+
+    def on(self):
+        self._set(1)
+
+    def off(self):
+        self._set(0)
+
+    high = on
+    low = off
+
+    def toggle(self):
+        self._set(not self._value)
+
+    def irq(
+        self,
+        handler: Optional[Callable] = None,
+        trigger: int = IRQ_FALLING | IRQ_RISING,
+        hard: bool = False,
+    ):
+        self._irq_handler = handler
+        self._irq_trigger = trigger
+
+    # simulation helpers
+
+    def drive(self, level: int):
+        """Set the level from the outside world, e.g. a pressed button on an input pin."""
+        self._set(level)
+
+
+class I2C:
+    def __init__(
+        self,
+        id: int = 0,
+        *,
+        scl: Optional[Pin] = None,
+        sda: Optional[Pin] = None,
+        freq: int = 400_000,
+    ):
+        self.id = id
+        self.freq = freq
+        self.devices: Dict[int, Any] = {
+            addr: factory() for addr, factory in device_factories.items()
+        }
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.transactions = 0
+        self.bytes = 0
+        self.bus_time_us = 0.0
+
+    def _transfer(self, addr: int, data: bytes) -> int:
+        if addr not in self.devices:
+            raise OSError(19)  # ENODEV, what the rp2 port raises without ACK
+        self.devices[addr].i2c_write(data)
+        self.transactions += 1
+        # address byte + payload, each byte is 8 bits + ACK, plus START and STOP
+        wire_bytes = len(data) + 1
+        self.bytes += wire_bytes
+        self.bus_time_us += (wire_bytes * 9 + 2) * 1_000_000 / self.freq
+        return len(data)
+
+    def scan(self) -> List[int]:
+        return sorted(self.devices)
+
+    def writeto(self, addr: int, buf, stop: bool = True) -> int:
+        return self._transfer(addr, bytes(buf))
+
+    def writevto(self, addr: int, vector, stop: bool = True) -> int:
+        return self._transfer(addr, b"".join(bytes(b) for b in vector))
+
+    def readfrom(self, addr: int, nbytes: int, stop: bool = True) -> bytes:
+        return bytes(nbytes)
+
+    def readfrom_into(self, addr: int, buf, stop: bool = True):
+        for i in range(len(buf)):
+            buf[i] = 0
+
+
+SoftI2C = I2C
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id: int = -1, **kwargs):
+        self.id = id
+        self._handle: Optional[int] = None
+        self._callback: Optional[Callable] = None
+        self._period_us = 0.0
+        self._mode = Timer.PERIODIC
+        self._due = 0.0
+        self.fired = 0
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(
+        self,
+        *,
+        mode: int = PERIODIC,
+        freq: float = -1,
+        period: int = -1,
+        tick_hz: int = 1000,
+        callback: Optional[Callable] = None,
+        hard: bool = True,
+    ):
+        self.deinit()
+        if freq is not None and freq != -1:
+            self._period_us = 1_000_000 / freq
+        else:
+            self._period_us = period * 1_000_000 / tick_hz
+        # the hardware alarm works in whole microseconds
+        self._period_us = max(1, int(self._period_us))
+        self._mode = mode
+        self._callback = callback
+        self._due = clock.now_us() + self._period_us
+        self._arm()
+
+    def _arm(self):
+        self._handle = clock.call_at(int(self._due), self._fire)
+
+    def _fire(self):
+        self._handle = None
+        if self._mode == Timer.PERIODIC:
+            self._due += self._period_us
+            self._arm()
+        self.fired += 1
+        if self._callback is not None:
+            self._callback(self)
+
+    def deinit(self):
+        if self._handle is not None:
+            clock.cancel(self._handle)
+            self._handle = None
+
+
+class PWM:
+    def __init__(
+        self,
+        dest: Pin,
+        *,
+        freq: int = 0,
+        duty_u16: int = 0,
+        duty_ns: int = 0,
+        invert: bool = False,
+    ):
+        self.pin = dest
+        self._freq = freq
+        self._duty_ns = duty_ns
+        self._duty_u16 = duty_u16
+        # (t_us, duty_ns) for every duty change
+        self.history: List[Tuple[int, int]] = []
+
+    def freq(self, value: Optional[int] = None):
+        if value is None:
+            return self._freq
+        self._freq = value
+        return None
+
+    def duty_ns(self, value: Optional[int] = None):
+        if value is None:
+            return self._duty_ns
+        self._duty_ns = int(value)
+        if self._freq:
+            self._duty_u16 = min(
+                65535, self._duty_ns * self._freq * 65535 // 1_000_000_000
+            )
+        self.history.append((clock.now_us(), self._duty_ns))
+        return None
+
+    def duty_u16(self, value: Optional[int] = None):
+        if value is None:
+            return self._duty_u16
+        self._duty_u16 = int(value)
+        if self._freq:
+            self._duty_ns = self._duty_u16 * 1_000_000_000 // (65535 * self._freq)
+        self.history.append((clock.now_us(), self._duty_ns))
+        return None
+
+    def deinit(self):
+        pass
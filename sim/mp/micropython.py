@@ -0,0 +1,43 @@
+"""Emulated `micropython` module. Code emitter decorators are no-ops under CPython."""
+
+from sim import clock
+
+
+def const(value):
+    return value
+
+
+def native(func):
+    return func
+
+
+def viper(func):
+    return func
+
+
+def schedule(func, arg):
+    clock.schedule(func, arg)
+
+
+def alloc_emergency_exception_buf(size: int):
+    pass
+
+
+def heap_lock() -> int:
+    return 0
+
+
+def heap_unlock() -> int:
+    return 0
+
+
+def opt_level(level=None):
+    return 0
+
+
+def mem_info(verbose=None):
+    pass
+
+
+def kbd_intr(chr: int):
+    pass
@@ -0,0 +1,355 @@
+"""Emulated `rp2` module: `asm_pio` programs run by a `StateMachine` model on the virtual clock.
+
+`asm_pio` records the program the same way MicroPython's assembler does (the decorated
+function is called with the PIO instructions as globals). `StateMachine` interprets it
+instruction by instruction with the real timing: every instruction takes one cycle plus its
+`[delay]` at the state machine's `freq`. Pin writes happen at the virtual time of their cycle,
+so the STEP pin edges of a PIO program can be checked like the ones of the Python engines.
+
+Supported: `pull`, `push`, `mov`, `set`, `jmp` (all conditions), `irq`, `nop`, `label`,
+`wrap_target`, `wrap` and `[delay]`. Side-set, `in`/`out`/`wait` and a blocking `push` on a
+full RX FIFO are not modelled.
+
+Like the IRQ flag of the hardware, an `irq` while the handler of the last one has not run yet
+does not call the handler a second time.
+"""
+
+import math
+import types
+from typing import Any, Callable, Dict, List, Optional
+
+from sim import clock
+
+
+class PIO:
+    OUT_LOW = 0
+    OUT_HIGH = 1
+    IN_LOW = 2
+    IN_HIGH = 3
+    SHIFT_LEFT = 0
+    SHIFT_RIGHT = 1
+    IRQ_SM0 = 0x100
+    IRQ_SM1 = 0x200
+    IRQ_SM2 = 0x400
+    IRQ_SM3 = 0x800
+
+    def __init__(self, id: int):
+        self.id = id
+
+
+class _Instr:
+    def __init__(self, op: str, *args):
+        self.op = op
+        self.args = args
+        self.delay = 0
+
+    def __getitem__(self, delay: int) -> "_Instr":
+        self.delay = delay
+        return self
+
+    def __repr__(self):
+        return "{}{}[{}]".format(self.op, self.args, self.delay)
+
+
+class _Program:
+    def __init__(self, instructions: List[_Instr], labels: Dict[str, int], config):
+        self.instructions = instructions
+        self.labels = labels
+        self.config = config
+        wrap_target = labels.get("__wrap_target", 0)
+        self.wrap_target = wrap_target
+        self.wrap = labels.get("__wrap", len(instructions)) - 1
+
+
+def asm_pio(**config) -> Callable[[Callable], _Program]:
+    def decorator(func: Callable) -> _Program:
+        instructions: List[_Instr] = []
+        labels: Dict[str, int] = {}
+
+        def emit(op):
+            def instruction(*args):
+                instr = _Instr(op, *args)
+                instructions.append(instr)
+                return instr
+
+            return instruction
+
+        def label(name: str):
+            labels[name] = len(instructions)
+
+        def wrap_target():
+            labels["__wrap_target"] = len(instructions)
+
+        def wrap():
+            labels["__wrap"] = len(instructions)
+
+        names = {
+            "pull": emit("pull"),
+            "push": emit("push"),
+            "mov": emit("mov"),
+            "set": emit("set"),
+            "jmp": emit("jmp"),
+            "irq": emit("irq"),
+            "nop": emit("nop"),
+            "label": label,
+            "wrap_target": wrap_target,
+            "wrap": wrap,
+            "rel": lambda index: ("rel", index),
+            "block": "block",
+            "noblock": "noblock",
+            "clear": "clear",
+            "ifempty": "ifempty",
+            "iffull": "iffull",
+        }
+        for name in (
+            "pins",
+            "x",
+            "y",
+            "osr",
+            "isr",
+            "null",
+            "not_x",
+            "x_dec",
+            "not_y",
+            "y_dec",
+            "x_not_y",
+            "pin",
+            "not_osre",
+            "pindirs",
+        ):
+            names[name] = name
+        scope = dict(func.__globals__)
+        scope.update(names)
+        types.FunctionType(func.__code__, scope)()
+        return _Program(instructions, labels, config)
+
+    return decorator
+
+
+_MASK = 0xFFFFFFFF
+
+
+class StateMachine:
+    TX_FIFO_DEPTH = 4
+    RX_FIFO_DEPTH = 4
+
+    # id -> StateMachine, like the 8 hardware state machines
+    machines: Dict[int, "StateMachine"] = {}
+
+    def __init__(self, id: int, program: Optional[_Program] = None, **kwargs):
+        self.id = id
+        self.program: Optional[_Program] = None
+        self._active = False
+        self._handle: Optional[int] = None
+        self._irq_handler: Optional[Callable[[Any], None]] = None
+        self._irq_pending = False
+        self.irq_count = 0
+        StateMachine.machines[id] = self
+        if program is not None:
+            self.init(program, **kwargs)
+
+    def init(
+        self,
+        program: _Program,
+        freq: int = 125_000_000,
+        *,
+        set_base=None,
+        out_base=None,
+        in_base=None,
+        sideset_base=None,
+        jmp_pin=None,
+        **kwargs,
+    ):
+        self.program = program
+        self.freq = freq
+        self.set_base = set_base
+        self.jmp_pin = jmp_pin
+        self.tx: List[int] = []
+        self.rx: List[int] = []
+        self.pc = 0
+        self.x = 0
+        self.y = 0
+        self.osr = 0
+        self.isr = 0
+        self.cycles = 0
+        self._start_us = clock.now_us()
+        self._stalled = False
+        set_init = program.config.get("set_init")
+        if set_base is not None and set_init is not None:
+            levels = set_init if isinstance(set_init, tuple) else (set_init,)
+            for level in levels:
+                set_base.value(1 if level in (PIO.OUT_HIGH, PIO.IN_HIGH) else 0)
+
+    def _now_us(self) -> float:
+        return self._start_us + self.cycles * 1_000_000 / self.freq
+
+    def active(self, value: Optional[int] = None):
+        if value is None:
+            return self._active
+        self._active = bool(value)
+        if self._active:
+            self._start_us = clock.now_us()
+            self.cycles = 0
+            self._schedule()
+        elif self._handle is not None:
+            clock.cancel(self._handle)
+            self._handle = None
+        return None
+
+    def restart(self):
+        self.pc = 0
+        self.x = self.y = self.osr = self.isr = 0
+        self.tx.clear()
+        self.rx.clear()
+        self._stalled = False
+
+    def put(self, value, shift: int = 0):
+        if len(self.tx) >= self.TX_FIFO_DEPTH:
+            # the real put() blocks until the state machine pulled a word, let time pass
+            while len(self.tx) >= self.TX_FIFO_DEPTH and self._active:
+                due = clock.next_event_us()
+                if due is None:
+                    raise RuntimeError("put() on a full FIFO that is never read")
+                clock.advance_to(max(due, clock.now_us()))
+        self.tx.append((int(value) >> shift) & _MASK)
+        if self._stalled and self._active:
+            self._stalled = False
+            # the stalled pull completes now
+            self._start_us = clock.now_us()
+            self.cycles = 0
+            self._schedule()
+
+    def tx_fifo(self) -> int:
+        return len(self.tx)
+
+    def rx_fifo(self) -> int:
+        return len(self.rx)
+
+    def get(self, buf=None, shift: int = 0) -> int:
+        if not self.rx:
+            # the real get() blocks until the state machine pushed a word, let time pass
+            while not self.rx and self._active:
+                due = clock.next_event_us()
+                if due is None:
+                    raise RuntimeError("get() on an empty FIFO that is never written")
+                clock.advance_to(max(due, clock.now_us()))
+        return self.rx.pop(0) >> shift
+
+    def irq(self, handler=None, trigger: int = 1, hard: bool = False):
+        self._irq_handler = handler
+
+    def _irq(self, _):
+        self._irq_pending = False
+        if self._irq_handler is not None:
+            self._irq_handler(self)
+
+    def _schedule(self):
+        if self._handle is not None:
+            clock.cancel(self._handle)
+        self._handle = clock.call_at(math.ceil(self._now_us()), self._run)
+
+    def _run(self):
+        self._handle = None
+        program = self.program
+        while self._active and not self._stalled and self._now_us() <= clock.now_us():
+            self._step(program)
+        if self._active and not self._stalled:
+            self._schedule()
+
+    def _set_pins(self, value: int):
+        if self.set_base is not None:
+            self.set_base.value(value & 1)
+
+    def _read(self, source: str) -> int:
+        if source == "null":
+            return 0
+        return getattr(self, source)
+
+    def _step(self, program: _Program):
+        instr = program.instructions[self.pc]
+        op = instr.op
+        args = instr.args
+        next_pc = self.pc + 1
+        cycles = 1 + instr.delay
+        if op == "pull":
+            block = "noblock" not in args
+            if self.tx:
+                self.osr = self.tx.pop(0)
+            elif block:
+                self._stalled = True
+                return
+            else:
+                self.osr = self.x
+        elif op == "push":
+            if len(self.rx) < self.RX_FIFO_DEPTH:
+                self.rx.append(self.isr)
+            elif "noblock" not in args:
+                raise NotImplementedError("blocking push on a full RX FIFO")
+            self.isr = 0
+        elif op == "mov":
+            dest, source = args
+            value = self._read(source) & _MASK
+            if dest == "pins":
+                self._set_pins(value)
+            else:
+                setattr(self, dest, value)
+        elif op == "set":
+            dest, value = args
+            if dest == "pins":
+                self._set_pins(value)
+            elif dest in ("x", "y"):
+                setattr(self, dest, value)
+        elif op == "jmp":
+            if len(args) == 1:
+                condition, target = None, args[0]
+            else:
+                condition, target = args
+            address = program.labels[target] if isinstance(target, str) else target
+            if condition in ("x_dec", "y_dec") and address == self.pc:
+                # tight decrement loop: run all iterations at once
+                register = condition[0]
+                count = getattr(self, register)
+                cycles *= count + 1
+                setattr(self, register, _MASK)
+            else:
+                take = self._condition(condition)
+                if take:
+                    next_pc = address
+        elif op == "irq":
+            index = args[-1]
+            if isinstance(index, tuple):
+                index = (index[1] + self.id) & 3
+            if "clear" not in args:
+                self.irq_count += 1
+                if self._irq_handler is not None and not self._irq_pending:
+                    self._irq_pending = True
+                    clock.schedule(self._irq, None)
+        elif op != "nop":
+            raise NotImplementedError("PIO instruction {} is not modelled".format(op))
+        self.cycles += cycles
+        if self.pc == program.wrap and next_pc == self.pc + 1:
+            next_pc = program.wrap_target
+        self.pc = next_pc
+
+    def _condition(self, condition) -> bool:
+        if condition is None:
+            return True
+        if condition == "not_x":
+            return self.x == 0
+        if condition == "not_y":
+            return self.y == 0
+        if condition == "x_dec":
+            value = self.x
+            self.x = (self.x - 1) & _MASK
+            return value != 0
+        if condition == "y_dec":
+            value = self.y
+            self.y = (self.y - 1) & _MASK
+            return value != 0
+        if condition == "x_not_y":
+            return self.x != self.y
+        if condition == "pin":
+            return bool(self.jmp_pin is not None and self.jmp_pin.value())
+        if condition == "not_osre":
+            return False
+        raise NotImplementedError("jmp condition {}".format(condition))
@@ -0,0 +1,104 @@
+"""Emulated `uasyncio` on top of CPython's asyncio, running on the virtual clock.
+
+`run()` uses `VirtualTimeLoop`: the loop reads the time from `sim.clock` and instead of
+sleeping until the next timer it advances the virtual clock, firing `machine.Timer` events
+that come due on the way. A coroutine that sleeps 1 s finishes instantly in real time, and
+every `sleep_ms()` wakes up at exactly the virtual time it asked for.
+"""
+
+from asyncio import *  # noqa: F401,F403
+import asyncio as _asyncio
+import math
+import selectors
+import types
+
+from sim import clock
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    """Polls real file descriptors without blocking, lets virtual time pass instead."""
+
+    def select(self, timeout=None):
+        ready = super().select(0)
+        if ready or timeout == 0:
+            return ready
+        due = clock.next_event_us()
+        if timeout is None:
+            if due is None:
+                # nothing will ever happen in virtual time, only real fds can wake us
+                return super().select(None)
+            clock.advance_to(due)
+            return []
+        target = clock.now_us() + math.ceil(timeout * 1_000_000)
+        clock.advance_to(target if due is None else min(due, target))
+        return []
+
+
+class VirtualTimeLoop(_asyncio.SelectorEventLoop):
+    def __init__(self):
+        super().__init__(_VirtualSelector())
+        self._clock_resolution = 1e-6
+
+    def time(self) -> float:
+        return clock.now_us() / 1_000_000
+
+
+def new_event_loop() -> VirtualTimeLoop:
+    return VirtualTimeLoop()
+
+
+def run(coro):
+    """`uasyncio.run()` on a fresh `VirtualTimeLoop`"""
+    loop = VirtualTimeLoop()
+    _asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+        _asyncio.set_event_loop(None)
+
+
+async def sleep_ms(ms):
+    await _asyncio.sleep(ms / 1000)
+
+
+class ThreadSafeFlag:
+    def __init__(self):
+        self._event = _asyncio.Event()
+
+    def set(self):
+        self._event.set()
+
+    def clear(self):
+        self._event.clear()
+
+    # a generator based coroutine like on the device, so `yield from flag.wait()` works
+    # in the `__iter__`/`__await__` of custom awaitables
+    @types.coroutine
+    def wait(self):
+        yield from self._event.wait()
+        self._event.clear()
+
+
+class StreamReader:
+    """MicroPython's `uasyncio.StreamReader(stream)`: waits until the stream is readable."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    async def _wait(self):
+        fut = _asyncio.get_running_loop().create_future()
+        loop = _asyncio.get_running_loop()
+        loop.add_reader(self.stream, lambda: fut.done() or fut.set_result(None))
+        try:
+            await fut
+        finally:
+            loop.remove_reader(self.stream)
+
+    async def readinto(self, buf):
+        await self._wait()
+        return self.stream.readinto(buf)
+
+    async def read(self, n=-1):
+        await self._wait()
+        return self.stream.read(n)
@@ -0,0 +1,51 @@
+"""Emulated `utime` backed by the virtual clock in `sim.clock`."""
+
+from sim import clock
+
+_TICKS_PERIOD = 1 << 30
+_TICKS_MAX = _TICKS_PERIOD - 1
+_TICKS_HALFPERIOD = _TICKS_PERIOD // 2
+
+
+def ticks_us() -> int:
+    return clock.now_us() & _TICKS_MAX
+
+
+def ticks_ms() -> int:
+    return (clock.now_us() // 1000) & _TICKS_MAX
+
+
+ticks_cpu = ticks_us
+
+
+def ticks_add(ticks: int, delta: int) -> int:
+    return (ticks + delta) & _TICKS_MAX
+
+
+def ticks_diff(ticks1: int, ticks2: int) -> int:
+    diff = (ticks1 - ticks2) & _TICKS_MAX
+    return ((diff + _TICKS_HALFPERIOD) & _TICKS_MAX) - _TICKS_HALFPERIOD
+
+
+# Virtual time a sleep call costs on top of the requested time (call overhead, wake-up latency)
+call_overhead_us: int = 0
+
+
+def sleep_us(us: int):
+    clock.advance(max(0, int(us)) + call_overhead_us)
+
+
+def sleep_ms(ms: int):
+    clock.advance(max(0, int(ms * 1000)) + call_overhead_us)
+
+
+def sleep(seconds: float):
+    clock.advance(max(0, int(seconds * 1_000_000)))
+
+
+def time() -> int:
+    return clock.now_us() // 1_000_000
+
+
+def time_ns() -> int:
+    return clock.now_us() * 1000
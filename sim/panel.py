@@ -0,0 +1,184 @@
+"""Model of an SSD1306 controller sitting on the emulated I2C bus.
+
+It decodes the command and data stream the same way the chip does (horizontal addressing
+with column/page windows, page addressing, display on/off, invert, contrast), keeps its own
+GDDRAM and can dump what the panel shows as PGM or PNG. Because the model only sees the
+bytes that went over the bus, a golden image taken from it also covers partial flushes.
+"""
+
+import struct
+import zlib
+from typing import List
+
+# command -> amount of parameter bytes
+_CMD_PARAMS = {
+    0x20: 1,  # memory addressing mode
+    0x21: 2,  # column address window
+    0x22: 2,  # page address window
+    0x26: 6,  # horizontal scroll setup
+    0x27: 6,
+    0x29: 5,
+    0x2A: 5,
+    0x81: 1,  # contrast
+    0x8D: 1,  # charge pump
+    0xA3: 2,  # vertical scroll area
+    0xA8: 1,  # multiplex ratio
+    0xD3: 1,  # display offset
+    0xD5: 1,  # clock divide
+    0xD9: 1,  # pre-charge
+    0xDA: 1,  # com pins
+    0xDB: 1,  # vcom detect
+}
+
+
+class SSD1306Panel:
+    COLUMNS = 128
+    PAGES = 8
+
+    def __init__(self):
+        self.gddram = bytearray(self.COLUMNS * self.PAGES)
+        self.mux = 63
+        self.addressing_mode = 0x02
+        self.col_start, self.col_end = 0, self.COLUMNS - 1
+        self.page_start, self.page_end = 0, self.PAGES - 1
+        self.col, self.page = 0, 0
+        self.on = False
+        self.inverted = False
+        self.contrast = 0x7F
+        self._cmd: List[int] = []
+
+    # --- I2C side
+
+    def i2c_write(self, data: bytes):
+        """One I2C write transaction addressed to the panel."""
+        i = 0
+        while i < len(data):
+            control = data[i]
+            i += 1
+            continuation = control & 0x80
+            is_data = control & 0x40
+            if continuation:
+                # Co=1: exactly one byte follows, then another control byte
+                if i < len(data):
+                    self._byte(data[i], is_data)
+                    i += 1
+            else:
+                for byte in data[i:]:
+                    self._byte(byte, is_data)
+                return
+
+    def _byte(self, byte: int, is_data: int):
+        if is_data:
+            self._data(byte)
+        else:
+            self._command_byte(byte)
+
+    def _data(self, byte: int):
+        self.gddram[self.page * self.COLUMNS + self.col] = byte
+        if self.addressing_mode == 0x00:
+            self.col += 1
+            if self.col > self.col_end:
+                self.col = self.col_start
+                self.page += 1
+                if self.page > self.page_end:
+                    self.page = self.page_start
+        elif self.addressing_mode == 0x01:
+            self.page += 1
+            if self.page > self.page_end:
+                self.page = self.page_start
+                self.col += 1
+                if self.col > self.col_end:
+                    self.col = self.col_start
+        else:
+            self.col = min(self.col + 1, self.COLUMNS - 1)
+
+    def _command_byte(self, byte: int):
+        self._cmd.append(byte)
+        need = _CMD_PARAMS.get(self._cmd[0], 0)
+        if len(self._cmd) > need:
+            cmd = self._cmd
+            self._cmd = []
+            self._command(cmd[0], cmd[1:])
+
+    def _command(self, cmd: int, params: List[int]):
+        if cmd == 0x20:
+            self.addressing_mode = params[0] & 0x03
+        elif cmd == 0x21:
+            self.col_start, self.col_end = params[0] & 0x7F, params[1] & 0x7F
+            self.col = self.col_start
+        elif cmd == 0x22:
+            self.page_start, self.page_end = params[0] & 0x07, params[1] & 0x07
+            self.page = self.page_start
+        elif cmd == 0x81:
+            self.contrast = params[0]
+        elif cmd == 0xA8:
+            self.mux = params[0] & 0x3F
+        elif cmd in (0xAE, 0xAF):
+            self.on = cmd == 0xAF
+        elif cmd in (0xA6, 0xA7):
+            self.inverted = cmd == 0xA7
+        elif 0xB0 <= cmd <= 0xB7:
+            self.page = cmd & 0x07
+        elif cmd <= 0x0F:
+            self.col = (self.col & 0xF0) | cmd
+        elif 0x10 <= cmd <= 0x1F:
+            self.col = (self.col & 0x0F) | ((cmd & 0x0F) << 4)
+
+    # --- what the panel shows
+
+    @property
+    def height(self) -> int:
+        return self.mux + 1
+
+    def visible(self, width: int = COLUMNS) -> bytes:
+        """GDDRAM of the visible rows, same layout as a MONO_VLSB framebuffer of the display."""
+        offset = (self.COLUMNS - width) // 2
+        out = bytearray()
+        for page in range(self.height // 8):
+            base = page * self.COLUMNS + offset
+            out += self.gddram[base : base + width]
+        return bytes(out)
+
+    def pixels(self, width: int = COLUMNS) -> List[bytes]:
+        """Rows of 0/255 grey values as seen on the glass."""
+        offset = (self.COLUMNS - width) // 2
+        rows = []
+        for y in range(self.height):
+            row = bytearray(width)
+            for x in range(width):
+                lit = (self.gddram[(y >> 3) * self.COLUMNS + offset + x] >> (y & 7)) & 1
+                if self.inverted:
+                    lit ^= 1
+                row[x] = 255 if (lit and self.on) else 0
+            rows.append(bytes(row))
+        return rows
+
+    def to_pgm(self, width: int = COLUMNS) -> bytes:
+        rows = self.pixels(width)
+        return b"P5\n%d %d\n255\n" % (width, len(rows)) + b"".join(rows)
+
+    def to_png(self, width: int = COLUMNS) -> bytes:
+        rows = self.pixels(width)
+
+        def chunk(kind: bytes, body: bytes) -> bytes:
+            return (
+                struct.pack(">I", len(body))
+                + kind
+                + body
+                + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF)
+            )
+
+        header = struct.pack(">IIBBBBB", width, len(rows), 8, 0, 0, 0, 0)
+        raw = b"".join(b"\x00" + row for row in rows)
+        return (
+            b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw))
+            + chunk(b"IEND", b"")
+        )
+
+    def save(self, path: str, width: int = COLUMNS):
+        """Write a .pgm or .png file, picked by the file extension."""
+        data = self.to_png(width) if path.endswith(".png") else self.to_pgm(width)
+        with open(path, "wb") as f:
+            f.write(data)
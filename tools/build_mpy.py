@@ -0,0 +1,114 @@
+"""Cross-compile the `perfmon` package to .mpy files for the pico (CPython).
+
+MicroPython compiles every imported `.py` on the device, which takes time and heap for the
+parser and compiler at every boot. A `.mpy` already holds the bytecode (and the machine code of
+`@micropython.native` functions), the device only loads it. `mpy-cross` (`pip install mpy-cross`)
+has to emit the .mpy version the firmware on the pico reads, see `mpy-cross --version`.
+
+Usage:
+    python tools/build_mpy.py [--out build] [--trace] [--deploy]
+
+`build/` then holds `perfmon/*.mpy` and `main.py`, which stays source since MicroPython only runs
+a `main.py` at boot (it is small, the work is in the package). `--deploy` copies both with
+mpremote after removing the package from the pico: MicroPython imports a `.py` before a `.mpy`
+of the same name. `--trace` compiles with `_TRACE = const(1)` in every module, see
+`perfmon/trace.py`.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import List, Optional, Sequence, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "perfmon"
+TRACE_OFF = "_TRACE = const(0)"
+TRACE_ON = "_TRACE = const(1)"
+
+# (module path, source bytes, .mpy bytes)
+Size = Tuple[str, int, int]
+
+
+def build(
+    out_dir: str, trace: bool = False, mpy_cross: str = "mpy-cross", march="armv6m"
+) -> List[Size]:
+    package_out = os.path.join(out_dir, PACKAGE)
+    if os.path.isdir(package_out):
+        shutil.rmtree(package_out)
+    os.makedirs(package_out)
+    sizes: List[Size] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in sorted(os.listdir(os.path.join(ROOT, PACKAGE))):
+            if not name.endswith(".py"):
+                continue
+            source = os.path.join(ROOT, PACKAGE, name)
+            with open(source) as f:
+                code = f.read()
+            if trace:
+                code = code.replace(TRACE_OFF, TRACE_ON)
+                source = os.path.join(tmp, name)
+                with open(source, "w") as f:
+                    f.write(code)
+            module = PACKAGE + "/" + name
+            target = os.path.join(package_out, name[:-3] + ".mpy")
+            subprocess.run(
+                [mpy_cross, "-march=" + march, "-s", module, "-o", target, source],
+                check=True,
+            )
+            sizes.append((module, len(code.encode()), os.path.getsize(target)))
+    shutil.copy(os.path.join(ROOT, "main.py"), os.path.join(out_dir, "main.py"))
+    return sizes
+
+
+def deploy(out_dir: str, mpremote: str = "mpremote"):
+    # fails if there is no package on the pico yet
+    subprocess.run([mpremote, "rm", "-r", ":" + PACKAGE], check=False)
+    subprocess.run(
+        [mpremote, "cp", "-r", os.path.join(out_dir, PACKAGE), ":"], check=True
+    )
+    subprocess.run(
+        [mpremote, "cp", os.path.join(out_dir, "main.py"), ":main.py"], check=True
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--out", default=os.path.join(ROOT, "build"))
+    parser.add_argument(
+        "--trace", action="store_true", help="compile with the span tracer on"
+    )
+    parser.add_argument(
+        "--march",
+        default="armv6m",
+        help="native code architecture, armv6m for the RP2040 (default)",
+    )
+    parser.add_argument("--mpy-cross", default="mpy-cross")
+    parser.add_argument(
+        "--deploy", action="store_true", help="copy the build to the pico"
+    )
+    parser.add_argument("--mpremote", default="mpremote")
+    args = parser.parse_args(argv)
+
+    try:
+        sizes = build(args.out, args.trace, args.mpy_cross, args.march)
+    except FileNotFoundError:
+        sys.exit("{} not found, pip install mpy-cross".format(args.mpy_cross))
+    print("{:<22} {:>10} {:>10}".format("module", "source", ".mpy"))
+    for module, source, mpy in sizes:
+        print("{:<22} {:>10} {:>10}".format(module, source, mpy))
+    print(
+        "{:<22} {:>10} {:>10}".format(
+            "total", sum(size[1] for size in sizes), sum(size[2] for size in sizes)
+        )
+    )
+    if args.deploy:
+        deploy(args.out, args.mpremote)
+
+
+if __name__ == "__main__":
+    main()